@@ -0,0 +1,709 @@
+#!/usr/bin/env python3
+"""
+Performance Benchmarks
+Times the data paths of the web application against their previous implementations
+
+Usage: python benchmarks.py <benchmark> [--size N]
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import urllib.error
+import urllib.request
+import uuid
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.utils
+
+from charts import figure_json, plan_charts, template_json
+from event_export import EXPORT_FORMATS, parquet_available, write_xlsx
+from event_import import build_events, parse_event_header, prepare_import, read_import_file, validate_rows
+from event_frames import flatten_events, flatten_file
+from event_snapshots import ColumnarSnapshots
+from event_store import JsonEventStore
+from season_index import SEASON_INDEX_DIRNAME, SeasonIndex, index_file
+from upload_processing import MISSING_SENTINELS, analyze_data, clean_upload_frame, parse_money
+
+
+def best_of(func, repeat=3):
+    """Return the fastest wall-clock time of several runs, in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def make_events(count, seed=0):
+    """Generate synthetic managed events shaped like the ones the data management page saves."""
+    rng = random.Random(seed)
+    locations = ['Delaware,Ohio', 'Columbus,Ohio', 'Cleveland,Ohio', 'Chicago,Illinois', 'Denver,Colorado']
+    events = []
+    for i in range(count):
+        income = float(rng.randint(0, 20000))
+        expenses = float(rng.randint(0, 20000))
+        event = {
+            'id': f"event_{i + 1}",
+            'date': f"{rng.randint(2015, 2025)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            'name': f"OWU Near You - Event {i % 250}",
+            'location': rng.choice(locations),
+            'description': 'Generated event',
+            'created_date': '2025-08-31 02:05:08',
+            'income': income,
+            'expenses': expenses,
+            'underwritten': 0.0,
+            'profit_loss': income - expenses
+        }
+        if rng.random() < 0.8:
+            ya, alumni = rng.randint(0, 300), rng.randint(0, 300)
+            event['attendance'] = {
+                'yearRanges': {'yaStartYear': '2014', 'yaEndYear': '2024', 'alumniCutoffYear': '2013'},
+                'alumni': {'yaRegistered': ya, 'alumniRegistered': alumni, 'totalAlumniAttended': ya + alumni},
+                'other': {'students': rng.randint(0, 200), 'friendsFamily': rng.randint(0, 200),
+                          'staffFaculty': rng.randint(0, 20)},
+                'totals': {'totalAlumniGuests': ya + alumni, 'percentYAAttendees': 40.0,
+                           'percentNonYAAttendees': 60.0}
+            }
+        if rng.random() < 0.6:
+            event['first_time_attendees'] = {'alumni': rng.randint(0, 150), 'parents': rng.randint(0, 100),
+                                             'friends': rng.randint(0, 50)}
+        if rng.random() < 0.5:
+            ratings = [rng.randint(0, 10) for _ in range(5)]
+            event['feedback'] = {'rating5': ratings[0], 'rating4': ratings[1], 'rating3': ratings[2],
+                                 'rating2': ratings[3], 'rating1': ratings[4], 'total': sum(ratings)}
+        events.append(event)
+    return events
+
+
+def legacy_flatten(events):
+    """The per-row dict loop that export_file and visualize_file used before event_frames."""
+    events_data = []
+    for event in events:
+        event_row = {
+            'Date': event.get('date', ''),
+            'Event Name': event.get('name', ''),
+            'Location': event.get('location', ''),
+            'Description': event.get('description', ''),
+            'Event Income': event.get('income', 0),
+            'All Incurred Expenses': event.get('expenses', 0),
+            'Underwritten': event.get('underwritten', 0),
+            'Profit/Loss': event.get('profit_loss', 0)
+        }
+        if 'attendance' in event:
+            attendance = event['attendance']
+            if 'yearRanges' in attendance:
+                event_row['Young Alumni Start Year'] = attendance['yearRanges'].get('yaStartYear', '')
+                event_row['Young Alumni End Year'] = attendance['yearRanges'].get('yaEndYear', '')
+                event_row['Alumni Cutoff Year'] = attendance['yearRanges'].get('alumniCutoffYear', '')
+            if 'alumni' in attendance:
+                event_row['Young Alumni Registered'] = attendance['alumni'].get('yaRegistered', 0)
+                event_row['Alumni Registered'] = attendance['alumni'].get('alumniRegistered', 0)
+                event_row['Total Alumni Attended'] = attendance['alumni'].get('totalAlumniAttended', 0)
+            if 'other' in attendance:
+                event_row['Students Attended'] = attendance['other'].get('students', 0)
+                event_row['Friends/Family Attended'] = attendance['other'].get('friendsFamily', 0)
+                event_row['Staff/Faculty Attended'] = attendance['other'].get('staffFaculty', 0)
+            if 'totals' in attendance:
+                event_row['Total Alumni/Guests'] = attendance['totals'].get('totalAlumniGuests', 0)
+                event_row['% Young Alumni Attendees'] = attendance['totals'].get('percentYAAttendees', 0)
+                event_row['% Non-Young Alumni Attendees'] = attendance['totals'].get('percentNonYAAttendees', 0)
+        if 'first_time_attendees' in event:
+            first_time = event['first_time_attendees']
+            event_row['1st Time Alumni'] = first_time.get('alumni', 0)
+            event_row['1st Time Parents'] = first_time.get('parents', 0)
+            event_row['1st Time Friends'] = first_time.get('friends', 0)
+        if 'feedback' in event:
+            feedback = event['feedback']
+            event_row['5-Star Ratings'] = feedback.get('rating5', 0)
+            event_row['4-Star Ratings'] = feedback.get('rating4', 0)
+            event_row['3-Star Ratings'] = feedback.get('rating3', 0)
+            event_row['2-Star Ratings'] = feedback.get('rating2', 0)
+            event_row['1-Star Ratings'] = feedback.get('rating1', 0)
+            event_row['Total Ratings'] = feedback.get('total', 0)
+        events_data.append(event_row)
+    return pd.DataFrame(events_data)
+
+
+def bench_flatten(size):
+    """Flattening nested events into a DataFrame: per-row dicts vs columnar single pass."""
+    events = make_events(size)
+    legacy = legacy_flatten(events)
+    columnar = flatten_events(events)
+    pd.testing.assert_frame_equal(columnar, legacy[columnar.columns], check_dtype=False)
+
+    legacy_time = best_of(lambda: legacy_flatten(events))
+    columnar_time = best_of(lambda: flatten_events(events))
+    print(f"Flatten {size:,} events")
+    print(f"  per-row dicts:   {legacy_time * 1000:8.1f} ms")
+    print(f"  columnar:        {columnar_time * 1000:8.1f} ms  ({legacy_time / columnar_time:.1f}x)")
+
+
+def make_upload_frame(rows, seed=0):
+    """A cleaned upload: a few money columns, counts, a text column and a date column."""
+    rng = np.random.default_rng(seed)
+    income = rng.integers(0, 20000, rows).astype(float)
+    income[rng.random(rows) < 0.1] = np.nan
+    return pd.DataFrame({
+        'Event': rng.choice([f"OWU Near You - City {i}" for i in range(500)], rows).astype(object),
+        'Date': pd.Timestamp('2015-01-01') + pd.to_timedelta(rng.integers(0, 3650, rows), unit='D'),
+        'Event Income': income,
+        'All Incurred Expenses': rng.integers(0, 20000, rows).astype(float),
+        'Underwritten': rng.integers(0, 1000, rows),
+        'Profit/Loss': rng.normal(0, 5000, rows),
+        'Attendees': rng.integers(0, 900, rows)
+    })
+
+
+def legacy_analyze_data(df):
+    """analyze_data as it was before profiling was vectorized."""
+    data_types_dict = {}
+    for col, dtype in df.dtypes.items():
+        data_types_dict[str(col)] = str(dtype)
+    missing_values_dict = {}
+    for col, count in df.isnull().sum().items():
+        missing_values_dict[str(col)] = int(count)
+    sample_data = []
+    for idx, row in df.head(10).iterrows():
+        row_dict = {}
+        for col in df.columns:
+            value = row[col]
+            if pd.isna(value):
+                row_dict[str(col)] = None
+            elif isinstance(value, (np.integer, np.floating)):
+                row_dict[str(col)] = float(value) if isinstance(value, np.floating) else int(value)
+            else:
+                row_dict[str(col)] = str(value)
+        sample_data.append(row_dict)
+    with warnings.catch_warnings():
+        # pandas 3 warns that select_dtypes('object') also matches 'str' columns
+        warnings.simplefilter('ignore')
+        return {
+            'shape': [int(df.shape[0]), int(df.shape[1])],
+            'columns': [str(col) for col in df.columns],
+            'data_types': data_types_dict,
+            'numeric_columns': [str(col) for col in df.select_dtypes(include=[np.number]).columns],
+            'categorical_columns': [str(col) for col in df.select_dtypes(include=['object']).columns],
+            'datetime_columns': [str(col) for col in df.select_dtypes(include=['datetime64']).columns],
+            'missing_values': missing_values_dict,
+            'sample_data': sample_data
+        }
+
+
+def bench_profile(size):
+    """Profiling an upload with analyze_data: old loop vs vectorized (which also computes column stats)."""
+    df = make_upload_frame(size)
+    legacy_time = best_of(lambda: legacy_analyze_data(df))
+    vectorized_time = best_of(lambda: analyze_data(df))
+    print(f"Profile {size:,} rows x {df.shape[1]} columns")
+    print(f"  legacy (no column stats): {legacy_time * 1000:8.1f} ms")
+    print(f"  vectorized + stats:       {vectorized_time * 1000:8.1f} ms")
+
+
+def make_wide_sheet(rows, money_columns=200, text_columns=10, seed=0):
+    """A wide uploaded sheet: money strings with sentinels in most columns, free text in a few."""
+    rng = np.random.default_rng(seed)
+    amounts = [f"${value:,}.00" for value in range(0, 20000, 7)] + ['($150.00)', '-$14.00', 'n/a', 'n/a (AG)', '(n/a)']
+    columns = {f"9/{i % 28 + 1}/2024 Event {i}": rng.choice(amounts, rows) for i in range(money_columns)}
+    notes = ['Catered lunch', 'Virtual', 'Sponsored by alumni board', 'n/a', 'Rain date']
+    columns.update({f"Notes {i}": rng.choice(notes, rows) for i in range(text_columns)})
+    return pd.DataFrame(columns).astype(object)
+
+
+def legacy_clean(df):
+    """The per-column str.replace + to_numeric loop upload_file used before parse_money."""
+    df = df.replace(['n/a', 'n/a (AG)', '(n/a)', ''], np.nan)
+    for col in df.columns:
+        if df[col].dtype == 'object':
+            df[col] = df[col].astype(str).str.replace('$', '').str.replace(',', '')
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df
+
+
+def bench_money(size):
+    """Cleaning money columns of a wide sheet: str.replace chain vs factorized parser."""
+    df = make_wide_sheet(size)
+    legacy_time = best_of(lambda: legacy_clean(df))
+    parser_time = best_of(lambda: clean_upload_frame(df))
+    cleaned = clean_upload_frame(df)
+    print(f"Clean {size:,} rows x {df.shape[1]} columns "
+          f"({sum(dtype == np.float64 for dtype in cleaned.dtypes)} money columns detected)")
+    print(f"  str.replace loop: {legacy_time * 1000:8.1f} ms")
+    print(f"  money parser:     {parser_time * 1000:8.1f} ms  ({legacy_time / parser_time:.1f}x)")
+
+
+def legacy_charts(df, analysis):
+    """The charts create_visualizations drew before compact payloads: full figures of every row."""
+    numeric_columns = analysis['numeric_columns']
+    figures = [px.bar(x=numeric_columns, y=df[numeric_columns].mean().values, title='Average Values by Column'),
+               px.imshow(df[numeric_columns].corr(), title='Correlation Heatmap')]
+    figures += [px.histogram(df, x=col, title=f'Distribution of {col}') for col in numeric_columns[:3]]
+    for col in analysis['categorical_columns'][:2]:
+        value_counts = df[col].value_counts().head(10)
+        figures.append(px.bar(x=value_counts.values, y=value_counts.index, orientation='h'))
+    figures.append(px.scatter(df, x='All Incurred Expenses', y='Event Income'))
+    figures.append(px.line(df, x=analysis['datetime_columns'][0], y=numeric_columns[0]))
+    figures.append(px.scatter_matrix(df[numeric_columns[:3]], title='Scatter Plot Matrix'))
+    return [json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder) for fig in figures]
+
+
+def bench_charts(size):
+    """Chart payloads of an upload: full Plotly figures vs compact figures plus one shared template."""
+    df = make_upload_frame(size)
+    analysis = analyze_data(df)
+    plan = plan_charts(df, analysis)
+
+    legacy_time = best_of(lambda: legacy_charts(df, analysis), repeat=1)
+    compact_time = best_of(lambda: [figure_json(build()) for _, build in plan], repeat=1)
+    legacy_bytes = sum(map(len, legacy_charts(df, analysis)))
+    compact_bytes = sum(len(figure_json(build())) for _, build in plan) + len(template_json())
+    print(f"Charts for {size:,} rows ({len(plan)} charts)")
+    print(f"  full figures: {legacy_bytes / 1024:10.1f} KiB {legacy_time * 1000:8.1f} ms")
+    print(f"  compact:      {compact_bytes / 1024:10.1f} KiB {compact_time * 1000:8.1f} ms  "
+          f"({legacy_bytes / compact_bytes:.1f}x smaller, {legacy_time / compact_time:.1f}x faster)")
+
+
+def bench_seasons(size, events_per_file=500):
+    """Cross-file query over `size` event files: re-reading every file vs the season index."""
+    with tempfile.TemporaryDirectory() as data_dir:
+        store = JsonEventStore(data_dir)
+        for i in range(size):
+            file_id = f"owu_events_{i}"
+            store.create_file(file_id, f"Season {i}")
+            data = store.load(file_id)
+            data['events'] = make_events(events_per_file, seed=i)
+            with open(os.path.join(data_dir, f"{file_id}.json"), 'w') as f:
+                json.dump(data, f, indent=2)
+        index_dir = os.path.join(data_dir, SEASON_INDEX_DIRNAME)
+
+        def reread():
+            frames = [index_file(file_id, store.load(file_id)) for file_id in store.file_ids()]
+            return pd.concat(frames).groupby('series')[['income', 'expenses']].sum()
+
+        reread_time = best_of(lambda: (JsonEventStore(data_dir), reread()), repeat=1)
+        build_time = best_of(lambda: SeasonIndex(JsonEventStore(data_dir)).query(group_by='series'), repeat=1)
+        SeasonIndex(store, index_dir).frame()
+        restart_time = best_of(lambda: SeasonIndex(JsonEventStore(data_dir), index_dir).query(group_by='series'))
+        index = SeasonIndex(store, index_dir)
+        index.frame()
+        warm_time = best_of(lambda: index.query(group_by='series', name='Near You'))
+        # Re-indexes and re-pickles the changed file only
+        change_time = best_of(lambda: (store.add_event('owu_events_0', make_events(1)[0]), index.frame()))
+
+    print(f"Season query over {size:,} files x {events_per_file} events")
+    print(f"  re-read every file:     {reread_time * 1000:8.1f} ms")
+    print(f"  build index:            {build_time * 1000:8.1f} ms")
+    print(f"  persisted index:        {restart_time * 1000:8.1f} ms  ({reread_time / restart_time:.1f}x)")
+    print(f"  warm index:             {warm_time * 1000:8.1f} ms  ({reread_time / warm_time:.1f}x)")
+    print(f"  after one file changed: {change_time * 1000:8.1f} ms")
+
+
+def bench_snapshots(size):
+    """Loading a file's flattened events after a restart: parsing the JSON vs mapping the columnar snapshot."""
+    with tempfile.TemporaryDirectory() as data_dir:
+        store = JsonEventStore(data_dir)
+        store.create_file('season', 'Season')
+        data = store.load('season')
+        data['events'] = make_events(size)
+        with open(store.snapshot_path('season'), 'w') as f:
+            json.dump(data, f, indent=2)
+        snapshot_dir = os.path.join(data_dir, '.columnar')
+        ColumnarSnapshots(store, snapshot_dir).frame('season')
+
+        # A fresh store/snapshot object per run, as after a restart
+        reparse_time = best_of(lambda: flatten_file(JsonEventStore(data_dir).load('season')))
+        mapped_time = best_of(lambda: ColumnarSnapshots(JsonEventStore(data_dir), snapshot_dir).frame('season'))
+        _, mapped = ColumnarSnapshots(store, snapshot_dir).frame('season')
+        pd.testing.assert_frame_equal(mapped, flatten_file(store.load('season')))
+
+    print(f"Load {size:,} events")
+    print(f"  json.load + flatten:    {reparse_time * 1000:8.1f} ms")
+    print(f"  columnar snapshot:      {mapped_time * 1000:8.1f} ms  ({reparse_time / mapped_time:.1f}x)")
+
+
+def legacy_export(df, path):
+    """export_file as it was: pandas to_excel into event_data, then restyle each header cell."""
+    import openpyxl
+    with pd.ExcelWriter(path, engine='openpyxl') as writer:
+        df.to_excel(writer, sheet_name='Event Data', index=False)
+        worksheet = writer.sheets['Event Data']
+        for col in range(1, len(df.columns) + 1):
+            cell = worksheet.cell(row=1, column=col)
+            cell.font = cell.font.copy(bold=True)
+            cell.fill = openpyxl.styles.PatternFill(start_color='D00000', end_color='D00000', fill_type='solid')
+            cell.font = cell.font.copy(color='FFFFFF')
+
+
+def peak_memory(func):
+    """Run func once under tracemalloc and return its peak traced allocation in bytes."""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_export(size):
+    """Export of a flattened file: pandas + openpyxl workbook vs write-only streaming, and the other formats."""
+    df = flatten_events(make_events(size))
+    buffer = io.BytesIO()
+    with tempfile.TemporaryDirectory() as tmp_dir, warnings.catch_warnings():
+        warnings.simplefilter('ignore', DeprecationWarning)  # cell.font.copy in the old header styling
+        path = os.path.join(tmp_dir, 'export.xlsx')
+        legacy_time = best_of(lambda: legacy_export(df, path), repeat=1)
+        legacy_peak = peak_memory(lambda: legacy_export(df, path))
+    stream_time = best_of(lambda: write_xlsx({'Event Data': df}, io.BytesIO()), repeat=1)
+    stream_peak = peak_memory(lambda: write_xlsx({'Event Data': df}, buffer))
+    print(f"Export {size:,} events")
+    print(f"  pandas to_excel:    {legacy_time * 1000:8.1f} ms  peak {legacy_peak / 2**20:7.1f} MB")
+    print(f"  write-only xlsx:    {stream_time * 1000:8.1f} ms  peak {stream_peak / 2**20:7.1f} MB  "
+          f"({legacy_time / stream_time:.1f}x, {buffer.tell() / 2**20:.1f} MB file)")
+    for export_format in ('csv', 'json', 'parquet'):
+        if export_format == 'parquet' and not parquet_available():
+            print("  parquet:            skipped (needs pyarrow or fastparquet)")
+            continue
+        write = EXPORT_FORMATS[export_format][2]
+        buffer = io.BytesIO()
+        format_time = best_of(lambda: write(df, io.BytesIO()))
+        write(df, buffer)
+        print(f"  {export_format + ':':<19} {format_time * 1000:8.1f} ms  "
+              f"({legacy_time / format_time:.1f}x, {buffer.tell() / 2**20:.1f} MB file)")
+
+
+def bench_import(size):
+    """Importing a season of events: one add_event per row vs validated bulk add_events."""
+    events = make_events(size)
+    rows = flatten_events(events).astype(object)
+
+    def one_by_one():
+        store.create_file('season', 'Season')
+        for event in events:
+            store.add_event('season', {key: value for key, value in event.items() if key != 'id'})
+
+    def bulk():
+        store.create_file('season', 'Season')
+        columns, errors, _ = validate_rows(rows)
+        store.add_events('season', build_events(columns, [row for row in range(len(rows)) if row not in errors]))
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        store = JsonEventStore(data_dir)
+        legacy_time = best_of(one_by_one, repeat=1)
+        store.delete_file('season')
+        bulk_time = best_of(bulk, repeat=1)
+        imported = store.load('season')['events']
+        assert len(imported) == size
+
+    print(f"Import {size:,} events into a JSON event file")
+    print(f"  add_event per row:  {legacy_time * 1000:8.1f} ms")
+    print(f"  bulk import:        {bulk_time * 1000:8.1f} ms  ({legacy_time / bulk_time:.1f}x)")
+
+
+def make_wide_template(columns, seed=0):
+    """A wide OWU template (categories as rows, one dated column per event) spanning several seasons."""
+    rng = random.Random(seed)
+    start = pd.Timestamp('2015-07-01')
+    days = sorted(rng.randint(0, 3650) for _ in range(columns))
+    data = {'Financial Categories': ['Income / Expense Snapshot', 'Event Income',
+                                     'All Incurred Expenses (food, beverage, rental etc.):', 'Underwritten:',
+                                     'Profit/Loss:']}
+    for i, day in enumerate(days):
+        date = start + pd.Timedelta(days=day)
+        header = (f"{date.month}/{date.day}/{date.year} OWU Near You - City {i}" if (i + 1) % 4
+                  else f"{date.strftime('%B')} {date.day} - Event {i}")
+        income, expenses = rng.randint(0, 20000), rng.randint(0, 20000)
+        data[header] = [None, f"${income:,.2f}", f"${expenses:,.2f}", 'n/a', f"-${expenses - income:,.2f}"
+                        if expenses > income else f"${income - expenses:,.2f}"]
+    return pd.DataFrame(data)
+
+
+def legacy_wide_import(df, store):
+    """A straightforward importer: walk the columns, parse each cell, add each event on its own."""
+    rows = {'Event Income': 1, 'All Incurred Expenses': 2, 'Underwritten': 3, 'Profit/Loss': 4}
+    previous = None
+    for header in df.columns[1:]:
+        date, name, _ = parse_event_header(header, previous)
+        previous = date or previous
+        event = {'date': date.isoformat(), 'name': name}
+        for field, row in zip(('income', 'expenses', 'underwritten', 'profit_loss'), rows.values()):
+            text = str(df[header].iloc[row]).strip()
+            event[field] = 0.0 if text in MISSING_SENTINELS else parse_money(text)
+        store.add_event('season', event)
+
+
+def bench_wide(size):
+    """Importing a multi-season wide template with `size` event columns: per column vs transposed bulk import."""
+    df = make_wide_template(size)
+    with tempfile.TemporaryDirectory() as data_dir:
+        path = os.path.join(data_dir, 'template.csv')
+        df.to_csv(path, index=False)
+        store = JsonEventStore(data_dir)
+
+        def per_column():
+            store.create_file('season', 'Season')
+            legacy_wide_import(pd.read_csv(path), store)
+
+        def bulk():
+            store.create_file('season', 'Season')
+            with open(path, 'rb') as f:
+                rows, locations = read_import_file(path, f)
+            events, report, _ = prepare_import(rows, locations)
+            assert not report
+            store.add_events('season', events)
+
+        legacy_time = best_of(per_column, repeat=1)
+        store.delete_file('season')
+        bulk_time = best_of(bulk, repeat=1)
+        imported = store.load('season')['events']
+        assert len(imported) == size
+
+    print(f"Import a wide template with {size:,} event columns")
+    print(f"  per column:         {legacy_time * 1000:8.1f} ms")
+    print(f"  transposed bulk:    {bulk_time * 1000:8.1f} ms  ({legacy_time / bulk_time:.1f}x)")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def upload_request(url, filename, data):
+    """A multipart POST of one file to /upload."""
+    boundary = uuid.uuid4().hex
+    body = (f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+            f'Content-Type: text/csv\r\n\r\n').encode('utf-8') + data + f'\r\n--{boundary}--\r\n'.encode('utf-8')
+    return urllib.request.Request(f"{url}/upload", data=body, method='POST',
+                                  headers={'Content-Type': f'multipart/form-data; boundary={boundary}'})
+
+
+def process_upload(url, filename, data, poll_interval=0.05):
+    """Upload a file and poll its job (on whichever worker answers) until the result is ready."""
+    with urllib.request.urlopen(upload_request(url, filename, data), timeout=300) as response:
+        job_id = json.load(response)['job_id']
+    while True:
+        with urllib.request.urlopen(f"{url}/upload/jobs/{job_id}/result", timeout=300) as response:
+            if response.status == 200:
+                return json.load(response)
+        time.sleep(poll_interval)
+
+
+def serve_throughput(workers, data, requests, work_dir):
+    """Start the production server with `workers` processes and return its upload throughput (requests/s)."""
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    code = ("import start_web_app; "
+            f"start_web_app.start_production_server(host='127.0.0.1', port={port}, workers={workers}, threads=1)")
+    env = {**os.environ, 'PYTHONPATH': os.path.dirname(os.path.abspath(__file__))}
+    server = subprocess.Popen([sys.executable, '-c', code], cwd=work_dir, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = time.monotonic() + 60
+        while True:
+            try:
+                urllib.request.urlopen(url, timeout=1).close()
+                break
+            except (urllib.error.URLError, ConnectionError, OSError):
+                if time.monotonic() > deadline or server.poll() is not None:
+                    raise RuntimeError('production server did not start (is gunicorn installed?)')
+                time.sleep(0.2)
+
+        def upload(_):
+            assert process_upload(url, 'load.csv', data)['success']
+
+        # Two clients per worker keep every worker busy
+        with ThreadPoolExecutor(workers * 2) as clients:
+            list(clients.map(upload, range(workers * 2)))  # warm up every worker
+            start = time.perf_counter()
+            list(clients.map(upload, range(requests)))
+            return requests / (time.perf_counter() - start)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def bench_serve(size):
+    """Upload analysis throughput of the production server: one worker process vs one per core."""
+    cores = os.cpu_count() or 1
+    buffer = io.BytesIO()
+    make_upload_frame(size).to_csv(buffer, index=False)
+    requests = 8 * cores
+    with tempfile.TemporaryDirectory() as work_dir:
+        single = serve_throughput(1, buffer.getvalue(), requests, work_dir)
+        multi = serve_throughput(cores, buffer.getvalue(), requests, work_dir) if cores > 1 else None
+
+    print(f"Uploads of {size:,} rows, {requests} requests against the production server")
+    print(f"  1 worker:           {single:8.2f} req/s")
+    if cores > 1:
+        print(f"  {cores} workers:{' ' * (11 - len(str(cores)))}{multi:8.2f} req/s  ({multi / single:.1f}x)")
+    else:
+        print("  (single core: nothing to compare against)")
+
+
+def bench_warmup(size, events_per_file=2_000):
+    """First dashboard requests after a restart over `size` event files: cold caches vs the background warm-up."""
+    import web_visualizer
+    from warmup import Warmup
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as work_dir:
+        os.chdir(work_dir)
+        try:
+            store = JsonEventStore('event_data')
+            for i in range(size):
+                file_id = f"owu_events_{i}"
+                store.create_file(file_id, f"Season {i}")
+                data = store.load(file_id)
+                data['events'] = make_events(events_per_file, seed=i)
+                with open(os.path.join('event_data', f"{file_id}.json"), 'w') as f:
+                    json.dump(data, f, indent=2)
+            client = web_visualizer.app.test_client()
+            paths = [f"/api/files/owu_events_{i}/{view}" for i in range(size) for view in ('visualize', 'aggregates')]
+            paths.append('/sample-data')
+
+            def restart():
+                web_visualizer.configure_storage('json')
+                web_visualizer._sample_body = None
+
+            def first_requests():
+                start = time.perf_counter()
+                for path in paths:
+                    assert client.get(path).status_code == 200
+                return time.perf_counter() - start
+
+            def list_files():
+                start = time.perf_counter()
+                assert client.get('/api/files').status_code == 200
+                return time.perf_counter() - start
+
+            # The catalog, snapshots and season index are on disk from an earlier run, as after a real restart
+            list_files()
+            first_requests()
+            restart()
+            idle_time = list_files()
+            cold_time = first_requests()
+
+            restart()
+            warmup = Warmup(web_visualizer.warmup_tasks)
+            warmup.start()
+            during_time = list_files()
+            while warmup.status()['state'] != 'done':
+                time.sleep(0.01)
+            warmup_time = warmup.status()['seconds']
+            warm_time = first_requests()
+        finally:
+            os.chdir(cwd)
+
+    print(f"First {len(paths)} dashboard requests after a restart, {size} files x {events_per_file:,} events")
+    print(f"  cold caches:            {cold_time * 1000:8.1f} ms")
+    print(f"  after warm-up:          {warm_time * 1000:8.1f} ms  ({cold_time / warm_time:.1f}x)")
+    print(f"  warm-up (background):   {warmup_time * 1000:8.1f} ms")
+    print(f"  /api/files idle:        {idle_time * 1000:8.1f} ms")
+    print(f"  /api/files meanwhile:   {during_time * 1000:8.1f} ms")
+
+
+# Cold starts measured by the startup benchmark: label -> (lazy statement, statement importing everything up front)
+STARTUP_CASES = {
+    'web_visualizer': ('import web_visualizer',
+                       'import web_visualizer; web_visualizer.preload_modules()'),
+    'excel_visualizer': ('import excel_visualizer; excel_visualizer.ExcelVisualizer()',
+                         'import excel_visualizer; excel_visualizer.ExcelVisualizer(); excel_visualizer.pyplot()'),
+    'financial_event_visualizer': ('import financial_event_visualizer as m; m.FinancialEventVisualizer()',
+                                   'import financial_event_visualizer as m; m.FinancialEventVisualizer(); m.pyplot()'),
+}
+
+
+def import_time(statement, repeat):
+    """
+    Run `statement` in fresh interpreters under ``python -X importtime``.
+
+    Returns the fastest total import time in seconds and the slowest
+    imports made directly by the imported modules in that run, as (module,
+    seconds) pairs.
+    """
+    best = None
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                                cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True)
+        if result.returncode:
+            raise RuntimeError(result.stderr.strip().splitlines()[-1])
+        total, direct = 0, []
+        for line in result.stderr.splitlines():
+            fields = line[len('import time:'):].split('|')
+            if not line.startswith('import time:') or len(fields) != 3 or not fields[0].strip().isdigit():
+                continue
+            total += int(fields[0])
+            # Module names are indented by import depth; the statement's own imports are at depth 1
+            if len(fields[2]) - len(fields[2].lstrip()) == 3:
+                direct.append((fields[2].strip(), int(fields[1]) / 1e6))
+        if best is None or total < best[0]:
+            best = (total, sorted(direct, key=lambda item: -item[1])[:5])
+    return best[0] / 1e6, best[1]
+
+
+def bench_startup(size):
+    """Cold-start import time of the app and CLI visualizers (best of `size` runs): lazy vs everything up front."""
+    print(f"Cold-start imports (python -X importtime, best of {size})")
+    for label, (lazy, eager) in STARTUP_CASES.items():
+        print(f"  {label}")
+        try:
+            lazy_time, slowest = import_time(lazy, size)
+        except RuntimeError as e:
+            print(f"    skipped ({e})")
+            continue
+        print(f"    on demand:        {lazy_time * 1000:8.1f} ms")
+        try:
+            eager_time, _ = import_time(eager, size)
+            print(f"    all up front:     {eager_time * 1000:8.1f} ms  ({eager_time / lazy_time:.1f}x)")
+        except RuntimeError as e:
+            print(f"    all up front:     skipped ({e})")
+        print(f"    slowest imports:  {', '.join(f'{name} {seconds * 1000:.0f} ms' for name, seconds in slowest)}")
+
+
+BENCHMARKS = {
+    'flatten': (bench_flatten, 100_000),
+    'profile': (bench_profile, 1_000_000),
+    'money': (bench_money, 5_000),
+    'charts': (bench_charts, 100_000),
+    'seasons': (bench_seasons, 200),
+    'snapshots': (bench_snapshots, 100_000),
+    'export': (bench_export, 20_000),
+    'import': (bench_import, 10_000),
+    'wide': (bench_wide, 5_000),
+    'serve': (bench_serve, 20_000),
+    'startup': (bench_startup, 5),
+    'warmup': (bench_warmup, 10),
+}
+
+
+def main():
+    """Run the selected benchmarks."""
+    parser = argparse.ArgumentParser(description='Benchmark the OWU data visualizer data paths')
+    parser.add_argument('benchmarks', nargs='*', help=f"benchmarks to run: {', '.join(BENCHMARKS)} (default: all)")
+    parser.add_argument('--size', type=int, help='problem size (default depends on the benchmark)')
+    args = parser.parse_args()
+    unknown = set(args.benchmarks) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(sorted(unknown))}")
+
+    for name in args.benchmarks or BENCHMARKS:
+        func, default_size = BENCHMARKS[name]
+        func(args.size or default_size)
+        print()
+
+
+if __name__ == "__main__":
+    main()
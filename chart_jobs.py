@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Chart Jobs
+Renders the charts of an upload in a worker pool, so uploads can answer
+immediately and the browser fetches each chart by id when it needs it. Plotly
+is only imported once the first chart is planned. A chart that runs too long is
+failed and its worker replaced, so a hung builder does not hold a pool slot
+"""
+
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from urllib.parse import quote
+
+# Worker threads shared by all chart sets
+CHART_WORKERS = 4
+
+# Seconds a single chart may run, counted from when a worker starts it, before it is failed as timed out
+CHART_TIMEOUT = 30
+
+# Seconds between the watchdog's checks for charts running past CHART_TIMEOUT
+CHART_WATCH_INTERVAL = 1.0
+
+# Seconds a chart set is kept after its upload, and how many sets are kept at most
+CHART_SET_TTL = 15 * 60
+MAX_CHART_SETS = 32
+
+# Finished charts shared between worker processes, under the upload folder
+CHART_DIRNAME = '.charts'
+
+# Seconds between checks for a chart another worker process is still rendering
+CHART_POLL_INTERVAL = 0.1
+
+
+def _render(build):
+    from charts import figure_json
+    return figure_json(build())
+
+
+class _ChartTask:
+    """One chart in the pool's queue: its builder, its future, and when and by which worker it was started."""
+
+    def __init__(self, chart_id, build):
+        self.chart_id = chart_id
+        self.build = build
+        self.future = Future()
+        self.started = None
+        self.worker = None
+
+
+class ChartSet:
+    """The charts planned for one upload, each rendering in the worker pool."""
+
+    def __init__(self, futures):
+        self.id = uuid.uuid4().hex
+        self.created = time.monotonic()
+        self.futures = futures
+
+    @property
+    def chart_ids(self):
+        return list(self.futures)
+
+    def result(self, chart_id):
+        """
+        Wait for one chart and return its JSON.
+
+        Raises KeyError for unknown charts, TimeoutError once the chart has
+        been running for CHART_TIMEOUT seconds, or the builder's exception.
+        A chart still queued behind others is waited for: its time only
+        starts when a worker picks it up.
+        """
+        return self.futures[chart_id].result()
+
+
+class StoredChartSet:
+    """
+    A chart set rendered by another worker process, read from the files it writes.
+
+    Offers the ``chart_ids`` and ``result`` of a ChartSet; ``result`` waits
+    for a chart that is not written yet. The rendering process touches the
+    set's manifest while charts are unfinished (see ChartJobs), so the wait
+    only times out once that stopped CHART_TIMEOUT seconds ago, e.g.
+    because the process exited.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.manifest = os.path.join(directory, 'charts.json')
+        self.created = os.path.getmtime(self.manifest)
+        with open(self.manifest, 'r') as f:
+            self.chart_ids = json.load(f)
+
+    def result(self, chart_id):
+        if chart_id not in self.chart_ids:
+            raise KeyError(chart_id)
+        path = os.path.join(self.directory, quote(chart_id, safe=''))
+        while True:
+            if os.path.exists(f"{path}.json"):
+                with open(f"{path}.json", 'r') as f:
+                    return f.read()
+            if os.path.exists(f"{path}.error"):
+                with open(f"{path}.error", 'r') as f:
+                    raise RuntimeError(f.read())
+            if time.time() - os.path.getmtime(self.manifest) > CHART_TIMEOUT:
+                raise TimeoutError(f"Chart '{chart_id}' took longer than {CHART_TIMEOUT} seconds")
+            time.sleep(CHART_POLL_INTERVAL)
+
+
+class ChartJobs:
+    """
+    Registry of chart sets rendering in a shared thread pool, expired after CHART_SET_TTL.
+
+    With a ``directory``, every finished chart is also written to
+    ``<directory>/<set id>/``, so in a multi-process server the worker that
+    receives a chart request can answer it when another worker handled the
+    upload.
+
+    Each chart may run for CHART_TIMEOUT seconds from when a worker starts
+    it. Python cannot stop a thread, so a watchdog fails a chart that runs
+    longer with TimeoutError and starts a new worker in its place; the old
+    one exits when its builder returns, and that result is dropped. The
+    watchdog also touches the manifest of shared sets with unfinished
+    charts, to tell other processes the set is still rendering.
+    """
+
+    def __init__(self, workers=CHART_WORKERS, directory=None):
+        self.directory = directory
+        self.workers = workers
+        self._queue = queue.SimpleQueue()
+        self._workers = set()
+        self._running = set()
+        self._watchdog = None
+        self._sets = {}
+        self._lock = threading.Lock()
+
+    def _start(self, plan):
+        """Queue a planned chart set and return {chart_id: future}."""
+        tasks = [_ChartTask(chart_id, build) for chart_id, build in plan]
+        for task in tasks:
+            self._queue.put(task)
+        with self._lock:
+            self._spawn()
+        return {task.chart_id: task.future for task in tasks}
+
+    def _spawn(self):
+        """Start workers up to ``workers``, and the watchdog; the lock must be held."""
+        while len(self._workers) < self.workers:
+            worker = threading.Thread(target=self._work, name=f'charts_{len(self._workers)}', daemon=True)
+            self._workers.add(worker)
+            worker.start()
+        if self._watchdog is None:
+            self._watchdog = threading.Thread(target=self._watch, name='charts_watchdog', daemon=True)
+            self._watchdog.start()
+
+    def _work(self):
+        worker = threading.current_thread()
+        while True:
+            task = self._queue.get()
+            if not task.future.set_running_or_notify_cancel():
+                continue
+            with self._lock:
+                task.started, task.worker = time.monotonic(), worker
+                self._running.add(task)
+            try:
+                result, error = _render(task.build), None
+            except Exception as e:
+                result, error = None, e
+            with self._lock:
+                self._running.discard(task)
+                replaced = worker not in self._workers
+            if replaced:
+                # The watchdog has failed this chart and started another worker
+                return
+            if error is None:
+                task.future.set_result(result)
+            else:
+                task.future.set_exception(error)
+
+    def _watch(self):
+        while True:
+            time.sleep(CHART_WATCH_INTERVAL)
+            now = time.monotonic()
+            with self._lock:
+                expired = [task for task in self._running if now - task.started > CHART_TIMEOUT]
+                for task in expired:
+                    self._running.discard(task)
+                    self._workers.discard(task.worker)
+                if expired:
+                    self._spawn()
+                rendering = [set_id for set_id, chart_set in self._sets.items()
+                             if not all(future.done() for future in chart_set.futures.values())]
+            for task in expired:
+                print(f"Chart {task.chart_id} took longer than {CHART_TIMEOUT} seconds; starting another worker")
+                task.future.set_exception(
+                    TimeoutError(f"Chart '{task.chart_id}' took longer than {CHART_TIMEOUT} seconds"))
+            if self.directory:
+                for set_id in rendering:
+                    try:
+                        os.utime(os.path.join(self.directory, set_id, 'charts.json'))
+                    except OSError:
+                        pass
+
+    def submit(self, df, analysis):
+        """Queue every planned chart for an upload and return its ChartSet."""
+        from charts import plan_charts
+        chart_set = ChartSet(self._start(plan_charts(df, analysis)))
+        if self.directory:
+            self._share(chart_set)
+        with self._lock:
+            self._expire()
+            self._sets[chart_set.id] = chart_set
+        return chart_set
+
+    def get(self, set_id):
+        """The chart set with this id, rendered here or (with a directory) by another process; None if unknown."""
+        with self._lock:
+            self._expire()
+            chart_set = self._sets.get(set_id)
+        if chart_set is not None or not self.directory or not set_id.isalnum():
+            return chart_set
+        set_dir = os.path.join(self.directory, set_id)
+        try:
+            stored = StoredChartSet(set_dir)
+        except (OSError, ValueError):
+            return None
+        return stored if time.time() - stored.created <= CHART_SET_TTL else None
+
+    def _share(self, chart_set):
+        """Write each chart of a set to the shared directory as it finishes."""
+        set_dir = os.path.join(self.directory, chart_set.id)
+        os.makedirs(set_dir, exist_ok=True)
+        _write_text(os.path.join(set_dir, 'charts.json'), json.dumps(chart_set.chart_ids))
+        for chart_id, future in chart_set.futures.items():
+            path = os.path.join(set_dir, quote(chart_id, safe=''))
+            future.add_done_callback(lambda future, path=path: _store_chart(future, path))
+        self._expire_shared()
+
+    def _expire_shared(self):
+        """Remove shared chart sets older than CHART_SET_TTL, including those of exited processes."""
+        cutoff = time.time() - CHART_SET_TTL
+        for set_id in os.listdir(self.directory):
+            manifest = os.path.join(self.directory, set_id, 'charts.json')
+            try:
+                expired = os.path.getmtime(manifest) < cutoff
+            except OSError:
+                continue
+            if expired:
+                shutil.rmtree(os.path.join(self.directory, set_id), ignore_errors=True)
+
+    def _expire(self):
+        now = time.monotonic()
+        for set_id, chart_set in list(self._sets.items()):
+            if now - chart_set.created > CHART_SET_TTL:
+                self._drop(set_id)
+        while len(self._sets) > MAX_CHART_SETS:
+            self._drop(next(iter(self._sets)))
+
+    def _drop(self, set_id):
+        for future in self._sets.pop(set_id).futures.values():
+            future.cancel()
+        if self.directory:
+            shutil.rmtree(os.path.join(self.directory, set_id), ignore_errors=True)
+
+    def render_all(self, df, analysis):
+        """Render every chart in parallel and return {chart_id: figure JSON}, like before."""
+        from charts import plan_charts
+        chart_set = ChartSet(self._start(plan_charts(df, analysis)))
+        charts = {}
+        for chart_id in chart_set.chart_ids:
+            try:
+                charts[chart_id] = chart_set.result(chart_id)
+            except Exception as e:
+                print(f"Error creating visualization {chart_id}: {e}")
+                charts.setdefault('error', str(e))
+        return charts
+
+
+def _store_chart(future, path):
+    """Done-callback writing a finished chart (or its error) for other worker processes."""
+    if future.cancelled():
+        return
+    error = future.exception()
+    try:
+        if error is None:
+            _write_text(f"{path}.json", future.result())
+        else:
+            _write_text(f"{path}.error", str(error))
+    except OSError as e:
+        print(f"Could not share chart {os.path.basename(path)}: {e}")
+
+
+def _write_text(path, text):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Chart Generation
+Plans and builds the Plotly charts for an analyzed upload; chart_jobs renders
+them in a worker pool
+"""
+
+import json
+import threading
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
+import plotly.utils
+
+# Histograms of more values than this are binned here instead of shipping every value
+HISTOGRAM_BIN_ROWS = 5_000
+HISTOGRAM_BINS = 50
+
+# Scatter charts of larger frames draw a fixed random sample of this many rows
+SCATTER_MAX_POINTS = 5_000
+
+
+def histogram(df, col):
+    """px.histogram of one column, pre-binned with NumPy when the column is large."""
+    title = f'Distribution of {col}'
+    values = pd.to_numeric(df[col], errors='coerce').dropna().to_numpy(dtype=np.float64)
+    if len(values) <= HISTOGRAM_BIN_ROWS:
+        return px.histogram(df, x=col, title=title, template=thread_template())
+
+    low, high = values.min(), values.max()
+    if np.array_equal(values, np.floor(values)) and high - low < HISTOGRAM_BINS:
+        # Small integer range (counts, ratings): one bar per value
+        edges = np.arange(low - 0.5, high + 1.5)
+    else:
+        edges = np.histogram_bin_edges(values, bins=HISTOGRAM_BINS)
+    counts, edges = np.histogram(values, bins=edges)
+    fig = px.bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, title=title,
+                 labels={'x': str(col), 'y': 'count'}, template=thread_template())
+    fig.update_traces(width=edges[1] - edges[0])
+    fig.update_layout(bargap=0)
+    return fig
+
+
+def scatter_rows(df):
+    """The rows a scatter or line chart draws: all of them, or a fixed sample (in row order) for large frames."""
+    if len(df) <= SCATTER_MAX_POINTS:
+        return df
+    return df.sample(SCATTER_MAX_POINTS, random_state=0).sort_index()
+
+
+def sampling_note(rows):
+    """The notice shown with an upload's charts when they do not draw every row, or None."""
+    if rows <= min(SCATTER_MAX_POINTS, HISTOGRAM_BIN_ROWS):
+        return None
+    return (f"This file has {rows:,} rows. Scatter, scatter matrix and time series charts draw a random "
+            f"sample of {SCATTER_MAX_POINTS:,} rows, and histograms of more than {HISTOGRAM_BIN_ROWS:,} "
+            f"values are pre-binned into at most {HISTOGRAM_BINS} bars, so individual points are not all shown.")
+
+
+def time_series(df, col, numeric_col):
+    """px.line of a numeric column over a datetime column, with the dates sent as a typed array."""
+    rows = scatter_rows(df[[col, numeric_col]])
+    fig = px.line(rows, x=col, y=numeric_col, title=f'{numeric_col} Over Time',
+                  template=thread_template())
+    # Epoch milliseconds on a date axis instead of one ISO string per point
+    dates = pd.to_datetime(rows[col])
+    millis = dates.to_numpy(dtype='datetime64[ms]').astype(np.int64).astype(np.float64)
+    millis[dates.isna().to_numpy()] = np.nan
+    fig.update_traces(x=millis)
+    fig.update_xaxes(type='date')
+    return fig
+
+
+def plan_charts(df, analysis):
+    """
+    Decide which charts an upload gets.
+
+    Returns an ordered list of (chart_id, build) pairs, where ``build()``
+    returns the Plotly figure. Nothing is drawn until a builder is called.
+    Figures are built with ``thread_template()``, a per-thread copy of the
+    default template, which is sent to the page separately (see ``figure_json``).
+    """
+    plan = []
+    numeric_columns = analysis['numeric_columns']
+
+    # 1. Basic Data Overview Chart
+    if numeric_columns:
+        def numeric_summary():
+            # Create a summary chart of numeric columns
+            means = df[numeric_columns].mean()
+            return px.bar(x=means.index, y=means.values,
+                          title='Average Values by Column',
+                          labels={'x': 'Columns', 'y': 'Average Value'},
+                          template=thread_template())
+        plan.append(('numeric_summary', numeric_summary))
+
+    # 2. Correlation Heatmap (if multiple numeric columns)
+    if len(numeric_columns) > 1:
+        def correlation():
+            correlation_matrix = df[numeric_columns].corr()
+            return px.imshow(correlation_matrix,
+                             title='Correlation Heatmap',
+                             color_continuous_scale='RdBu',
+                             aspect='auto',
+                             template=thread_template())
+        plan.append(('correlation', correlation))
+
+    # 3. Distribution Charts for Numeric Columns
+    for col in numeric_columns[:3]:  # Limit to first 3 columns
+        plan.append((f'distribution_{col}', lambda col=col: histogram(df, col)))
+
+    # 4. Categorical Analysis
+    for col in analysis['categorical_columns'][:2]:  # Limit to first 2 columns
+        def categorical(col=col):
+            value_counts = df[col].value_counts().head(10)
+            return px.bar(x=value_counts.values, y=value_counts.index,
+                          orientation='h', title=f'Top 10 Values in {col}',
+                          template=thread_template())
+        plan.append((f'categorical_{col}', categorical))
+
+    # 5. Financial-specific charts (if applicable)
+    if analysis['is_financial']:
+        # Look for common financial column patterns
+        income_cols = [col for col in df.columns if 'income' in str(col).lower() or 'revenue' in str(col).lower()]
+        expense_cols = [col for col in df.columns if 'expense' in str(col).lower() or 'cost' in str(col).lower()]
+
+        if income_cols and expense_cols:
+            # Income vs Expenses comparison
+            plan.append(('income_vs_expenses', lambda: px.scatter(
+                scatter_rows(df), x=expense_cols[0], y=income_cols[0],
+                title=f'{income_cols[0]} vs {expense_cols[0]}',
+                labels={expense_cols[0]: 'Expenses', income_cols[0]: 'Income'},
+                template=thread_template())))
+
+    # 6. Time Series (if datetime columns exist)
+    if analysis['datetime_columns'] and numeric_columns:
+        # Create time series plot of the first numeric column over the first datetime column
+        col, numeric_col = analysis['datetime_columns'][0], numeric_columns[0]
+        plan.append(('time_series', lambda: time_series(df, col, numeric_col)))
+
+    # 7. Scatter Plot Matrix (if multiple numeric columns)
+    if len(numeric_columns) >= 2:
+        plan.append(('scatter_matrix', lambda: px.scatter_matrix(scatter_rows(df[numeric_columns[:3]]),
+                                                                 title='Scatter Plot Matrix',
+                                                                 template=thread_template())))
+
+    return plan
+
+
+def figure_json(fig, compact=True):
+    """
+    Serialize a figure for the page.
+
+    Data arrays are already base64-encoded typed arrays in the figure. The
+    compact form also drops ``layout.template``, which is the same for every
+    chart and several times larger than a typical chart's data; the page
+    puts ``template_json()`` back in before plotting.
+    """
+    figure = fig.to_plotly_json()
+    if compact:
+        figure['layout'] = {key: value for key, value in figure['layout'].items() if key != 'template'}
+    return json.dumps(figure, cls=plotly.utils.PlotlyJSONEncoder)
+
+
+_template = {}
+_template_lock = threading.Lock()
+_local = threading.local()
+
+
+def template_json():
+    """The default Plotly template shared by all charts, serialized once per process."""
+    with _template_lock:
+        if 'json' not in _template:
+            _template['json'] = json.dumps(pio.templates[pio.templates.default], cls=plotly.utils.PlotlyJSONEncoder)
+        return _template['json']
+
+
+def thread_template():
+    """
+    A private copy of the default template for the calling thread.
+
+    Plotly Express reads the template while building every figure, and
+    plotly's lazy property lookups are not thread-safe, so chart workers
+    must not share the instance in ``pio.templates``.
+    """
+    if not hasattr(_local, 'template'):
+        _local.template = go.layout.Template(json.loads(template_json()))
+    return _local.template
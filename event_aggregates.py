@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Event Aggregates
+Financial, attendance, first-time attendee and feedback rollups, and descriptive
+statistics, of a flattened event file
+"""
+
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from event_frames import EVENT_SCHEMA
+
+# Rollup name -> flattened column, per section
+FINANCIAL_COLUMNS = {
+    'income': 'Event Income',
+    'expenses': 'All Incurred Expenses',
+    'underwritten': 'Underwritten',
+    'profit_loss': 'Profit/Loss',
+}
+ATTENDANCE_COLUMNS = {
+    'young_alumni': 'Young Alumni Registered',
+    'alumni': 'Alumni Registered',
+    'students': 'Students Attended',
+    'friends_family': 'Friends/Family Attended',
+    'staff_faculty': 'Staff/Faculty Attended',
+    'total_alumni_guests': 'Total Alumni/Guests',
+}
+FIRST_TIME_COLUMNS = {
+    'alumni': '1st Time Alumni',
+    'parents': '1st Time Parents',
+    'friends': '1st Time Friends',
+}
+RATING_COLUMNS = {
+    5: '5-Star Ratings',
+    4: '4-Star Ratings',
+    3: '3-Star Ratings',
+    2: '2-Star Ratings',
+    1: '1-Star Ratings',
+}
+
+
+def _numbers(df, column):
+    """A column as floats with missing or non-numeric values as 0 (like ``row[col] || 0`` in the page)."""
+    if column not in df.columns:
+        return np.zeros(len(df))
+    return pd.to_numeric(df[column], errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+
+
+def _number(value):
+    """A rollup value for JSON: int when integral, float otherwise."""
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+def _totals(df, columns):
+    return {name: _number(_numbers(df, column).sum()) for name, column in columns.items()}
+
+
+def financial_rollup(df):
+    values = {name: _numbers(df, column) for name, column in FINANCIAL_COLUMNS.items()}
+    profitable = int((values['profit_loss'] > 0).sum())
+    totals = {f'total_{name}': _number(column.sum()) for name, column in values.items()}
+    return {
+        'has_data': bool(((values['income'] > 0) | (values['expenses'] > 0)).any()),
+        **totals,
+        'net_result': _number(values['income'].sum() - values['expenses'].sum()),
+        'profitable_events': profitable,
+        'success_rate': round(profitable / len(df) * 100) if len(df) else 0,
+    }
+
+
+def attendance_rollup(df):
+    return {
+        'has_data': bool(((_numbers(df, 'Total Alumni/Guests') > 0) |
+                          (_numbers(df, 'Young Alumni Registered') > 0)).any()),
+        'totals': _totals(df, ATTENDANCE_COLUMNS),
+    }
+
+
+def first_time_rollup(df):
+    totals = _totals(df, FIRST_TIME_COLUMNS)
+    return {
+        'has_data': any(total > 0 for total in totals.values()),
+        'totals': totals,
+        'total': _number(sum(totals.values())),
+    }
+
+
+def feedback_rollup(df):
+    """Rating totals plus the per-event averages the dashboard summarizes."""
+    ratings = np.column_stack([_numbers(df, column) for column in RATING_COLUMNS.values()]) \
+        if len(df) else np.zeros((0, len(RATING_COLUMNS)))
+    stars = np.array(list(RATING_COLUMNS), dtype=np.float64)
+    counts = ratings.sum(axis=1)
+    rated = counts > 0
+    average = np.zeros(len(df))
+    satisfaction = np.zeros(len(df))
+    np.divide(ratings @ stars, counts, out=average, where=rated)
+    np.divide((ratings[:, 0] + ratings[:, 1]) * 100, counts, out=satisfaction, where=rated)
+    total_ratings = _numbers(df, 'Total Ratings')
+    names = df['Event Name'].fillna('Unnamed Event').to_numpy() if 'Event Name' in df.columns else []
+
+    rollup = {
+        'has_data': bool((total_ratings > 0).any() or (ratings > 0).any()),
+        'ratings': {str(star): _number(total) for star, total in zip(RATING_COLUMNS, ratings.sum(axis=0))},
+        'total_ratings': _number(total_ratings.sum()),
+        'average_rating': float(average.mean()) if len(df) else 0.0,
+        'average_satisfaction': float(satisfaction.mean()) if len(df) else 0.0,
+        'best_rated_event': None,
+        'best_rating': 0.0,
+        'most_feedback_event': None,
+        'most_feedback': 0,
+    }
+    # Without any ratings (or feedback) no event stands out, as for an empty file
+    if rated.any():
+        best = int(average.argmax())
+        rollup.update({'best_rated_event': str(names[best]) or 'Unnamed Event', 'best_rating': float(average[best])})
+    if (total_ratings > 0).any():
+        most = int(total_ratings.argmax())
+        rollup.update({'most_feedback_event': str(names[most]) or 'Unnamed Event',
+                       'most_feedback': _number(total_ratings[most])})
+    return rollup
+
+
+def event_aggregates(df):
+    """
+    Compute the dashboard rollups of a flattened event file.
+
+    Every section is computed with vectorized NumPy/pandas over whole columns;
+    columns missing from the frame (no event has that section) count as 0.
+    """
+    financial_fields = [column for column in df.columns
+                        if any(word in column for word in ('Income', 'Expenses', 'Profit', 'Underwritten'))]
+    return {
+        'events': int(len(df)),
+        'fields': int(len(df.columns)),
+        'financial_fields': len(financial_fields),
+        'financial': financial_rollup(df),
+        'attendance': attendance_rollup(df),
+        'first_time': first_time_rollup(df),
+        'feedback': feedback_rollup(df),
+    }
+
+
+def _json_float(value):
+    return None if np.isnan(value) else float(value)
+
+
+def _quantiles(values, counts, probabilities):
+    """Linear-interpolated quantiles of each column, ignoring NaN, from a single sort."""
+    ordered = np.sort(values, axis=0)  # NaN sorts last, so each column's values come first
+    positions = np.outer(probabilities, np.maximum(counts - 1, 0))
+    below = np.floor(positions).astype(np.int64)
+    above = np.ceil(positions).astype(np.int64)
+    columns = np.arange(values.shape[1])
+    low, high = ordered[below, columns], ordered[above, columns]
+    result = low + (positions - below) * (high - low)
+    result[:, counts == 0] = np.nan
+    return result
+
+
+def _pairwise_correlation(values, present):
+    """
+    Pearson correlation of every pair of columns over the rows where both are
+    present, as a handful of matrix products instead of a loop over pairs.
+    """
+    mask = present.astype(np.float64)
+    # Centre on the column means first to keep the sums of squares well conditioned
+    centred = np.where(present, values - np.nanmean(values, axis=0), 0.0)
+    pairs = mask.T @ mask
+    sums = centred.T @ mask                 # sums[i, j]: column i over rows where j is present
+    squares = (centred ** 2).T @ mask
+    products = centred.T @ centred
+    covariance = products - sums * sums.T / pairs
+    spread = squares - sums ** 2 / pairs
+    return covariance / np.sqrt(spread * spread.T)
+
+
+def event_statistics(df):
+    """
+    Descriptive statistics of every numeric event field, in one vectorized pass.
+
+    For each field: count, mean, sample variance and standard deviation
+    (divisor n - 1), the five-number summary (min, q1, median, q3, max) and
+    Tukey box-plot whiskers (the furthest values within 1.5 IQR of the
+    quartiles) with the outliers beyond them, in event order. Also the
+    Pearson correlation matrix of the fields. Missing values (events without
+    that section) are skipped, and correlations use the events that have
+    both fields.
+
+    The page used to compute these in the browser with the population
+    variance (divisor n) and missing values counted as 0, so small files
+    show a larger standard deviation than before, and fields that only some
+    events fill in are no longer pulled towards 0.
+    """
+    numeric = {column: pd.to_numeric(df[column], errors='coerce') for column, _, _, _, kind in EVENT_SCHEMA
+               if kind != 'text' and column in df.columns}
+    columns = list(numeric)
+    if not columns or not len(df):
+        return {'fields': {}, 'correlation': {'columns': columns, 'matrix': []}}
+
+    # Column-major, since every reduction and the sort run down the columns
+    values = np.asfortranarray(np.column_stack([series.to_numpy(dtype=np.float64) for series in numeric.values()]))
+    present = ~np.isnan(values)
+    counts = present.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'), warnings.catch_warnings():
+        # All-missing, single-value or constant columns give NaN statistics, reported as null
+        warnings.simplefilter('ignore', RuntimeWarning)
+        mean = np.nanmean(values, axis=0)
+        variance = np.nanvar(values, axis=0, ddof=1)
+        quantiles = _quantiles(values, counts, [0, 0.25, 0.5, 0.75, 1])
+        q1, q3 = quantiles[1], quantiles[3]
+        low, high = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+        inside = present & (values >= low) & (values <= high)
+        lower_fence = np.nanmin(np.where(inside, values, np.nan), axis=0)
+        upper_fence = np.nanmax(np.where(inside, values, np.nan), axis=0)
+        correlation = np.clip(_pairwise_correlation(values, present), -1, 1)
+    outliers = present & ~inside
+
+    fields = {}
+    for i, column in enumerate(columns):
+        fields[column] = {
+            'count': int(counts[i]),
+            'mean': _json_float(mean[i]),
+            'variance': _json_float(variance[i]),
+            'std': _json_float(np.sqrt(variance[i])),
+            'min': _json_float(quantiles[0, i]),
+            'q1': _json_float(q1[i]),
+            'median': _json_float(quantiles[2, i]),
+            'q3': _json_float(q3[i]),
+            'max': _json_float(quantiles[4, i]),
+            'lower_fence': _json_float(lower_fence[i]),
+            'upper_fence': _json_float(upper_fence[i]),
+            'outliers': int(outliers[:, i].sum()),
+            'outlier_values': [float(value) for value in values[outliers[:, i], i]],
+        }
+
+    return {
+        'fields': fields,
+        'correlation': {
+            'columns': columns,
+            'matrix': [[_json_float(value) for value in row] for row in correlation],
+        },
+    }
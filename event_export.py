@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Event Export
+Writes flattened event frames as CSV, JSON, Parquet or Excel (one sheet or one
+per event section) in bounded memory, and caches the downloads per file version
+"""
+
+import hashlib
+import importlib.util
+import io
+import json
+import os
+import shutil
+import threading
+
+from event_frames import EVENT_SCHEMA
+
+# Rows converted to cell values at a time, bounding the extra memory an export needs
+EXPORT_CHUNK_ROWS = 5_000
+
+# Cached downloads, under the event data directory
+EXPORT_DIRNAME = '.exports'
+
+# Bump when the exported layout changes, so cached artifacts and client ETags go stale
+EXPORT_FORMAT = 1
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Columns repeated on every section sheet so rows can be matched up
+KEY_COLUMNS = ['Date', 'Event Name', 'Location']
+
+# Sheets of the 'sections' workbook layout: sheet -> flattened columns
+SECTION_SHEETS = {
+    'Events': [column for column, section, _, _, kind in EVENT_SCHEMA if section is None and kind == 'text'],
+    'Financial': [column for column, section, _, _, kind in EVENT_SCHEMA if section is None and kind != 'text'],
+    'Attendance': [column for column, section, _, _, _ in EVENT_SCHEMA if section == 'attendance'],
+    'First-Time Attendees': [column for column, section, _, _, _ in EVENT_SCHEMA
+                             if section == 'first_time_attendees'],
+    'Feedback': [column for column, section, _, _, _ in EVENT_SCHEMA if section == 'feedback'],
+}
+
+# OWU red header row with white bold text
+HEADER_COLOR = 'D00000'
+HEADER_TEXT_COLOR = 'FFFFFF'
+
+
+def frame_rows(df, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Yield the rows of a frame as tuples of plain Python values, with missing values as None."""
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows].astype(object)
+        yield from chunk.where(chunk.notna(), None).itertuples(index=False, name=None)
+
+
+def write_xlsx(sheets, stream):
+    """
+    Write ``{sheet name: DataFrame}`` as an xlsx workbook to a binary stream.
+
+    Uses openpyxl's write-only worksheets: rows are serialized as they are
+    appended instead of being kept as cell objects, so memory stays flat
+    however many events are exported. The header row is styled as it is
+    written, with one shared font and fill.
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, PatternFill
+
+    header_font = Font(bold=True, color=HEADER_TEXT_COLOR)
+    header_fill = PatternFill(start_color=HEADER_COLOR, end_color=HEADER_COLOR, fill_type='solid')
+    workbook = Workbook(write_only=True)
+    for sheet_name, df in sheets.items():
+        worksheet = workbook.create_sheet(title=sheet_name)
+        header = []
+        for column in df.columns:
+            cell = WriteOnlyCell(worksheet, value=str(column))
+            cell.font = header_font
+            cell.fill = header_fill
+            header.append(cell)
+        worksheet.append(header)
+        for row in frame_rows(df):
+            worksheet.append(row)
+    workbook.save(stream)
+
+
+def write_csv(df, stream):
+    """Write a frame as UTF-8 CSV to a binary stream, a chunk of rows at a time."""
+    text = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+    df.iloc[:0].to_csv(text, index=False)
+    for start in range(0, len(df), EXPORT_CHUNK_ROWS):
+        df.iloc[start:start + EXPORT_CHUNK_ROWS].to_csv(text, header=False, index=False)
+    text.flush()
+    text.detach()
+
+
+def write_json(df, stream):
+    """Write a frame as a JSON array of row objects (missing values as null), a chunk of rows at a time."""
+    stream.write(b'[')
+    for start in range(0, len(df), EXPORT_CHUNK_ROWS):
+        # Each chunk is itself an array; keep its rows and join the chunks with commas
+        rows = df.iloc[start:start + EXPORT_CHUNK_ROWS].to_json(orient='records', double_precision=15)[1:-1]
+        if rows:
+            stream.write(b',' if start else b'')
+            stream.write(rows.encode('utf-8'))
+    stream.write(b']')
+
+
+def write_parquet(df, stream):
+    df.to_parquet(stream, index=False)
+
+
+def parquet_available():
+    """Parquet needs pyarrow or fastparquet, which are optional."""
+    return any(importlib.util.find_spec(engine) is not None for engine in ('pyarrow', 'fastparquet'))
+
+
+def section_sheets(df):
+    """
+    Split a flattened frame into one table per event section.
+
+    Every sheet after 'Events' repeats the date, name and location so it can
+    be read on its own; sections no event has are left out.
+    """
+    sheets = {}
+    for sheet, columns in SECTION_SHEETS.items():
+        present = [column for column in columns if column in df.columns]
+        if sheet == 'Events':
+            sheets[sheet] = df[present]
+        elif present:
+            sheets[sheet] = df[[column for column in KEY_COLUMNS if column in df.columns] + present]
+    return sheets
+
+
+# format -> (file extension, mimetype, write(df, stream))
+EXPORT_FORMATS = {
+    'xlsx': ('xlsx', XLSX_MIMETYPE, lambda df, stream: write_xlsx({'Event Data': df}, stream)),
+    'csv': ('csv', 'text/csv', write_csv),
+    'json': ('json', 'application/json', write_json),
+    'parquet': ('parquet', 'application/vnd.apache.parquet', write_parquet),
+}
+
+# layout -> formats it applies to and the writer replacing the format's default
+EXPORT_LAYOUTS = {
+    'sections': ({'xlsx'}, lambda df, stream: write_xlsx(section_sheets(df), stream)),
+}
+
+
+def export_writer(export_format='xlsx', layout=None):
+    """
+    Resolve the ``format`` and ``layout`` of an export request.
+
+    Returns (name, extension, mimetype, write), where ``name`` identifies the
+    export in the cache and ``write(df, stream)`` produces it. Raises
+    ValueError for unknown or unavailable combinations.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    if export_format == 'parquet' and not parquet_available():
+        raise ValueError("Parquet export needs the pyarrow (or fastparquet) package")
+    extension, mimetype, write = EXPORT_FORMATS[export_format]
+    name = extension
+    if layout:
+        if layout not in EXPORT_LAYOUTS:
+            raise ValueError(f"layout must be one of: {', '.join(EXPORT_LAYOUTS)}")
+        formats, write = EXPORT_LAYOUTS[layout]
+        if export_format not in formats:
+            raise ValueError(f"layout={layout} is only available for: {', '.join(sorted(formats))}")
+        name = f"{layout}.{extension}"
+    return name, extension, mimetype, write
+
+
+def download_name(file_name, extension):
+    """A download file name built from an event file's display name."""
+    clean = "".join(c for c in (file_name or 'OWU_Event_Data') if c.isalnum() or c in (' ', '-', '_')).rstrip()
+    return f"{clean or 'OWU_Event_Data'}.{extension}"
+
+
+class ExportCache:
+    """
+    Generated export files on disk, one per (file, version, export).
+
+    Artifacts live in ``<directory>/<file_id>/<etag>.<name>``, where ``name``
+    is the export's name from ``export_writer`` (e.g. 'csv' or
+    'sections.xlsx') and the ETag is derived from the event store's version
+    token, so an unchanged file is exported once and then served (or
+    answered with 304) from disk.
+
+    ``versions()`` returns the current version token of every event file.
+    Artifacts of any other version, and of files that no longer exist, are
+    swept the first time a process uses the cache and whenever a new
+    artifact is written, so exports nobody requests again do not pile up.
+    Artifacts are handed out as open files: a swept artifact that is still
+    being sent stays readable, and where an open file cannot be removed
+    (Windows) it is left for a later sweep.
+    """
+
+    def __init__(self, directory, versions):
+        self.directory = directory
+        self.versions = versions
+        self._swept = False
+        # Serializes sweeping with putting new artifacts in place and opening them
+        self._lock = threading.Lock()
+
+    def etag(self, file_id, version, name):
+        key = json.dumps([EXPORT_FORMAT, file_id, version, name])
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    def path(self, file_id, etag, name):
+        return os.path.join(self.directory, file_id, f"{etag}.{name}")
+
+    def get(self, file_id, version, name, write):
+        """Return the artifact opened for reading, calling ``write(stream)`` to generate it on a miss."""
+        if not self._swept:
+            self.sweep()
+        path = self.path(file_id, self.etag(file_id, version, name), name)
+        try:
+            return open(path, 'rb')
+        except FileNotFoundError:
+            pass
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                write(f)
+            with self._lock:
+                try:
+                    os.replace(tmp_path, path)
+                except PermissionError:
+                    # Windows: another request is sending the same artifact, written meanwhile
+                    if not os.path.exists(path):
+                        raise
+                artifact = open(path, 'rb')
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self.sweep()
+        return artifact
+
+    def sweep(self):
+        """Remove the artifacts of other versions than the current one, and of deleted files."""
+        self._swept = True
+        # Listed before the versions are read, so every artifact found is at most as new as its file
+        listing = {}
+        file_ids = os.listdir(self.directory) if os.path.isdir(self.directory) else []
+        for file_id in file_ids:
+            try:
+                listing[file_id] = os.listdir(os.path.join(self.directory, file_id))
+            except (FileNotFoundError, NotADirectoryError):
+                pass
+        versions = self.versions()
+        for file_id, filenames in listing.items():
+            if file_id not in versions:
+                self.discard(file_id)
+                continue
+            for filename in filenames:
+                etag, _, name = filename.partition('.')
+                if filename.endswith('.tmp') or etag == self.etag(file_id, versions[file_id], name):
+                    continue
+                with self._lock:
+                    try:
+                        os.remove(os.path.join(self.directory, file_id, filename))
+                    except (FileNotFoundError, PermissionError):
+                        # Gone already, or still being sent (Windows): the next sweep retries
+                        pass
+
+    def discard(self, file_id):
+        """Remove every artifact of a file (when the file itself is deleted)."""
+        shutil.rmtree(os.path.join(self.directory, file_id), ignore_errors=True)
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Event Frames
+Turns the nested event dicts of a managed event file into a flat pandas DataFrame
+"""
+
+import threading
+from collections import OrderedDict
+
+# Default number of cached frames/results kept by FrameCache
+FRAME_CACHE_SIZE = 32
+
+# One entry per output column: (column, section, group, key, kind)
+#   section/group - where the value lives in the event dict (None = top level)
+#   kind          - 'text', 'amount' (always float) or 'count' (int unless missing)
+EVENT_SCHEMA = [
+    ('Date', None, None, 'date', 'text'),
+    ('Event Name', None, None, 'name', 'text'),
+    ('Location', None, None, 'location', 'text'),
+    ('Description', None, None, 'description', 'text'),
+    ('Event Income', None, None, 'income', 'amount'),
+    ('All Incurred Expenses', None, None, 'expenses', 'amount'),
+    ('Underwritten', None, None, 'underwritten', 'amount'),
+    ('Profit/Loss', None, None, 'profit_loss', 'amount'),
+    ('Young Alumni Start Year', 'attendance', 'yearRanges', 'yaStartYear', 'text'),
+    ('Young Alumni End Year', 'attendance', 'yearRanges', 'yaEndYear', 'text'),
+    ('Alumni Cutoff Year', 'attendance', 'yearRanges', 'alumniCutoffYear', 'text'),
+    ('Young Alumni Registered', 'attendance', 'alumni', 'yaRegistered', 'count'),
+    ('Alumni Registered', 'attendance', 'alumni', 'alumniRegistered', 'count'),
+    ('Total Alumni Attended', 'attendance', 'alumni', 'totalAlumniAttended', 'count'),
+    ('Students Attended', 'attendance', 'other', 'students', 'count'),
+    ('Friends/Family Attended', 'attendance', 'other', 'friendsFamily', 'count'),
+    ('Staff/Faculty Attended', 'attendance', 'other', 'staffFaculty', 'count'),
+    ('Total Alumni/Guests', 'attendance', 'totals', 'totalAlumniGuests', 'count'),
+    ('% Young Alumni Attendees', 'attendance', 'totals', 'percentYAAttendees', 'amount'),
+    ('% Non-Young Alumni Attendees', 'attendance', 'totals', 'percentNonYAAttendees', 'amount'),
+    ('1st Time Alumni', 'first_time_attendees', None, 'alumni', 'count'),
+    ('1st Time Parents', 'first_time_attendees', None, 'parents', 'count'),
+    ('1st Time Friends', 'first_time_attendees', None, 'friends', 'count'),
+    ('5-Star Ratings', 'feedback', None, 'rating5', 'count'),
+    ('4-Star Ratings', 'feedback', None, 'rating4', 'count'),
+    ('3-Star Ratings', 'feedback', None, 'rating3', 'count'),
+    ('2-Star Ratings', 'feedback', None, 'rating2', 'count'),
+    ('1-Star Ratings', 'feedback', None, 'rating1', 'count'),
+    ('Total Ratings', 'feedback', None, 'total', 'count'),
+]
+
+EVENT_COLUMNS = [column for column, _, _, _, _ in EVENT_SCHEMA]
+
+
+def _schema_blocks():
+    """Group the schema by (section, group) so each nested dict is looked up once per event."""
+    blocks = {}
+    for index, (_, section, group, key, kind) in enumerate(EVENT_SCHEMA):
+        blocks.setdefault((section, group), []).append((index, key, kind))
+    return list(blocks.items())
+
+
+_BLOCKS = _schema_blocks()
+
+
+def flatten_events(events):
+    """
+    Flatten a list of event dicts into a DataFrame with the EVENT_SCHEMA columns.
+
+    Works in a single pass that appends each value straight onto its column,
+    without building an intermediate dict per event, and then turns every
+    column into one typed NumPy array. Nested columns only appear if at least
+    one event has their section; events without it get NaN, and keys missing
+    from a present section default to 0 (numbers) or '' (text), as in the
+    original export.
+    """
+    # Imported here so that importing the module (e.g. for FrameCache) doesn't load pandas
+    import pandas as pd
+
+    values = [[] for _ in EVENT_SCHEMA]
+    blocks = [(section, group, [(values[index].append, key, '' if kind == 'text' else 0)
+                                for index, key, kind in fields])
+              for (section, group), fields in _BLOCKS]
+    present = [False] * len(blocks)
+    missing = float('nan')
+
+    for event in events:
+        for block, (section, group, fields) in enumerate(blocks):
+            source = event if section is None else event.get(section)
+            if source is not None and group is not None:
+                source = source.get(group)
+            if source is None:
+                for append, _, _ in fields:
+                    append(missing)
+                continue
+            present[block] = True
+            for append, key, default in fields:
+                append(source.get(key, default))
+
+    columns = {}
+    for block, ((section, _), fields) in enumerate(_BLOCKS):
+        if section is not None and not present[block]:
+            continue
+        for index, _, kind in fields:
+            columns[EVENT_SCHEMA[index][0]] = _to_array(values[index], kind)
+    return pd.DataFrame(columns, copy=False)
+
+
+def _to_array(values, kind):
+    """Convert one column's values to a typed NumPy array."""
+    import numpy as np
+
+    if kind == 'text':
+        return np.array(values, dtype=object)
+    try:
+        array = np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        # Non-numeric value in a numeric field: keep the column as objects
+        return np.array(values, dtype=object)
+    if kind == 'count' and not np.isnan(array).any() and np.array_equal(array, np.floor(array)):
+        return array.astype(np.int64)
+    return array
+
+
+def flatten_file(file_data):
+    """Flatten the events of a loaded event file (see ``flatten_events``)."""
+    return flatten_events(file_data.get('events', []))
+
+
+def frame_records(df):
+    """Rows of a flattened frame as JSON-ready dicts, with missing values (NaN) as None."""
+    return df.astype(object).where(df.notna(), None).to_dict('records')
+
+
+class FrameCache:
+    """
+    Process-wide LRU cache of DataFrames and results derived from event files.
+
+    Entries are keyed by (file_id, version, name), where ``version`` is the
+    token returned by the event store for the file, so a stale entry can never
+    be served after the file changes. The mutation routes also drop a file's
+    entries explicitly so they do not linger until evicted.
+    """
+
+    def __init__(self, maxsize=FRAME_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, file_id, version, name, build):
+        """Return the cached value, calling ``build()`` to create it on a miss."""
+        key = (file_id, version, name)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        value = build()
+        if self.maxsize > 0:
+            with self._lock:
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, file_id):
+        """Drop every entry belonging to a file."""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == file_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
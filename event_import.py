@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+Event Import
+Reads events from JSON, row-per-event sheets or the wide OWU financial template,
+validates them column by column and turns the valid rows into event dicts for a
+single bulk write
+"""
+
+import argparse
+import os
+import re
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from openpyxl.utils import get_column_letter
+
+from event_frames import EVENT_SCHEMA
+from event_store import create_event_store, timestamp
+from upload_processing import MISSING_SENTINELS, parse_money
+
+# Columns every imported row must fill in
+REQUIRED_COLUMNS = ['Date', 'Event Name']
+
+# Sheet read from an uploaded workbook when present (the name used by the xlsx export)
+IMPORT_SHEET = 'Event Data'
+
+# Where each event section sits in a POST /api/files/<file_id>/events body
+REQUEST_SECTIONS = {
+    None: 'basic',
+    'attendance': 'attendance',
+    'first_time_attendees': 'firstTimeAttendees',
+    'feedback': 'feedback',
+}
+REQUEST_KEYS = {'profit_loss': 'profitLoss'}
+
+# Category rows of the wide template (see create_owu_template.py) whose label is not an
+# export column name: export column -> pattern, tried in order ('Income / Expense Snapshot'
+# headings are skipped because their cells are empty)
+WIDE_ROW_PATTERNS = [
+    ('Profit/Loss', re.compile(r'profit|loss', re.IGNORECASE)),
+    ('Underwritten', re.compile(r'underwrit', re.IGNORECASE)),
+    ('All Incurred Expenses', re.compile(r'expense', re.IGNORECASE)),
+    ('Event Income', re.compile(r'income|revenue', re.IGNORECASE)),
+]
+
+# Event headers of the wide template: '07/27/2024 Golf Outing', '10/4-5/2024 Homecoming',
+# '10/3/24 Emerging Leaders', 'March 27,28,29 - Symposium' (year from the previous events),
+# optionally marked cancelled ("CXL'd June 7 - OWU at the Zoo")
+_CANCELLED = r"^\s*(?P<cancelled>CXL'?d|cancell?ed)?\s*"
+_NUMERIC_HEADER = re.compile(_CANCELLED + r'(?P<month>\d{1,2})/(?P<day>\d{1,2})(?:\s*-\s*\d{1,2})?/(?P<year>\d{2,4})',
+                             re.IGNORECASE)
+_NAMED_HEADER = re.compile(_CANCELLED + r'(?P<month>jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?\s*'
+                           r'(?P<day>\d{1,2})(?:\s*[-,]\s*\d{1,2})*(?:,?\s+(?P<year>\d{4}))?', re.IGNORECASE)
+_MONTHS = {name: number for number, name in enumerate(
+    ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'], start=1)}
+
+# Export columns the wide template takes from each event's header, not from a category row
+WIDE_HEADER_COLUMNS = ['Date', 'Event Name', 'Description']
+
+# Wide-template columns that are not events
+_SUMMARY_HEADER = re.compile(r'^\s*(grand\s+)?totals?\s*$|^unnamed:', re.IGNORECASE)
+
+
+def read_import_file(filename, stream):
+    """
+    Read an uploaded .xlsx/.xls/.csv into (rows, locations).
+
+    Accepts the export layout (one row per event) and the wide OWU template
+    (categories as rows, events as columns, see ``wide_rows``). ``rows`` is
+    a DataFrame in the export layout and ``locations`` says where each row
+    came from in the upload, for error reports.
+    """
+    extension = filename.rsplit('.', 1)[-1].lower()
+    if extension == 'csv':
+        df = pd.read_csv(stream)
+    elif extension in ('xlsx', 'xls'):
+        sheets = pd.read_excel(stream, sheet_name=None)
+        df = sheets.get(IMPORT_SHEET, next(iter(sheets.values())))
+    else:
+        raise ValueError("Upload a .xlsx, .xls or .csv file")
+
+    if is_wide_layout(df):
+        return wide_rows(df)
+    # Sheet rows, below the header
+    return df, [{'row': position + 2} for position in range(len(df))]
+
+
+def is_wide_layout(df):
+    """True for a sheet with events as columns: no Date/Event Name columns, and dated column headers."""
+    if any(column in df.columns for column in REQUIRED_COLUMNS):
+        return False
+    return any(parse_event_header(str(header))[0] is not None for header in df.columns[1:])
+
+
+def parse_event_header(header, previous=None):
+    """
+    Split a wide-template event header into (date, name, cancelled).
+
+    ``date`` is a datetime.date, or None if the header does not start with
+    one. Headers without a year ('Jan 20 - MLK Breakfast') take it from
+    ``previous``, the date of the column before, moving to the next year
+    when the month goes back (the template runs July to June).
+    """
+    match = _NUMERIC_HEADER.match(header) or _NAMED_HEADER.match(header)
+    if match is None:
+        return None, ' '.join(header.split()), False
+    name = ' '.join(header[match.end():].strip(' -–:').split())
+    cancelled = bool(match['cancelled'])
+    month = _MONTHS[match['month'][:3].lower()] if not match['month'].isdigit() else int(match['month'])
+    if match['year']:
+        year = int(match['year'])
+        year += 2000 if year < 100 else 0
+    elif previous is not None:
+        year = previous.year + (month < previous.month)
+    else:
+        return None, name, cancelled
+    try:
+        return datetime(year, month, int(match['day'])).date(), name, cancelled
+    except ValueError:
+        return None, name, cancelled
+
+
+def wide_rows(df):
+    """
+    Transpose the wide OWU template into rows in the export layout.
+
+    The first column holds the category labels ('Event Income', 'All
+    Incurred Expenses (food, beverage, rental etc.)', 'Underwritten',
+    'Profit/Loss' or any export column name) and every other column is an
+    event whose header starts with its date. Category rows are matched to
+    export columns once, and their cells are moved with a single NumPy
+    transpose; 'Total' columns are skipped. A category row labelled with a
+    column the headers supply (Date, Event Name, Description) is kept as
+    '<label> (row <n>)', so validation lists it among the ignored columns.
+    Returns (rows, locations) like ``read_import_file``, with the sheet
+    column and header as location.
+    """
+    labels = df.iloc[:, 0]
+    cells = df.iloc[:, 1:]
+    exact = {column.lower(): column for column in (name for name, _, _, _, _ in EVENT_SCHEMA)}
+
+    category_rows = {}
+    for position, label in enumerate(labels):
+        row = cells.iloc[position]
+        if pd.isna(label) or (row.isna() | row.astype(str).str.strip().isin(MISSING_SENTINELS)).all():
+            continue
+        text = ' '.join(str(label).split()).rstrip(':').strip()
+        column = exact.get(text.lower()) or next(
+            (column for column, pattern in WIDE_ROW_PATTERNS if pattern.search(text)), None)
+        if column in WIDE_HEADER_COLUMNS:
+            # Sheet row, below the header
+            column = f"{text} (row {position + 2})"
+        if column is not None and column not in category_rows:
+            category_rows[column] = position
+
+    positions, dates, names, descriptions, locations = [], [], [], [], []
+    previous = None
+    for position, header in enumerate(df.columns[1:]):
+        header = str(header)
+        if _SUMMARY_HEADER.search(header):
+            continue
+        date, name, cancelled = parse_event_header(header, previous)
+        previous = date or previous
+        positions.append(position)
+        dates.append(date.isoformat() if date else None)
+        names.append(name)
+        descriptions.append('Cancelled' if cancelled else '')
+        locations.append({'column': get_column_letter(position + 2), 'header': header})
+
+    values = cells.iloc[list(category_rows.values()), positions].to_numpy(dtype=object).T
+    rows = pd.DataFrame({'Date': dates, 'Event Name': names, 'Description': descriptions,
+                         **{column: values[:, i] for i, column in enumerate(category_rows)}})
+    return rows, locations
+
+
+def request_rows(items):
+    """
+    A JSON array of events as a DataFrame in the export layout.
+
+    Items are either rows keyed by the export column names or event bodies
+    as sent to ``POST /api/files/<file_id>/events`` ('basic',
+    'incomeExpense', 'attendance', ...).
+    """
+    if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+        raise ValueError("Send a JSON array of event objects")
+    rows = []
+    for item in items:
+        if 'basic' not in item:
+            rows.append(item)
+            continue
+        row = {}
+        for column, section, group, key, kind in EVENT_SCHEMA:
+            if section is None and kind != 'text':
+                source = item.get('incomeExpense')
+            else:
+                source = item.get(REQUEST_SECTIONS[section])
+            if isinstance(source, dict) and group is not None:
+                source = source.get(group)
+            if isinstance(source, dict):
+                row[column] = source.get(REQUEST_KEYS.get(key, key))
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def _cells(series):
+    """Factorize a column: (codes per row, distinct non-missing values), so each value is inspected once."""
+    codes, uniques = pd.factorize(series.astype(object), use_na_sentinel=True)
+    return codes, list(uniques)
+
+
+def _is_blank(value):
+    return isinstance(value, str) and value.strip() in MISSING_SENTINELS
+
+
+def _numbers(series):
+    """Parse a column of numbers or money strings: (float values with NaN for blanks, invalid mask)."""
+    if pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+        return series.to_numpy(dtype=np.float64, na_value=np.nan), np.zeros(len(series), dtype=bool)
+    codes, uniques = _cells(series)
+    # One extra slot at the end serves code -1 (missing cells)
+    values = np.full(len(uniques) + 1, np.nan)
+    invalid = np.zeros(len(uniques) + 1, dtype=bool)
+    for position, value in enumerate(uniques):
+        if isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, (bool, np.bool_)):
+            values[position] = value
+        elif not _is_blank(value):
+            amount = parse_money(str(value).strip())
+            if amount is None:
+                invalid[position] = True
+            else:
+                values[position] = amount
+    return values[codes], invalid[codes]
+
+
+def _cell_text(value):
+    if isinstance(value, (float, np.floating)) and float(value).is_integer():
+        # Years and other whole numbers read from a sheet as floats
+        return str(int(value))
+    return str(value).strip()
+
+
+def _texts(series):
+    """A column as stripped strings, with blanks as ''."""
+    codes, uniques = _cells(series)
+    texts = np.array(['' if _is_blank(value) else _cell_text(value) for value in uniques] + [''], dtype=object)
+    return texts[codes]
+
+
+def _dates(series):
+    """Parse a column of dates to 'YYYY-MM-DD': (strings with '' for blanks, invalid mask)."""
+    codes, uniques = _cells(series)
+    blank = np.array([_is_blank(value) for value in uniques] + [True])
+    # Bare numbers would parse as offsets from 1970, so they are rejected rather than parsed
+    candidates = [None if is_blank or isinstance(value, (int, float, np.number)) else value
+                  for value, is_blank in zip(uniques, blank)]
+    parsed = pd.to_datetime(pd.Series(candidates, dtype=object), errors='coerce', format='mixed')
+    texts = np.append(parsed.dt.strftime('%Y-%m-%d').fillna('').to_numpy(dtype=object), '')
+    invalid = ~blank & np.append(parsed.isna().to_numpy(), False)
+    return texts[codes], invalid[codes]
+
+
+def validate_rows(df):
+    """
+    Validate every row of an import at once.
+
+    Returns (columns, errors, ignored): the parsed value arrays of the schema
+    columns that are present, ``{row position: [messages]}`` for the rows
+    that failed, and the input columns that are not part of the event layout. Date must be a date and Event Name
+    non-empty; amounts may be numbers or money strings ('$1,234.00',
+    '($50)'), and attendance, first-time and rating counts whole numbers of
+    at least 0. Raises ValueError if a required column is missing entirely.
+    """
+    missing = [column for column in REQUIRED_COLUMNS if column not in df.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+
+    problems = []
+    columns = {}
+    for column, _, _, _, kind in EVENT_SCHEMA:
+        if column not in df.columns:
+            continue
+        if column == 'Date':
+            values, invalid = _dates(df[column])
+            problems.append((invalid, f"{column}: not a date"))
+            problems.append(((values == '') & ~invalid, f"{column} is required"))
+        elif kind == 'text':
+            values = _texts(df[column])
+            if column in REQUIRED_COLUMNS:
+                problems.append((values == '', f"{column} is required"))
+        else:
+            values, invalid = _numbers(df[column])
+            problems.append((invalid, f"{column}: not a number"))
+            if kind == 'count':
+                with np.errstate(invalid='ignore'):
+                    problems.append((~np.isnan(values) & ((values < 0) | (values != np.floor(values))),
+                                     f"{column}: must be a whole number of at least 0"))
+        columns[column] = values
+
+    errors = {}
+    for mask, message in problems:
+        for position in np.flatnonzero(mask):
+            errors.setdefault(int(position), []).append(message)
+
+    known = set(columns)
+    ignored = [str(column) for column in df.columns if column not in known]
+    return columns, errors, ignored
+
+
+def build_events(columns, rows):
+    """
+    Turn the validated columns into event dicts for the given row positions.
+
+    Missing amounts are 0 and a missing Profit/Loss is income - expenses +
+    underwritten, as on the add-event form. A section (attendance,
+    first-time attendees, feedback) is included when any of its columns has
+    a value in that row; its other fields default to 0 or ''.
+    """
+    count = len(next(iter(columns.values()))) if columns else 0
+    amounts = {column: np.nan_to_num(columns[column]) if column in columns else np.zeros(count)
+               for column, _, _, _, kind in EVENT_SCHEMA if kind == 'amount'}
+    if 'Profit/Loss' in columns:
+        profit_loss = np.where(np.isnan(columns['Profit/Loss']),
+                               amounts['Event Income'] - amounts['All Incurred Expenses'] + amounts['Underwritten'],
+                               columns['Profit/Loss'])
+    else:
+        profit_loss = amounts['Event Income'] - amounts['All Incurred Expenses'] + amounts['Underwritten']
+    amounts['Profit/Loss'] = profit_loss
+
+    # Per section: does each row have any of its values?
+    present = {section: np.zeros(count, dtype=bool) for _, section, _, _, _ in EVENT_SCHEMA if section is not None}
+    for column, section, _, _, kind in EVENT_SCHEMA:
+        if section is None or column not in columns:
+            continue
+        values = columns[column]
+        present[section] |= values != '' if kind == 'text' else ~np.isnan(values)
+
+    now = timestamp()
+    events = []
+    for row in rows:
+        event = {}
+        for column, section, group, key, kind in EVENT_SCHEMA:
+            if section is not None and not present[section][row]:
+                continue
+            if kind == 'amount' and section is None:
+                # Same key order as events added through the form
+                event.setdefault('created_date', now)
+                value = float(amounts[column][row])
+            elif column not in columns:
+                value = '' if kind == 'text' else 0
+            elif kind == 'text':
+                value = columns[column][row]
+            else:
+                value = columns[column][row]
+                value = 0 if np.isnan(value) else (int(value) if kind == 'count' else float(value))
+            target = event if section is None else event.setdefault(section, {})
+            if group is not None:
+                target = target.setdefault(group, {})
+            target[key] = value
+        events.append(event)
+    return events
+
+
+def prepare_import(df, locations):
+    """
+    Validate an import and build its events.
+
+    Returns (events, report, ignored): the event dicts of the valid rows, one
+    ``{**location, 'errors': [...]}`` entry per invalid row, and the ignored
+    input columns.
+    """
+    columns, errors, ignored = validate_rows(df)
+    report = [{**locations[position], 'errors': errors[position]} for position in sorted(errors)]
+    events = build_events(columns, [position for position in range(len(df)) if position not in errors])
+    return events, report, ignored
+
+
+def main():
+    """Load a spreadsheet (export layout or wide OWU template) into a new managed event file."""
+    parser = argparse.ArgumentParser(description='Import a season of OWU events into event_data')
+    parser.add_argument('path', help='.xlsx, .xls or .csv file')
+    parser.add_argument('--name', help='name of the new event file (default: the file name)')
+    parser.add_argument('--storage', default=os.environ.get('OWU_STORAGE', 'json'), choices=['json', 'sqlite'])
+    parser.add_argument('--partial', action='store_true', help='import the valid events even if some rows fail')
+    args = parser.parse_args()
+
+    with open(args.path, 'rb') as f:
+        df, locations = read_import_file(args.path, f)
+    events, report, _ = prepare_import(df, locations)
+    for entry in report:
+        where = f"column {entry['column']} ({entry['header']})" if 'column' in entry else f"row {entry['row']}"
+        print(f"❌ {where}: {'; '.join(entry['errors'])}")
+    if report and not args.partial:
+        print("Nothing imported; fix the rows above or pass --partial")
+        raise SystemExit(1)
+
+    store = create_event_store(args.storage)
+    file_data = store.create_new_file(args.name or os.path.splitext(os.path.basename(args.path))[0], events)
+    print(f"✅ Imported {len(events)} events into {file_data['id']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Columnar Event Snapshots
+Keeps the flattened DataFrame of every managed event file on disk in a
+memory-mappable columnar layout, so analytics never re-parse the JSON events
+"""
+
+import json
+import mmap
+import os
+import pickle
+import struct
+import threading
+
+from event_frames import flatten_file
+
+SNAPSHOT_DIRNAME = '.columnar'
+
+# Bump when the layout changes, so old snapshots are rebuilt
+SNAPSHOT_FORMAT = 1
+
+SNAPSHOT_MAGIC = b'OWUCOLS\n'
+
+# Column buffers start on cache-line boundaries
+SNAPSHOT_ALIGN = 64
+
+_TRAILER = struct.Struct('<Q')
+
+
+def library_versions():
+    """
+    The pandas and NumPy versions a pickled frame was written with.
+
+    Pickled frames refer to pandas internals, which change between
+    releases; a frame pickled by another version may fail to load, or
+    load into objects that misbehave later.
+    """
+    import numpy as np
+    import pandas as pd
+
+    return {'pandas': pd.__version__, 'numpy': np.__version__}
+
+
+def _version_key(version):
+    """The store's version token as it reads back from the JSON header (tuples become lists)."""
+    return json.loads(json.dumps(version))
+
+
+def write_snapshot(path, version, name, df):
+    """
+    Write a flattened frame to ``path``.
+
+    Layout: magic, the pickled frame with its column arrays taken out of
+    band (pickle protocol 5), each array's raw buffer aligned to
+    SNAPSHOT_ALIGN bytes, a JSON header with the offsets, file name,
+    version token and library versions, and finally the header's offset. The file is written to a
+    temporary name and renamed into place, so readers never see a partial
+    snapshot.
+    """
+    buffers = []
+    payload = pickle.dumps(df, protocol=5, buffer_callback=buffers.append)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(SNAPSHOT_MAGIC)
+            header = {'format': SNAPSHOT_FORMAT, 'libraries': library_versions(), 'version': version,
+                      'name': name, 'pickle': [f.tell(), len(payload)], 'buffers': []}
+            f.write(payload)
+            for buffer in buffers:
+                raw = buffer.raw()
+                f.write(b'\0' * (-f.tell() % SNAPSHOT_ALIGN))
+                header['buffers'].append([f.tell(), raw.nbytes])
+                f.write(raw)
+            header_offset = f.tell()
+            f.write(json.dumps(header).encode('utf-8'))
+            f.write(_TRAILER.pack(header_offset))
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def read_snapshot(path):
+    """
+    Map a snapshot and return (header, DataFrame), or None if it is missing or unreadable.
+
+    Numeric columns are NumPy arrays over the mapped file rather than
+    copies, so they are read-only; text columns are unpickled. The mapping
+    stays valid after the file is replaced or removed. A snapshot written
+    with other pandas or NumPy versions, or that fails to unpickle for any
+    reason, counts as missing and is rebuilt.
+    """
+    try:
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    try:
+        if mapped[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+            return None
+        header_offset, = _TRAILER.unpack(mapped[-_TRAILER.size:])
+        header = json.loads(mapped[header_offset:-_TRAILER.size])
+        if header.get('format') != SNAPSHOT_FORMAT or header.get('libraries') != library_versions():
+            return None
+        view = memoryview(mapped)
+        start, length = header['pickle']
+        df = pickle.loads(view[start:start + length],
+                          buffers=[view[offset:offset + size] for offset, size in header['buffers']])
+        return header, df
+    except Exception:
+        # Unpickling can raise anything (ImportError, AttributeError, ...) for an incompatible frame
+        return None
+
+
+class ColumnarSnapshots:
+    """
+    One columnar snapshot per event file of an EventStore.
+
+    A snapshot records the store's version token of the file it was built
+    from. ``frame`` maps the snapshot when the token still matches and
+    otherwise flattens the file once and writes a new snapshot, so the first
+    read after a write regenerates it and every later read, including after
+    a restart, skips loading and flattening the JSON events.
+    """
+
+    def __init__(self, store, directory):
+        self.store = store
+        self.directory = directory
+
+    def path(self, file_id):
+        return os.path.join(self.directory, f"{file_id}.cols")
+
+    def frame(self, file_id, version=None):
+        """Return (file name, flattened DataFrame) for a file, or None if it does not exist."""
+        if version is None:
+            version = self.store.version(file_id)
+        snapshot = read_snapshot(self.path(file_id))
+        if snapshot is not None and snapshot[0]['version'] == _version_key(version):
+            return snapshot[0]['name'], snapshot[1]
+
+        # The version is read before the file, so a write in between only costs another rebuild
+        file_data = self.store.load(file_id)
+        if file_data is None:
+            return None
+        name, df = file_data.get('name'), flatten_file(file_data)
+        try:
+            write_snapshot(self.path(file_id), _version_key(version), name, df)
+        except OSError as e:
+            print(f"Could not write columnar snapshot for {file_id}: {e}")
+        return name, df
+
+    def discard(self, file_id):
+        """Remove a file's snapshot (when the file itself is deleted)."""
+        try:
+            os.remove(self.path(file_id))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,989 @@
+#!/usr/bin/env python3
+"""
+Event File Storage
+Pluggable storage backends for the managed event files: JSON snapshots with an
+append-only operation log, or a single embedded SQLite database
+"""
+
+import argparse
+import copy
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: locks only cover the threads of one process
+    fcntl = None
+
+# Number of logged operations after which the log is folded into the snapshot
+COMPACT_EVERY = 500
+
+# Per-file listing metadata kept next to the JSON event files
+CATALOG_FILENAME = '.catalog'
+
+# Advisory lock files, one per event file, under the data directory
+LOCK_DIRNAME = '.locks'
+
+# Ids of new event files: the prefix and the creation time in seconds
+FILE_ID_PREFIX = 'owu_events'
+
+
+def timestamp():
+    """Return the current time in the format used throughout the event files."""
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+def event_number(event_id):
+    """Return the numeric suffix of an ``event_<n>`` id, or 0 if it has none."""
+    try:
+        return int(str(event_id).rsplit('_', 1)[1])
+    except (IndexError, ValueError):
+        return 0
+
+
+class ConflictError(Exception):
+    """A write was based on a copy of the data that has changed since it was read."""
+
+
+class FileLocks:
+    """
+    One lock per event file, shared by the threads of this process and,
+    through an advisory ``flock`` on ``<directory>/<file_id>.lock``, by every
+    process working on the same data directory.
+
+    ``hold`` is reentrant within a thread, so a store method can take the
+    lock its caller already holds. Locks of different files are independent,
+    so writers to different files never wait for each other. ``remove``
+    deletes a lock file when its event file is deleted; a process that was
+    waiting on the removed file notices and locks the current one instead.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._guard = threading.Lock()
+        self._locks = {}
+
+    def local(self, file_id):
+        """The in-process part of a file's lock, for readers that only update in-memory caches."""
+        with self._guard:
+            return self._locks.setdefault(file_id, _FileLock())
+
+    @contextmanager
+    def hold(self, file_id):
+        lock = self.local(file_id)
+        with lock:
+            if lock.depth == 0 and fcntl is not None:
+                lock.handle = self._acquire(file_id)
+            lock.depth += 1
+            try:
+                yield
+            finally:
+                lock.depth -= 1
+                if lock.depth == 0 and lock.handle is not None:
+                    # Closing the descriptor releases the flock
+                    lock.handle.close()
+                    lock.handle = None
+
+
+    def remove(self, file_id):
+        """Delete a file's lock file; call while holding the lock."""
+        try:
+            os.remove(self.path(file_id))
+        except FileNotFoundError:
+            pass
+
+    def path(self, file_id):
+        return os.path.join(self.directory, f"{file_id}.lock")
+
+    def _acquire(self, file_id):
+        """Open and flock the lock file, retrying if it was removed while we waited."""
+        os.makedirs(self.directory, exist_ok=True)
+        while True:
+            handle = open(self.path(file_id), 'a')
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                if os.fstat(handle.fileno()).st_ino == os.stat(self.path(file_id)).st_ino:
+                    return handle
+            except FileNotFoundError:
+                pass
+            handle.close()
+
+
+class _FileLock:
+    """Reentrant thread lock of one file plus the open lock file while it is held."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.depth = 0
+        self.handle = None
+
+    def __enter__(self):
+        self._lock.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._lock.release()
+
+
+def event_modified(event):
+    """The version of an event that clients send back as ``last_modified`` when changing it."""
+    return event.get('last_modified') or event.get('created_date') or ''
+
+
+class EventStore:
+    """
+    Interface shared by the event file storage backends.
+
+    Every write holds the file's lock (see ``FileLocks``), so the stores can
+    be shared by the threads and worker processes of a server. Callers that
+    check a precondition before writing hold ``locked(file_id)`` around both.
+    """
+
+    locks = None
+
+    def locked(self, file_id):
+        """Context manager holding a file's lock across several store calls."""
+        return self.locks.hold(file_id)
+
+    def exists(self, file_id):
+        raise NotImplementedError
+
+    def file_ids(self):
+        """Return the ids of all event files."""
+        raise NotImplementedError
+
+    def list_files(self):
+        """Return summary metadata (id, name, event_count, dates) for every event file."""
+        raise NotImplementedError
+
+    def create_file(self, file_id, name, events=()):
+        """
+        Create an event file holding ``events`` (ids assigned as by
+        ``add_events``) in one atomic write and return its data. Raises
+        FileExistsError if the id is taken.
+        """
+        raise NotImplementedError
+
+    def create_new_file(self, name, events=()):
+        """
+        Create an event file under a new id (``owu_events_<seconds>``,
+        suffixed if another file was created in the same second) and return
+        its data, as ``create_file``.
+        """
+        base_id = f"{FILE_ID_PREFIX}_{int(datetime.now().timestamp())}"
+        for attempt in itertools.count():
+            try:
+                return self.create_file(base_id if attempt == 0 else f"{base_id}_{attempt}", name, events)
+            except FileExistsError:
+                continue
+
+    def delete_file(self, file_id):
+        """Remove an event file. Returns False if it did not exist."""
+        raise NotImplementedError
+
+    def load(self, file_id):
+        """Return the full contents of an event file, or None if it does not exist."""
+        raise NotImplementedError
+
+    def version(self, file_id):
+        """Return a hashable token that changes whenever the file's contents change."""
+        raise NotImplementedError
+
+    def get_event(self, file_id, event_id):
+        """Return one event of a file, or None if there is no such event."""
+        raise NotImplementedError
+
+    def add_event(self, file_id, event):
+        """Assign the next event id, store the event and return it."""
+        raise NotImplementedError
+
+    def add_events(self, file_id, events):
+        """Assign ids to several events, store them all in one atomic write and return them."""
+        raise NotImplementedError
+
+    def update_event(self, file_id, event_id, changes, expected_modified=None):
+        """
+        Replace the given top-level fields of an event.
+
+        With ``expected_modified``, raise ConflictError unless the event
+        exists and its ``event_modified`` version still matches.
+        """
+        raise NotImplementedError
+
+    def delete_event(self, file_id, event_id, expected_modified=None):
+        """Remove an event from a file (checking ``expected_modified`` as in ``update_event``)."""
+        raise NotImplementedError
+
+    def check_modified(self, file_id, event_id, expected_modified):
+        """Raise ConflictError if an event no longer has the version a client last read."""
+        if expected_modified is None:
+            return
+        event = self.get_event(file_id, event_id)
+        if event is None:
+            raise ConflictError(f"Event {event_id} has been deleted")
+        if event_modified(event) != expected_modified:
+            raise ConflictError(f"Event {event_id} was changed at {event_modified(event)}")
+
+    def find_events(self, file_id, start_date=None, end_date=None, name=None, location=None):
+        """
+        Return the events of a file matching every given filter.
+
+        Dates are inclusive ``YYYY-MM-DD`` bounds; ``name`` and ``location``
+        match case-insensitive substrings.
+        """
+        raise NotImplementedError
+
+
+def event_matches(event, start_date=None, end_date=None, name=None, location=None):
+    """Check one event dict against the filters accepted by ``EventStore.find_events``."""
+    date = event.get('date') or ''
+    if start_date and date < start_date:
+        return False
+    if end_date and date > end_date:
+        return False
+    if name and name.lower() not in (event.get('name') or '').lower():
+        return False
+    if location and location.lower() not in (event.get('location') or '').lower():
+        return False
+    return True
+
+
+class _LogState:
+    """
+    Replayed contents of one event file plus which snapshot and log it was read from.
+
+    Events are kept in a private list with an id -> position index, so
+    logged operations apply in constant time; a deleted event leaves a
+    None in its place until the next compaction. ``data``, the file as
+    ``load`` hands it out, is only rebuilt when it is asked for after a
+    change, and is never modified afterwards.
+    """
+
+    def __init__(self, snapshot_id, data):
+        self.snapshot_id = snapshot_id
+        self.log_id = None
+        self.log_offset = 0
+        self.log_ops = 0
+        self.reset(data)
+        self.next_event = max((event_number(event.get('id')) for event in self.events), default=0) + 1
+
+    def reset(self, data):
+        """Start over from a file's data (read from disk, or just written as the snapshot)."""
+        self.meta = {key: value for key, value in data.items() if key != 'events'}
+        self.events = list(data.get('events', []))
+        self.index = {}
+        for position, event in enumerate(self.events):
+            if event.get('id') is not None:
+                self.index.setdefault(event['id'], position)
+        self.count = len(self.events)
+        self._data = data
+
+    @property
+    def data(self):
+        if self._data is None:
+            self._data = {**self.meta, 'events': [event for event in self.events if event is not None]}
+        return self._data
+
+    def get(self, event_id):
+        position = self.index.get(event_id)
+        return None if position is None else self.events[position]
+
+    def apply(self, op):
+        """Apply one logged operation. Every operation is idempotent."""
+        if op['op'] == 'add':
+            event = op['event']
+            position = self.index.get(event['id'])
+            if position is None:
+                self.index[event['id']] = len(self.events)
+                self.events.append(event)
+                self.count += 1
+            else:
+                self.events[position] = event
+            self.next_event = max(self.next_event, event_number(event['id']) + 1)
+        elif op['op'] == 'update':
+            position = self.index.get(op['event_id'])
+            if position is not None:
+                self.events[position] = {**self.events[position], **op['changes']}
+        elif op['op'] == 'delete':
+            position = self.index.pop(op['event_id'], None)
+            if position is not None:
+                self.events[position] = None
+                self.count -= 1
+        self.meta['last_modified'] = op['at']
+        self._data = None
+
+
+class JsonEventStore(EventStore):
+    """
+    Event files stored as a JSON snapshot plus an append-only operation log.
+
+    ``<file_id>.json`` keeps the original file layout and acts as the snapshot.
+    Mutations are appended to ``<file_id>.log`` as one JSON object per line, so
+    adding, updating or deleting an event never rewrites the whole file. Reads
+    replay only the part of the log written since the previous read, and once
+    the log holds ``compact_every`` operations it is folded back into the
+    snapshot. Files written before the log existed are simply snapshots with an
+    empty log, so they need no migration step.
+
+    The listing metadata of every file is kept in a catalog (``.catalog`` in
+    the data directory) that is updated on each write and validated against
+    the mtime and size of the snapshot and log, so ``list_files`` only parses
+    files that changed behind the store's back.
+
+    Writes hold the file's lock, so log entries and snapshots of concurrent
+    writers (threads or processes) never interleave, and every snapshot is
+    written to a temporary file and renamed into place. Readers need no
+    cross-process lock: they only ever see a complete snapshot and skip a
+    log line that is still being written. Every log starts with a line
+    naming its generation, and a reader reloads the snapshot whenever the
+    snapshot (inode, mtime and size) or the log's generation differs from
+    what it read before, so a log replaced by compaction is never resumed
+    at the old offset. Replaying the log never modifies data already
+    returned by ``load``, and costs the same however many events the
+    file has (see ``_LogState``).
+    """
+
+    def __init__(self, data_dir='event_data', compact_every=COMPACT_EVERY):
+        self.data_dir = data_dir
+        self.compact_every = compact_every
+        self.locks = FileLocks(os.path.join(data_dir, LOCK_DIRNAME))
+        self._states = {}
+        self._catalog = None
+        self._catalog_dirty = False
+        self._catalog_lock = threading.RLock()
+
+    def snapshot_path(self, file_id):
+        return os.path.join(self.data_dir, f"{file_id}.json")
+
+    def log_path(self, file_id):
+        return os.path.join(self.data_dir, f"{file_id}.log")
+
+    def exists(self, file_id):
+        return os.path.exists(self.snapshot_path(file_id))
+
+    def file_ids(self):
+        """Return the ids of all event files in the data directory."""
+        if not os.path.exists(self.data_dir):
+            return []
+        return [filename[:-len('.json')] for filename in sorted(os.listdir(self.data_dir))
+                if filename.endswith('.json')]
+
+    def list_files(self):
+        """Return summary metadata for every event file, served from the catalog."""
+        file_ids = self.file_ids()
+        with self._catalog_lock:
+            catalog = self._read_catalog()
+            stale = [file_id for file_id in file_ids
+                     if file_id not in catalog or catalog[file_id]['signature'] != self._signature(file_id)]
+
+        # Outside the catalog lock: writers take a file's lock before the catalog's
+        for file_id in stale:
+            try:
+                self._update_catalog(file_id)
+            except FileNotFoundError:
+                # Deleted by another process since the directory was listed
+                pass
+
+        with self._catalog_lock:
+            for file_id in set(catalog) - set(file_ids):
+                del catalog[file_id]
+                self._catalog_dirty = True
+
+            if self._catalog_dirty:
+                self._write_catalog()
+            return [catalog[file_id]['file'] for file_id in file_ids if file_id in catalog]
+
+    def create_file(self, file_id, name, events=()):
+        """Write a new event file as its first snapshot. Raises FileExistsError if the id is taken."""
+        os.makedirs(self.data_dir, exist_ok=True)
+        with self.locked(file_id):
+            if self.exists(file_id):
+                raise FileExistsError(f"Event file already exists: {file_id}")
+            now = timestamp()
+            file_data = {
+                'id': file_id,
+                'name': name,
+                'created_date': now,
+                'last_modified': now,
+                'events': [{'id': f"event_{number}", **event} for number, event in enumerate(events, start=1)]
+            }
+            self._write_snapshot(file_id, file_data)
+            self._update_catalog(file_id)
+        return file_data
+
+    def delete_file(self, file_id):
+        """Remove an event file and its log. Returns False if it did not exist."""
+        with self.locked(file_id):
+            if not self.exists(file_id):
+                return False
+            os.remove(self.snapshot_path(file_id))
+            if os.path.exists(self.log_path(file_id)):
+                os.remove(self.log_path(file_id))
+            self._states.pop(file_id, None)
+            self.locks.remove(file_id)
+        with self._catalog_lock:
+            if self._read_catalog().pop(file_id, None) is not None:
+                self._write_catalog()
+        return True
+
+    def load(self, file_id):
+        """
+        Return the current contents of an event file, or None if it does not exist.
+
+        The returned dict is shared with the store's cache and must be treated
+        as read-only.
+        """
+        try:
+            # Under the thread lock the state is replayed with, as ``data`` is rebuilt on demand
+            with self.locks.local(file_id):
+                return self._refresh(file_id).data
+        except FileNotFoundError:
+            return None
+
+    def version(self, file_id):
+        return tuple(self._signature(file_id))
+
+    def find_events(self, file_id, start_date=None, end_date=None, name=None, location=None):
+        data = self.load(file_id)
+        if data is None:
+            return []
+        return [event for event in data.get('events', [])
+                if event_matches(event, start_date, end_date, name, location)]
+
+    def get_event(self, file_id, event_id):
+        try:
+            with self.locks.local(file_id):
+                return self._refresh(file_id).get(event_id)
+        except FileNotFoundError:
+            return None
+
+    def add_event(self, file_id, event):
+        """Assign the next event id, append the event to the log and return it."""
+        with self.locked(file_id):
+            state = self._refresh(file_id)
+            event = {'id': f"event_{state.next_event}", **event}
+            self._append(file_id, {'op': 'add', 'at': timestamp(), 'event': event})
+        return event
+
+    def add_events(self, file_id, events):
+        """
+        Assign ids to the events and write them with the file's pending log as a new snapshot.
+
+        A bulk import is written once, with an atomic replace, instead of as
+        one log entry per event; the log is folded in as in ``compact``.
+        """
+        with self.locked(file_id):
+            state = self._refresh(file_id)
+            events = [{'id': f"event_{state.next_event + offset}", **event} for offset, event in enumerate(events)]
+            data = {**state.data, 'events': state.data.get('events', []) + events, 'last_modified': timestamp()}
+            self._write_snapshot(file_id, data)
+            # As in compact, replaying the removed log on top of the new snapshot would be harmless
+            if os.path.exists(self.log_path(file_id)):
+                os.remove(self.log_path(file_id))
+            self._states[file_id] = _LogState(_file_id(self.snapshot_path(file_id)), data)
+            self._update_catalog(file_id)
+        return events
+
+    def update_event(self, file_id, event_id, changes, expected_modified=None):
+        """Log a partial update that replaces the given fields of an event."""
+        with self.locked(file_id):
+            self.check_modified(file_id, event_id, expected_modified)
+            self._append(file_id, {'op': 'update', 'at': timestamp(), 'event_id': event_id, 'changes': changes})
+
+    def delete_event(self, file_id, event_id, expected_modified=None):
+        """Log the removal of an event."""
+        with self.locked(file_id):
+            self.check_modified(file_id, event_id, expected_modified)
+            self._append(file_id, {'op': 'delete', 'at': timestamp(), 'event_id': event_id})
+
+    def compact(self, file_id):
+        """Fold the operation log into the snapshot and remove the log."""
+        with self.locked(file_id):
+            state = self._refresh(file_id)
+            self._write_snapshot(file_id, state.data)
+            # Replaying an operation twice is harmless (see _apply), so a crash
+            # between these two steps only leaves redundant log entries behind.
+            if os.path.exists(self.log_path(file_id)):
+                os.remove(self.log_path(file_id))
+            # Updated in place, keeping next_event past ids of events deleted before
+            state.reset(state.data)
+            state.snapshot_id = _file_id(self.snapshot_path(file_id))
+            state.log_id = None
+            state.log_offset = 0
+            state.log_ops = 0
+            self._update_catalog(file_id)
+
+    def _append(self, file_id, op):
+        """Append an operation to the log (starting a new generation if there is none); called with the file's lock held."""
+        with open(self.log_path(file_id), 'a') as f:
+            if f.tell() == 0:
+                f.write(json.dumps({'op': 'begin', 'log': uuid.uuid4().hex}) + '\n')
+            f.write(json.dumps(op) + '\n')
+        state = self._refresh(file_id)
+        if state.log_ops >= self.compact_every:
+            self.compact(file_id)
+        else:
+            self._update_catalog(file_id)
+
+    def _refresh(self, file_id):
+        """
+        Bring the cached state up to date with the snapshot and the log tail.
+
+        The log is opened before the snapshot is read: a compaction in
+        between folds that log into the snapshot, and replaying it again is
+        harmless, while the other order could pair an old snapshot with a
+        new log. Raises FileNotFoundError if the file does not exist.
+        """
+        with self.locks.local(file_id):
+            try:
+                log = open(self.log_path(file_id), 'r', encoding='utf-8')
+            except FileNotFoundError:
+                log = None
+            with log or nullcontext(), open(self.snapshot_path(file_id), 'r') as snapshot:
+                snapshot_id = _file_id(snapshot.fileno())
+                log_size = os.fstat(log.fileno()).st_size if log else 0
+                log_id = _log_generation(log.readline()) if log else None
+
+                state = self._states.get(file_id)
+                if (state is None or state.snapshot_id != snapshot_id or log_size < state.log_offset
+                        or (state.log_offset and state.log_id != log_id)):
+                    state = _LogState(snapshot_id, json.load(snapshot))
+                    self._states[file_id] = state
+
+                if log_size > state.log_offset:
+                    state.log_id = log_id
+                    log.seek(state.log_offset)
+                    for line in log:
+                        if not line.endswith('\n'):
+                            break
+                        op = json.loads(line)
+                        if op['op'] != 'begin':
+                            state.apply(op)
+                            state.log_ops += 1
+                        state.log_offset += len(line.encode('utf-8'))
+            return state
+
+    def _signature(self, file_id):
+        """mtime and size of the snapshot and log; changes whenever either file does."""
+        signature = []
+        for path in (self.snapshot_path(file_id), self.log_path(file_id)):
+            try:
+                stat = os.stat(path)
+                signature += [stat.st_mtime_ns, stat.st_size]
+            except FileNotFoundError:
+                signature += [0, 0]
+        return signature
+
+    def _read_catalog(self):
+        """The catalog dict; use it while holding ``_catalog_lock``."""
+        if self._catalog is None:
+            try:
+                with open(os.path.join(self.data_dir, CATALOG_FILENAME), 'r') as f:
+                    self._catalog = json.load(f)
+            except (FileNotFoundError, ValueError):
+                self._catalog = {}
+        return self._catalog
+
+    def _update_catalog(self, file_id):
+        """Refresh one catalog entry from the (cached) file contents."""
+        # Take the signature first so a concurrent change is caught on the next listing
+        signature = self._signature(file_id)
+        state = self._refresh(file_id)
+        with self._catalog_lock:
+            self._read_catalog()[file_id] = {
+                'signature': signature,
+                'file': {
+                    'id': file_id,
+                    'name': state.meta.get('name', f"{file_id}.json"),
+                    'event_count': state.count,
+                    'created_date': state.meta.get('created_date', ''),
+                    'last_modified': state.meta.get('last_modified', '')
+                }
+            }
+            self._catalog_dirty = True
+
+    def _write_catalog(self):
+        os.makedirs(self.data_dir, exist_ok=True)
+        # Processes may overwrite each other's catalog; entries are checked against signatures anyway
+        _write_json(os.path.join(self.data_dir, CATALOG_FILENAME), self._catalog)
+        self._catalog_dirty = False
+
+    def _write_snapshot(self, file_id, file_data):
+        _write_json(self.snapshot_path(file_id), file_data, indent=2)
+
+
+def _file_id(path_or_fd):
+    """Inode, mtime and size of a file: changes whenever the file is replaced or written."""
+    stat = os.stat(path_or_fd)
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def _log_generation(first_line):
+    """The generation named by a log's first line (None for logs written before generations)."""
+    try:
+        op = json.loads(first_line)
+    except ValueError:
+        return None
+    return op.get('log') if op.get('op') == 'begin' else None
+
+
+def _write_json(path, data, **kwargs):
+    """Write JSON to a temporary file unique to this thread and rename it over ``path``."""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, **kwargs)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+# Nested event sections stored in their own tables: column -> (section key, field key)
+SECTION_TABLES = {
+    'attendance': ('attendance', [
+        ('ya_start_year', 'yearRanges', 'yaStartYear'),
+        ('ya_end_year', 'yearRanges', 'yaEndYear'),
+        ('alumni_cutoff_year', 'yearRanges', 'alumniCutoffYear'),
+        ('ya_registered', 'alumni', 'yaRegistered'),
+        ('alumni_registered', 'alumni', 'alumniRegistered'),
+        ('total_alumni_attended', 'alumni', 'totalAlumniAttended'),
+        ('students', 'other', 'students'),
+        ('friends_family', 'other', 'friendsFamily'),
+        ('staff_faculty', 'other', 'staffFaculty'),
+        ('total_alumni_guests', 'totals', 'totalAlumniGuests'),
+        ('percent_ya_attendees', 'totals', 'percentYAAttendees'),
+        ('percent_non_ya_attendees', 'totals', 'percentNonYAAttendees'),
+    ]),
+    'first_time_attendees': ('first_time_attendees', [
+        ('alumni', None, 'alumni'),
+        ('parents', None, 'parents'),
+        ('friends', None, 'friends'),
+    ]),
+    'feedback': ('feedback', [
+        ('rating5', None, 'rating5'),
+        ('rating4', None, 'rating4'),
+        ('rating3', None, 'rating3'),
+        ('rating2', None, 'rating2'),
+        ('rating1', None, 'rating1'),
+        ('total', None, 'total'),
+    ]),
+}
+
+EVENT_COLUMNS = ['date', 'name', 'location', 'description', 'created_date', 'last_modified',
+                 'income', 'expenses', 'underwritten', 'profit_loss']
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    created_date TEXT,
+    last_modified TEXT,
+    next_event INTEGER NOT NULL DEFAULT 1,
+    revision INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    file_id TEXT NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    id TEXT NOT NULL,
+    date TEXT,
+    name TEXT,
+    location TEXT,
+    description TEXT,
+    created_date TEXT,
+    last_modified TEXT,
+    income REAL,
+    expenses REAL,
+    underwritten REAL,
+    profit_loss REAL,
+    extra TEXT,
+    UNIQUE (file_id, id)
+);
+CREATE INDEX IF NOT EXISTS idx_events_file_date ON events(file_id, date);
+CREATE INDEX IF NOT EXISTS idx_events_name ON events(name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_events_location ON events(location COLLATE NOCASE);
+""" + "".join(f"""
+CREATE TABLE IF NOT EXISTS {table} (
+    event_seq INTEGER PRIMARY KEY REFERENCES events(seq) ON DELETE CASCADE,
+    {', '.join(column for column, _, _ in columns)},
+    extra TEXT
+);
+""" for table, (_, columns) in SECTION_TABLES.items())
+
+
+class SqliteEventStore(EventStore):
+    """
+    Event files stored in one SQLite database with normalized tables.
+
+    Events live in ``events`` (indexed on file, date, name and location) and
+    their attendance, first-time attendee and feedback sections in tables of
+    their own, so listing and filtering run as indexed queries instead of
+    parsing every JSON file. Keys the schema does not know about are kept in
+    ``extra`` JSON columns so that ``load`` returns what was stored.
+
+    Each write is one transaction; the file locks additionally serialize
+    the read-check-write sequences (``expected_modified``, next event ids)
+    of concurrent processes.
+    """
+
+    def __init__(self, db_path=os.path.join('event_data', 'events.sqlite3')):
+        self.db_path = db_path
+        self.locks = FileLocks(os.path.join(os.path.dirname(db_path) or '.', LOCK_DIRNAME))
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SQLITE_SCHEMA)
+
+    def _connect(self):
+        if getattr(self._local, 'pid', os.getpid()) != os.getpid():
+            # Forked into a server worker: never share the parent's connections
+            self._local = threading.local()
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA foreign_keys = ON')
+            conn.execute('PRAGMA journal_mode = WAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def exists(self, file_id):
+        return self._connect().execute('SELECT 1 FROM files WHERE id = ?', (file_id,)).fetchone() is not None
+
+    def file_ids(self):
+        return [row['id'] for row in self._connect().execute('SELECT id FROM files ORDER BY id')]
+
+    def list_files(self):
+        rows = self._connect().execute("""
+            SELECT f.id, f.name, f.created_date, f.last_modified, COUNT(e.seq) AS event_count
+            FROM files f LEFT JOIN events e ON e.file_id = f.id
+            GROUP BY f.id ORDER BY f.id
+        """)
+        return [{
+            'id': row['id'],
+            'name': row['name'],
+            'event_count': row['event_count'],
+            'created_date': row['created_date'] or '',
+            'last_modified': row['last_modified'] or ''
+        } for row in rows]
+
+    def create_file(self, file_id, name, events=()):
+        now = timestamp()
+        events = [{'id': f"event_{number}", **event} for number, event in enumerate(events, start=1)]
+        try:
+            with self.locked(file_id), self._connect() as conn:
+                conn.execute('INSERT INTO files (id, name, created_date, last_modified, next_event) '
+                             'VALUES (?, ?, ?, ?, ?)', (file_id, name, now, now, len(events) + 1))
+                for event in events:
+                    self._insert_event(conn, file_id, event)
+        except sqlite3.IntegrityError:
+            raise FileExistsError(f"Event file already exists: {file_id}")
+        return {'id': file_id, 'name': name, 'created_date': now, 'last_modified': now, 'events': events}
+
+    def import_file(self, file_data):
+        """Insert a complete event file (e.g. a JSON snapshot), replacing any file with the same id."""
+        with self.locked(file_data['id']), self._connect() as conn:
+            previous = conn.execute('SELECT revision FROM files WHERE id = ?', (file_data['id'],)).fetchone()
+            conn.execute('DELETE FROM files WHERE id = ?', (file_data['id'],))
+            events = file_data.get('events', [])
+            next_event = max((event_number(e.get('id')) for e in events), default=0) + 1
+            conn.execute('INSERT INTO files (id, name, created_date, last_modified, next_event, revision) '
+                         'VALUES (?, ?, ?, ?, ?, ?)',
+                         (file_data['id'], file_data.get('name'), file_data.get('created_date'),
+                          file_data.get('last_modified'), next_event, previous[0] + 1 if previous else 0))
+            for event in events:
+                self._insert_event(conn, file_data['id'], event)
+
+    def delete_file(self, file_id):
+        with self.locked(file_id):
+            with self._connect() as conn:
+                deleted = conn.execute('DELETE FROM files WHERE id = ?', (file_id,)).rowcount > 0
+            self.locks.remove(file_id)
+        return deleted
+
+    def load(self, file_id):
+        conn = self._connect()
+        row = conn.execute('SELECT * FROM files WHERE id = ?', (file_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            'id': row['id'],
+            'name': row['name'],
+            'created_date': row['created_date'],
+            'last_modified': row['last_modified'],
+            'events': self._select_events(conn, 'e.file_id = ?', [file_id])
+        }
+
+    def version(self, file_id):
+        row = self._connect().execute('SELECT revision FROM files WHERE id = ?', (file_id,)).fetchone()
+        return None if row is None else row[0]
+
+    def find_events(self, file_id, start_date=None, end_date=None, name=None, location=None):
+        conditions, params = ['e.file_id = ?'], [file_id]
+        if start_date:
+            conditions.append('e.date >= ?')
+            params.append(start_date)
+        if end_date:
+            conditions.append('e.date <= ?')
+            params.append(end_date)
+        if name:
+            conditions.append("e.name LIKE ? ESCAPE '\\'")
+            params.append(f"%{_escape_like(name)}%")
+        if location:
+            conditions.append("e.location LIKE ? ESCAPE '\\'")
+            params.append(f"%{_escape_like(location)}%")
+        return self._select_events(self._connect(), ' AND '.join(conditions), params)
+
+    def get_event(self, file_id, event_id):
+        events = self._select_events(self._connect(), 'e.file_id = ? AND e.id = ?', [file_id, event_id])
+        return events[0] if events else None
+
+    def add_event(self, file_id, event):
+        with self.locked(file_id), self._connect() as conn:
+            next_event = conn.execute('SELECT next_event FROM files WHERE id = ?', (file_id,)).fetchone()[0]
+            event = {'id': f"event_{next_event}", **event}
+            self._insert_event(conn, file_id, event)
+            conn.execute('UPDATE files SET next_event = ?, last_modified = ?, revision = revision + 1 WHERE id = ?',
+                         (next_event + 1, timestamp(), file_id))
+        return event
+
+    def add_events(self, file_id, events):
+        with self.locked(file_id), self._connect() as conn:
+            next_event = conn.execute('SELECT next_event FROM files WHERE id = ?', (file_id,)).fetchone()[0]
+            events = [{'id': f"event_{next_event + offset}", **event} for offset, event in enumerate(events)]
+            for event in events:
+                self._insert_event(conn, file_id, event)
+            conn.execute('UPDATE files SET next_event = ?, last_modified = ?, revision = revision + 1 WHERE id = ?',
+                         (next_event + len(events), timestamp(), file_id))
+        return events
+
+    def update_event(self, file_id, event_id, changes, expected_modified=None):
+        with self.locked(file_id), self._connect() as conn:
+            self.check_modified(file_id, event_id, expected_modified)
+            events = self._select_events(conn, 'e.file_id = ? AND e.id = ?', [file_id, event_id])
+            if events:
+                event = {**events[0], **changes}
+                seq = conn.execute('SELECT seq FROM events WHERE file_id = ? AND id = ?',
+                                   (file_id, event_id)).fetchone()[0]
+                # Section rows go with the old event row through ON DELETE CASCADE
+                conn.execute('DELETE FROM events WHERE seq = ?', (seq,))
+                self._insert_event(conn, file_id, event, seq=seq)
+            conn.execute('UPDATE files SET last_modified = ?, revision = revision + 1 WHERE id = ?',
+                         (timestamp(), file_id))
+
+    def delete_event(self, file_id, event_id, expected_modified=None):
+        with self.locked(file_id), self._connect() as conn:
+            self.check_modified(file_id, event_id, expected_modified)
+            conn.execute('DELETE FROM events WHERE file_id = ? AND id = ?', (file_id, event_id))
+            conn.execute('UPDATE files SET last_modified = ?, revision = revision + 1 WHERE id = ?',
+                         (timestamp(), file_id))
+
+    def _insert_event(self, conn, file_id, event, seq=None):
+        known = {'id', *EVENT_COLUMNS, *(section for section, _ in SECTION_TABLES.values())}
+        extra = {key: value for key, value in event.items() if key not in known}
+        cursor = conn.execute(
+            f"INSERT INTO events (seq, file_id, id, {', '.join(EVENT_COLUMNS)}, extra) "
+            f"VALUES (?, ?, ?, {', '.join('?' * len(EVENT_COLUMNS))}, ?)",
+            [seq, file_id, event['id'], *(event.get(column) for column in EVENT_COLUMNS),
+             json.dumps(extra) if extra else None])
+        event_seq = cursor.lastrowid
+        for table, (section, columns) in SECTION_TABLES.items():
+            if not isinstance(event.get(section), dict):
+                continue
+            values, leftover = _split_section(event[section], columns)
+            conn.execute(
+                f"INSERT INTO {table} (event_seq, {', '.join(c for c, _, _ in columns)}, extra) "
+                f"VALUES (?, {', '.join('?' * len(columns))}, ?)",
+                [event_seq, *values, json.dumps(leftover) if leftover else None])
+
+    def _select_events(self, conn, where, params):
+        """Rebuild the nested event dicts for the events matching ``where``."""
+        events = {}
+        for row in conn.execute(f'SELECT * FROM events e WHERE {where} ORDER BY e.seq', params):
+            event = {'id': row['id']}
+            for column in EVENT_COLUMNS:
+                if row[column] is not None:
+                    event[column] = row[column]
+            if row['extra']:
+                event.update(json.loads(row['extra']))
+            events[row['seq']] = event
+
+        for table, (section, columns) in SECTION_TABLES.items():
+            query = f'SELECT s.* FROM {table} s JOIN events e ON e.seq = s.event_seq WHERE {where}'
+            for row in conn.execute(query, params):
+                if row['event_seq'] in events:
+                    events[row['event_seq']][section] = _join_section(row, columns)
+        return list(events.values())
+
+
+def _escape_like(text):
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _split_section(section, columns):
+    """Split a nested section dict into column values and the keys the schema does not cover."""
+    leftover = copy.deepcopy(section)
+    values = []
+    for _, group, key in columns:
+        container = leftover.get(group) if group else leftover
+        values.append(container.pop(key, None) if isinstance(container, dict) else None)
+        if group and container == {}:
+            leftover.pop(group)
+    return values, leftover
+
+
+def _join_section(row, columns):
+    """Inverse of ``_split_section`` for one table row."""
+    section = json.loads(row['extra']) if row['extra'] else {}
+    for column, group, key in columns:
+        if row[column] is None:
+            continue
+        if group:
+            section.setdefault(group, {})[key] = row[column]
+        else:
+            section[key] = row[column]
+    return section
+
+
+def create_event_store(kind='json', data_dir='event_data'):
+    """Build the storage backend selected with ``--storage`` / ``OWU_STORAGE``."""
+    if kind == 'json':
+        return JsonEventStore(data_dir)
+    if kind == 'sqlite':
+        return SqliteEventStore(os.path.join(data_dir, 'events.sqlite3'))
+    raise ValueError(f"Unknown storage backend: {kind} (expected 'json' or 'sqlite')")
+
+
+def main():
+    """Maintenance commands for the event file stores."""
+    parser = argparse.ArgumentParser(description='Maintain the OWU event data stores')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    compact_parser = subparsers.add_parser('compact', help='fold JSON operation logs into their snapshots')
+    compact_parser.add_argument('file_ids', nargs='*', help='files to compact (default: all)')
+    subparsers.add_parser('to-sqlite', help='copy every JSON event file into the SQLite database')
+    args = parser.parse_args()
+
+    json_store = JsonEventStore()
+    if args.command == 'compact':
+        for file_id in args.file_ids or json_store.file_ids():
+            if not json_store.exists(file_id):
+                print(f"❌ File not found: {file_id}")
+                continue
+            json_store.compact(file_id)
+            print(f"✅ Compacted {file_id}")
+    elif args.command == 'to-sqlite':
+        sqlite_store = SqliteEventStore()
+        for file_id in json_store.file_ids():
+            sqlite_store.import_file(json_store.load(file_id))
+            print(f"✅ Copied {file_id} into {sqlite_store.db_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,29 @@
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 import numpy as np
 import os
 from pathlib import Path
 
+# Set once matplotlib has been imported and styled
+_styled = False
+
+def pyplot():
+    """matplotlib.pyplot with the chart style applied, imported on the first chart rather than at startup."""
+    global _styled
+    import matplotlib.pyplot as plt
+    if not _styled:
+        import seaborn as sns
+        plt.style.use('default')
+        sns.set_palette("husl")
+        _styled = True
+    return plt
+
+
 class ExcelVisualizer:
     def __init__(self):
         """Initialize the Excel Visualizer with default settings."""
         self.data = None
         self.file_path = None
         
-        # Set style for matplotlib
-        plt.style.use('default')
-        sns.set_palette("husl")
-        
     def read_excel(self, file_path):
         """
         Read an Excel file and load the data.
@@ -57,6 +63,7 @@ class ExcelVisualizer:
             print("No data loaded. Please read an Excel file first.")
             return
         
+        plt = pyplot()
         plt.figure(figsize=figsize)
         plt.bar(self.data[x_column], self.data[y_column])
         plt.title(title)
@@ -72,6 +79,7 @@ class ExcelVisualizer:
             print("No data loaded. Please read an Excel file first.")
             return
         
+        plt = pyplot()
         plt.figure(figsize=figsize)
         plt.plot(self.data[x_column], self.data[y_column], marker='o')
         plt.title(title)
@@ -88,6 +96,7 @@ class ExcelVisualizer:
             print("No data loaded. Please read an Excel file first.")
             return
         
+        plt = pyplot()
         plt.figure(figsize=figsize)
         plt.scatter(self.data[x_column], self.data[y_column], alpha=0.6)
         plt.title(title)
@@ -103,6 +112,7 @@ class ExcelVisualizer:
             print("No data loaded. Please read an Excel file first.")
             return
         
+        plt = pyplot()
         plt.figure(figsize=figsize)
         plt.hist(self.data[column].dropna(), bins=bins, alpha=0.7, edgecolor='black')
         plt.title(title)
@@ -118,6 +128,7 @@ class ExcelVisualizer:
             print("No data loaded. Please read an Excel file first.")
             return
         
+        plt = pyplot()
         value_counts = self.data[column].value_counts()
         
         plt.figure(figsize=figsize)
@@ -132,6 +143,8 @@ class ExcelVisualizer:
             print("No data loaded. Please read an Excel file first.")
             return
         
+        plt = pyplot()
+        import seaborn as sns
         numeric_data = self.data.select_dtypes(include=[np.number])
         if numeric_data.empty:
             print("No numeric columns found for correlation analysis.")
@@ -152,6 +165,7 @@ class ExcelVisualizer:
             print("No data loaded. Please read an Excel file first.")
             return
         
+        plt = pyplot()
         plt.figure(figsize=figsize)
         if by_column:
             self.data.boxplot(column=column, by=by_column)
@@ -168,6 +182,7 @@ class ExcelVisualizer:
             print("No data loaded. Please read an Excel file first.")
             return
         
+        import plotly.express as px
         if chart_type == 'scatter':
             fig = px.scatter(self.data, **kwargs)
         elif chart_type == 'line':
@@ -190,6 +205,7 @@ class ExcelVisualizer:
             print("No data loaded. Please read an Excel file first.")
             return
         
+        plt = pyplot()
         if numeric_columns is None:
             numeric_columns = list(self.data.select_dtypes(include=[np.number]).columns)
         if categorical_columns is None:
@@ -231,6 +247,7 @@ class ExcelVisualizer:
     
     def save_chart(self, filename="chart.png", dpi=300):
         """Save the current matplotlib figure."""
+        plt = pyplot()
         plt.savefig(filename, dpi=dpi, bbox_inches='tight')
         print(f"Chart saved as {filename}")
     
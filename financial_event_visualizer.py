@@ -5,24 +5,30 @@ Specialized for income/expense snapshots across multiple events
 """
 
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 import numpy as np
 from pathlib import Path
 
+# Set once matplotlib has been imported and styled
+_styled = False
+
+def pyplot():
+    """Import matplotlib (and seaborn's palette) when the first chart is drawn; reports don't need them."""
+    global _styled
+    import matplotlib.pyplot as plt
+    if not _styled:
+        import seaborn as sns
+        plt.style.use('default')
+        sns.set_palette("husl")
+        _styled = True
+    return plt
+
+
 class FinancialEventVisualizer:
     def __init__(self):
         """Initialize the Financial Event Visualizer."""
         self.data = None
         self.file_path = None
         
-        # Set style for matplotlib
-        plt.style.use('default')
-        sns.set_palette("husl")
-        
         # Financial color scheme
         self.colors = {
             'income': '#2E8B57',      # Sea Green
@@ -87,6 +93,7 @@ class FinancialEventVisualizer:
             print("No data loaded. Please read an Excel file first.")
             return
         
+        plt = pyplot()
         plt.figure(figsize=figsize)
         
         # Create profit/loss bars
@@ -120,6 +127,7 @@ class FinancialEventVisualizer:
             print("No data loaded. Please read an Excel file first.")
             return
         
+        plt = pyplot()
         x = np.arange(len(self.data))
         width = 0.35
         
@@ -156,6 +164,8 @@ class FinancialEventVisualizer:
             print("No data loaded. Please read an Excel file first.")
             return
         
+        plt = pyplot()
+        
         # Filter events with underwriting
         underwritten_events = self.data[self.data['Underwritten'] > 0]
         
@@ -190,6 +200,7 @@ class FinancialEventVisualizer:
             print("No data loaded. Please read an Excel file first.")
             return
         
+        plt = pyplot()
         fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=figsize)
         fig.suptitle('Financial Events Dashboard', fontsize=18, fontweight='bold')
         
@@ -263,6 +274,8 @@ class FinancialEventVisualizer:
             print("No data loaded. Please read an Excel file first.")
             return
         
+        import plotly.express as px
+        
         # Create interactive scatter plot
         fig = px.scatter(self.data, 
                         x='All Incurred Expenses', 
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Season Index
+A consolidated table of the events in every managed event file, for queries and
+trends across seasons without re-reading each file per request
+"""
+
+import os
+import pickle
+import threading
+
+from event_frames import flatten_file
+from event_snapshots import library_versions
+
+SEASON_INDEX_DIRNAME = '.season_index'
+
+# Bump when the indexed columns change, so an old persisted index is rebuilt
+SEASON_INDEX_FORMAT = 2
+
+# Ways /api/seasons can group events
+GROUP_BY = ('month', 'year', 'series', 'file')
+
+# Summed per group: output name -> flattened columns added together
+SEASON_METRICS = {
+    'income': ['Event Income'],
+    'expenses': ['All Incurred Expenses'],
+    'underwritten': ['Underwritten'],
+    'profit_loss': ['Profit/Loss'],
+    'attendance': ['Total Alumni/Guests'],
+    'first_time': ['1st Time Alumni', '1st Time Parents', '1st Time Friends'],
+    'ratings': ['Total Ratings'],
+}
+
+# The part of an event name after ' - ' (or a leading date) varies between events of a series:
+# '9/11/2024 OWU Near You - Toledo' and 'OWU Near You- Atlanta' are both 'OWU Near You'
+_LEADING_DATE = r'^\s*\d{1,2}/\d{1,2}(?:/\d{2,4})?\s+'
+_SERIES_SEPARATOR = r'\s+-\s*|\s*-\s+'
+
+
+def event_series(names):
+    """The series of each event name (e.g. 'OWU Near You' for 'OWU Near You - Denver')."""
+    names = names.fillna('').astype(str).str.replace(_LEADING_DATE, '', regex=True)
+    series = names.str.split(_SERIES_SEPARATOR, n=1, regex=True).str[0].str.strip()
+    return series.where(series != '', 'Unnamed Event')
+
+
+def index_file(file_id, file_data):
+    """Flatten one event file into the index columns: keys, text filters and the season metrics."""
+    import numpy as np
+    import pandas as pd
+
+    df = flatten_file(file_data)
+    rows = len(df)
+    text = {column: (df[column].fillna('').astype(str) if column in df.columns else pd.Series([''] * rows))
+            for column in ('Date', 'Event Name', 'Location')}
+    table = pd.DataFrame({
+        'file_id': file_id,
+        'date': text['Date'].to_numpy(),
+        'when': pd.to_datetime(text['Date'], errors='coerce', format='%Y-%m-%d').to_numpy(),
+        'name': text['Event Name'].to_numpy(),
+        'location': text['Location'].to_numpy(),
+        'series': event_series(text['Event Name']).to_numpy(),
+    }, index=pd.RangeIndex(rows))
+    for metric, columns in SEASON_METRICS.items():
+        total = np.zeros(rows)
+        for column in columns:
+            if column in df.columns:
+                total += pd.to_numeric(df[column], errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+        table[metric] = total
+    return table
+
+
+class SeasonIndex:
+    """
+    Per-file index tables of an EventStore, combined into one frame.
+
+    Each file's table is kept with the store's version token for that file;
+    a query only re-reads files whose version changed (or that are new) and
+    reuses the combined frame when nothing changed. Every table is persisted
+    on its own under ``directory``, so a write to one file re-pickles only
+    that file's table and a restart does not re-read every file either. The
+    tables are read back on the first query, not when the index is created,
+    and only if they were pickled with the same pandas and NumPy versions.
+    """
+
+    def __init__(self, store, directory=None):
+        self.store = store
+        self.directory = directory
+        self._files = None
+        self._combined = None
+        self._lock = threading.Lock()
+
+    def path(self, file_id):
+        return os.path.join(self.directory, f"{file_id}.pickle")
+
+    def _load(self):
+        self._files = {}
+        if not self.directory or not os.path.isdir(self.directory):
+            return
+        for filename in os.listdir(self.directory):
+            if not filename.endswith('.pickle'):
+                continue
+            try:
+                with open(os.path.join(self.directory, filename), 'rb') as f:
+                    saved = pickle.load(f)
+                if saved.get('format') == SEASON_INDEX_FORMAT and saved.get('libraries') == library_versions():
+                    self._files[saved['file_id']] = (saved['version'], saved['table'])
+            except Exception:
+                # Unreadable table: rebuilt from its event file
+                continue
+
+    def _save(self, file_id):
+        if not self.directory:
+            return
+        if os.path.isfile(self.directory):
+            # The single-pickle index of format 1
+            os.remove(self.directory)
+        os.makedirs(self.directory, exist_ok=True)
+        version, table = self._files[file_id]
+        path = self.path(file_id)
+        # Worker processes may save at the same time; each renames its own complete copy into place
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump({'format': SEASON_INDEX_FORMAT, 'libraries': library_versions(),
+                             'file_id': file_id, 'version': version, 'table': table}, f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _discard(self, file_id):
+        if not self.directory:
+            return
+        try:
+            os.remove(self.path(file_id))
+        except (FileNotFoundError, NotADirectoryError):
+            pass
+
+    def frame(self):
+        """Return the combined index of every file, refreshing files that changed."""
+        import pandas as pd
+
+        with self._lock:
+            if self._files is None:
+                self._load()
+            versions = {file_id: self.store.version(file_id) for file_id in self.store.file_ids()}
+            changed = False
+            for file_id in set(self._files) - set(versions):
+                del self._files[file_id]
+                self._discard(file_id)
+                changed = True
+            for file_id, version in versions.items():
+                entry = self._files.get(file_id)
+                if entry is not None and entry[0] == version:
+                    continue
+                # The version is read before the file, so a write in between is picked up next time
+                file_data = self.store.load(file_id)
+                if file_data is None:
+                    continue
+                self._files[file_id] = (version, index_file(file_id, file_data))
+                self._save(file_id)
+                changed = True
+
+            if changed:
+                self._combined = None
+            if self._combined is None:
+                tables = [table for _, table in self._files.values()]
+                self._combined = (pd.concat(tables, ignore_index=True) if tables
+                                  else index_file('', {'events': []}))
+            return self._combined
+
+    def query(self, start_date=None, end_date=None, name=None, location=None, file_ids=None, group_by='month'):
+        """
+        Aggregate the season metrics of matching events across files.
+
+        Filters work like ``EventStore.find_events`` (date range on the
+        'YYYY-MM-DD' strings, case-insensitive substring for name and
+        location), optionally limited to some files. Events are grouped by
+        month, year, event series or file; events without a parseable date
+        fall under 'unknown' for month and year.
+        """
+        if group_by not in GROUP_BY:
+            raise ValueError(f"group_by must be one of: {', '.join(GROUP_BY)}")
+        import numpy as np
+
+        df = self.frame()
+
+        mask = np.ones(len(df), dtype=bool)
+        if start_date:
+            mask &= (df['date'] >= start_date).to_numpy()
+        if end_date:
+            mask &= (df['date'] <= end_date).to_numpy()
+        if name:
+            mask &= df['name'].str.contains(name, case=False, regex=False).to_numpy()
+        if location:
+            mask &= df['location'].str.contains(location, case=False, regex=False).to_numpy()
+        if file_ids:
+            mask &= df['file_id'].isin(file_ids).to_numpy()
+        df = df[mask]
+
+        if group_by == 'month':
+            keys = df['when'].dt.strftime('%Y-%m').fillna('unknown')
+        elif group_by == 'year':
+            keys = df['when'].dt.strftime('%Y').fillna('unknown')
+        else:
+            keys = df['series' if group_by == 'series' else 'file_id']
+
+        metrics = list(SEASON_METRICS)
+        grouped = df.groupby(keys.to_numpy(), sort=True)
+        table = grouped[metrics].sum()
+        table.insert(0, 'files', grouped['file_id'].nunique())
+        table.insert(0, 'events', grouped.size())
+
+        groups = [{'key': str(key), **{column: _json_number(value) for column, value in row.items()}}
+                  for key, row in zip(table.index, table.to_dict('records'))]
+        return {
+            'group_by': group_by,
+            'events': int(len(df)),
+            'files': int(df['file_id'].nunique()),
+            'totals': {metric: _json_number(df[metric].sum()) for metric in metrics},
+            'groups': groups,
+        }
+
+
+def _json_number(value):
+    value = float(value)
+    return int(value) if value.is_integer() else value
@@ -1,23 +1,39 @@
 #!/usr/bin/env python3
 """
 Startup script for the Excel Data Visualizer Web Application
+Runs Flask's development server, or with --production a pre-forking gunicorn
+server with several worker processes
 """
 
+import argparse
+import gc
+import importlib.util
 import os
 import sys
 import webbrowser
 import time
 from pathlib import Path
 
+# Production server defaults: one worker process per core, each serving requests from a few threads
+PRODUCTION_WORKERS = os.cpu_count() or 1
+PRODUCTION_THREADS = 4
+
+# Workers are replaced after this many requests (plus up to the jitter, so they don't all restart at once)
+MAX_REQUESTS = 1000
+MAX_REQUESTS_JITTER = 100
+
+# Seconds a request may run before its worker is restarted, and a stopping worker gets to finish
+WORKER_TIMEOUT = 120
+GRACEFUL_TIMEOUT = 30
+
 def check_dependencies():
     """Check if all required packages are installed."""
     required_packages = ['flask', 'pandas', 'plotly', 'numpy']
     missing_packages = []
     
+    # Only locate the packages; the app imports them when it needs them
     for package in required_packages:
-        try:
-            __import__(package)
-        except ImportError:
+        if importlib.util.find_spec(package) is None:
             missing_packages.append(package)
     
     if missing_packages:
@@ -47,14 +63,19 @@ def check_files():
     print("✅ All required files are present")
     return True
 
-def start_server():
+def start_server(storage='json', warmup=False):
     """Start the Flask server."""
     try:
         print("🚀 Starting Excel Data Visualizer Web Application...")
         print("📁 Working directory:", os.getcwd())
+        print("🗄️  Event storage:", storage)
         
         # Import and run the Flask app
-        from web_visualizer import app
+        from web_visualizer import app, configure_storage, start_warmup
+        configure_storage(storage)
+        if warmup:
+            print("🔥 Warming up the caches in the background (progress: /api/warmup)")
+            start_warmup()
         
         print("🌐 Server will be available at: http://localhost:5001")
         print("📱 You can also access it from other devices on your network")
@@ -84,8 +105,89 @@ def start_server():
     
     return True
 
+def production_options(host, port, workers, threads, max_requests, warmup=False):
+    """gunicorn settings for the production server."""
+    options = {
+        'bind': f"{host}:{port}",
+        'workers': workers,
+        'threads': threads,
+        'worker_class': 'gthread' if threads > 1 else 'sync',
+        # Import the app (pandas, plotly, ...) once in the master; forked workers share those pages
+        'preload_app': True,
+        'max_requests': max_requests,
+        'max_requests_jitter': MAX_REQUESTS_JITTER if max_requests else 0,
+        'timeout': WORKER_TIMEOUT,
+        'graceful_timeout': GRACEFUL_TIMEOUT,
+        # Worker heartbeats on tmpfs where available, so a slow disk can't get workers killed
+        'worker_tmp_dir': '/dev/shm' if os.path.isdir('/dev/shm') else None,
+        'accesslog': '-',
+    }
+    if warmup:
+        # Threads don't survive the fork, so each worker (including recycled ones) warms its own caches
+        from web_visualizer import start_warmup
+        options['post_worker_init'] = lambda worker: start_warmup()
+    return options
+
+def start_production_server(storage='json', host='0.0.0.0', port=5001, workers=PRODUCTION_WORKERS,
+                            threads=PRODUCTION_THREADS, max_requests=MAX_REQUESTS, warmup=False):
+    """Serve the app from pre-forked gunicorn worker processes."""
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        print("❌ Production mode needs gunicorn (Linux/macOS): pip install gunicorn")
+        return False
+    
+    from web_visualizer import app, configure_storage, preload_modules
+    configure_storage(storage)
+    
+    # Import what the routes would load on demand, so every worker shares one copy
+    preload_modules()
+    
+    # Objects created by the imports are never collected, so the GC doesn't
+    # touch (and copy) their pages in every worker
+    gc.freeze()
+    
+    class ProductionServer(BaseApplication):
+        def load_config(self):
+            for key, value in production_options(host, port, workers, threads, max_requests, warmup).items():
+                self.cfg.set(key, value)
+        
+        def load(self):
+            return app
+    
+    print("🚀 Starting Excel Data Visualizer Web Application (production)")
+    print("📁 Working directory:", os.getcwd())
+    print("🗄️  Event storage:", storage)
+    print(f"⚙️  {workers} worker process(es) x {threads} thread(s), recycled every ~{max_requests or '∞'} requests")
+    if warmup:
+        print("🔥 Each worker warms up its caches in the background (progress: /api/warmup)")
+    print(f"🌐 Listening on http://{host}:{port}")
+    print("\n" + "="*50)
+    ProductionServer().run()
+    return True
+
 def main():
     """Main function."""
+    parser = argparse.ArgumentParser(description='Start the Excel Data Visualizer web application')
+    parser.add_argument('--storage', choices=['json', 'sqlite'], default=os.environ.get('OWU_STORAGE', 'json'),
+                        help='backend for the managed event files (default: json)')
+    parser.add_argument('--production', action='store_true',
+                        help='serve with pre-forked gunicorn workers instead of the development server')
+    parser.add_argument('--host', default=os.environ.get('OWU_HOST', '0.0.0.0'),
+                        help='production: address to listen on (default: 0.0.0.0)')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('OWU_PORT', 5001)),
+                        help='production: port to listen on (default: 5001)')
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('OWU_WORKERS', PRODUCTION_WORKERS)),
+                        help=f"production: worker processes (default: one per core, {PRODUCTION_WORKERS})")
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('OWU_THREADS', PRODUCTION_THREADS)),
+                        help=f"production: request threads per worker (default: {PRODUCTION_THREADS})")
+    parser.add_argument('--max-requests', type=int, default=int(os.environ.get('OWU_MAX_REQUESTS', MAX_REQUESTS)),
+                        help=f"production: restart a worker after this many requests, 0 never "
+                             f"(default: {MAX_REQUESTS})")
+    parser.add_argument('--warmup', action='store_true', default=os.environ.get('OWU_WARMUP') == '1',
+                        help='fill the analytics caches of all event files in the background at startup')
+    args = parser.parse_args()
+    
     print("🎯 Excel Data Visualizer Web Application")
     print("="*50)
     
@@ -98,7 +200,12 @@ def main():
         sys.exit(1)
     
     # Start server
-    start_server()
+    if args.production:
+        if not start_production_server(args.storage, args.host, args.port, args.workers, args.threads,
+                                       args.max_requests, args.warmup):
+            sys.exit(1)
+    else:
+        start_server(args.storage, args.warmup)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,29 @@
+"""Shared fixtures: the application modules live at the repository root."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from event_store import JsonEventStore  # noqa: E402
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    return str(tmp_path / 'event_data')
+
+
+@pytest.fixture
+def store(data_dir):
+    return JsonEventStore(data_dir)
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """A test client of the web application, with its event data in a temporary directory."""
+    import web_visualizer
+    monkeypatch.chdir(tmp_path)
+    web_visualizer.configure_storage('json')
+    return web_visualizer.app.test_client()
@@ -0,0 +1,108 @@
+"""Tests for the persisted caches: columnar snapshots and the season index."""
+
+import os
+import pickle
+
+import event_snapshots
+import season_index
+from event_snapshots import ColumnarSnapshots, library_versions, read_snapshot
+from season_index import SEASON_INDEX_FORMAT, SeasonIndex, index_file
+
+
+def add_events(store, file_id, count):
+    store.create_file(file_id, 'Season')
+    for i in range(count):
+        store.add_event(file_id, {'name': f"Event {i}", 'date': '2024-09-01',
+                                  'created_date': '2024-01-01 00:00:00'})
+
+
+def other_libraries():
+    return {'pandas': '0.0', 'numpy': '0.0'}
+
+
+def test_snapshot_of_other_library_versions_is_rebuilt(store, data_dir, monkeypatch):
+    add_events(store, 'season', 2)
+    snapshots = ColumnarSnapshots(store, data_dir + '/.columnar')
+    with monkeypatch.context() as patched:
+        patched.setattr(event_snapshots, 'library_versions', other_libraries)
+        snapshots.frame('season')
+    assert read_snapshot(snapshots.path('season')) is None
+
+    name, df = snapshots.frame('season')
+    assert (name, len(df)) == ('Season', 2)
+    assert read_snapshot(snapshots.path('season'))[0]['libraries'] == event_snapshots.library_versions()
+
+
+def test_snapshot_that_fails_to_unpickle_is_a_miss(store, data_dir, monkeypatch):
+    add_events(store, 'season', 2)
+    snapshots = ColumnarSnapshots(store, data_dir + '/.columnar')
+    snapshots.frame('season')
+
+    def incompatible(*args, **kwargs):
+        raise ModuleNotFoundError("No module named 'pandas.core.internals.old'")
+
+    monkeypatch.setattr(event_snapshots.pickle, 'loads', incompatible)
+    assert read_snapshot(snapshots.path('season')) is None
+    assert len(snapshots.frame('season')[1]) == 2
+
+
+def save_table(index, file_id, libraries, version, table):
+    os.makedirs(index.directory, exist_ok=True)
+    with open(index.path(file_id), 'wb') as f:
+        pickle.dump({'format': SEASON_INDEX_FORMAT, 'libraries': libraries,
+                     'file_id': file_id, 'version': version, 'table': table}, f)
+
+
+def test_season_index_of_other_library_versions_is_rebuilt(store, data_dir):
+    add_events(store, 'season', 2)
+    index = SeasonIndex(store, data_dir + '/.season_index')
+    # A table for the current version, which would be reused if the saved one were trusted
+    empty = index_file('season', {'events': []})
+    save_table(index, 'season', library_versions(), store.version('season'), empty)
+    assert len(SeasonIndex(store, index.directory).frame()) == 0
+
+    save_table(index, 'season', other_libraries(), store.version('season'), empty)
+    assert len(SeasonIndex(store, index.directory).frame()) == 2
+
+
+def test_unloadable_season_table_is_rebuilt(store, data_dir):
+    add_events(store, 'season', 2)
+    index = SeasonIndex(store, data_dir + '/.season_index')
+    os.makedirs(index.directory)
+    with open(index.path('season'), 'wb') as f:
+        # A pickle referring to a module that no longer exists
+        f.write(b'cno_such_module\nTable\n.')
+
+    assert len(index.frame()) == 2
+
+
+def test_season_index_reindexes_and_saves_only_changed_files(store, data_dir, monkeypatch):
+    add_events(store, 'fall', 2)
+    add_events(store, 'spring', 3)
+    directory = data_dir + '/.season_index'
+    assert len(SeasonIndex(store, directory).frame()) == 5
+
+    indexed = []
+    monkeypatch.setattr(season_index, 'index_file',
+                        lambda file_id, file_data: indexed.append(file_id) or index_file(file_id, file_data))
+    store.add_event('fall', {'name': 'Late', 'date': '2024-10-01', 'created_date': '2024-01-01 00:00:00'})
+    store.delete_file('spring')
+
+    # After a restart: tables are read back, the changed file is re-indexed and the deleted one dropped
+    index = SeasonIndex(store, directory)
+    frame = index.frame()
+    assert indexed == ['fall']
+    assert list(frame['file_id']) == ['fall'] * 3
+    assert sorted(os.listdir(directory)) == ['fall.pickle']
+
+    add_events(store, 'spring', 1)
+    assert len(index.frame()) == 4 and indexed == ['fall', 'spring']
+
+
+def test_single_pickle_index_of_the_old_format_is_replaced(store, data_dir):
+    add_events(store, 'season', 2)
+    directory = data_dir + '/.season_index'
+    with open(directory, 'wb') as f:
+        pickle.dump({'format': 1, 'libraries': library_versions(), 'files': {}}, f)
+    assert len(SeasonIndex(store, directory).frame()) == 2
+    assert os.listdir(directory) == ['season.pickle']
@@ -0,0 +1,67 @@
+"""Tests for the chart worker pool: per-chart timeouts and hung builders."""
+
+import os
+import threading
+import time
+
+import pytest
+
+import chart_jobs
+import charts
+from chart_jobs import ChartJobs
+
+
+@pytest.fixture
+def plan(monkeypatch):
+    """Charts whose builders return their JSON directly; set ``plan[:]`` to the (chart_id, build) pairs."""
+    planned = []
+    monkeypatch.setattr(chart_jobs, 'CHART_TIMEOUT', 0.3)
+    monkeypatch.setattr(chart_jobs, 'CHART_WATCH_INTERVAL', 0.02)
+    monkeypatch.setattr(charts, 'plan_charts', lambda df, analysis: list(planned))
+    monkeypatch.setattr(charts, 'figure_json', lambda fig: fig)
+    return planned
+
+
+def slow(seconds, result):
+    def build():
+        time.sleep(seconds)
+        return result
+    return build
+
+
+def test_queued_charts_are_timed_from_when_they_start(plan):
+    # Together the charts take longer than CHART_TIMEOUT, each one does not
+    plan[:] = [(f'chart_{i}', slow(0.2, f'json {i}')) for i in range(3)]
+    chart_set = ChartJobs(workers=1).submit(None, None)
+    assert [chart_set.result(chart_id) for chart_id in chart_set.chart_ids] == ['json 0', 'json 1', 'json 2']
+
+
+def test_hung_chart_times_out_and_frees_its_worker(plan):
+    release = threading.Event()
+
+    def hung():
+        release.wait()
+        return 'late json'
+
+    plan[:] = [('hung', hung), ('next', slow(0, 'next json'))]
+    chart_set = ChartJobs(workers=1).submit(None, None)
+    try:
+        with pytest.raises(TimeoutError):
+            chart_set.result('hung')
+        assert chart_set.result('next') == 'next json'
+    finally:
+        release.set()
+    time.sleep(0.05)
+    with pytest.raises(TimeoutError):
+        chart_set.result('hung')
+
+
+def test_chart_of_a_process_that_stopped_rendering_times_out(tmp_path):
+    set_dir = tmp_path / 'set'
+    set_dir.mkdir()
+    (set_dir / 'charts.json').write_text('["pending"]')
+    stored = chart_jobs.StoredChartSet(str(set_dir))
+    stale = time.time() - chart_jobs.CHART_TIMEOUT - 1
+    os.utime(set_dir / 'charts.json', (stale, stale))
+    with pytest.raises(TimeoutError):
+        stored.result('pending')
@@ -0,0 +1,18 @@
+"""Tests for the upload charts: the plotly.js the page loads and the sampling notice."""
+
+from plotly.offline import get_plotlyjs_version
+
+from charts import SCATTER_MAX_POINTS, sampling_note
+
+
+def test_page_loads_the_plotly_js_of_the_installed_package():
+    import web_visualizer
+    page = web_visualizer.app.test_client().get('/demo').get_data(as_text=True)
+    assert f'https://cdn.plot.ly/plotly-{get_plotlyjs_version()}.min.js' in page
+    assert 'plotly-latest' not in page
+
+
+def test_sampling_note_only_for_files_charted_from_a_sample():
+    assert sampling_note(SCATTER_MAX_POINTS) is None
+    note = sampling_note(SCATTER_MAX_POINTS + 1)
+    assert f'{SCATTER_MAX_POINTS + 1:,} rows' in note and 'sample' in note
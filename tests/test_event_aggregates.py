@@ -0,0 +1,46 @@
+"""Tests for the dashboard rollups and statistics of a flattened event file."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from event_aggregates import event_statistics, feedback_rollup
+
+
+def test_no_best_or_most_reviewed_event_without_ratings():
+    df = pd.DataFrame({'Event Name': ['Golf Outing', 'Reception'], '5-Star Ratings': [0, 0], 'Total Ratings': [0, 0]})
+    rollup = feedback_rollup(df)
+    assert rollup['has_data'] is False
+    assert (rollup['best_rated_event'], rollup['best_rating']) == (None, 0.0)
+    assert (rollup['most_feedback_event'], rollup['most_feedback']) == (None, 0)
+    assert rollup == feedback_rollup(df.iloc[:0])
+
+
+def test_best_and_most_reviewed_events():
+    df = pd.DataFrame({'Event Name': ['Golf Outing', 'Reception', 'Dinner'],
+                       '5-Star Ratings': [1, 0, 2], '1-Star Ratings': [0, 0, 3], 'Total Ratings': [1, 0, 5]})
+    rollup = feedback_rollup(df)
+    assert (rollup['best_rated_event'], rollup['best_rating']) == ('Golf Outing', 5.0)
+    assert (rollup['most_feedback_event'], rollup['most_feedback']) == ('Dinner', 5)
+
+
+def test_statistics_quartiles_fences_and_outliers():
+    income = [100, 200, 300, 400, 500, 600, 700, 800, 5000, -3000]
+    df = pd.DataFrame({'Event Income': income, 'Profit/Loss': [None] * 9 + [50.0]})
+    income_stats = event_statistics(df)['fields']['Event Income']
+    # Linear interpolation, as numpy.percentile's default
+    q1, median, q3 = np.percentile(income, [25, 50, 75])
+    assert (income_stats['q1'], income_stats['median'], income_stats['q3']) == (q1, median, q3)
+    assert (income_stats['min'], income_stats['max']) == (-3000, 5000)
+    # Whiskers end at the furthest values within 1.5 IQR of the quartiles
+    assert (income_stats['lower_fence'], income_stats['upper_fence']) == (100, 800)
+    assert income_stats['outliers'] == 2 and income_stats['outlier_values'] == [5000.0, -3000.0]
+    assert income_stats['variance'] == pytest.approx(np.var(income, ddof=1))
+
+
+def test_statistics_skip_missing_values():
+    df = pd.DataFrame({'Event Income': [100, 200, 300], 'Profit/Loss': [None, 40.0, None]})
+    profit_loss = event_statistics(df)['fields']['Profit/Loss']
+    assert (profit_loss['count'], profit_loss['mean'], profit_loss['median']) == (1, 40.0, 40.0)
+    # A single value has no sample variance
+    assert profit_loss['variance'] is None and profit_loss['outlier_values'] == []
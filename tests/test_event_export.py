@@ -0,0 +1,89 @@
+"""Tests for the export cache: sweeping artifacts of old versions and sending swept artifacts."""
+
+import os
+
+import pytest
+
+import event_export
+from event_export import ExportCache
+
+
+def write(stream):
+    stream.write(b'data')
+
+
+@pytest.fixture
+def versions():
+    return {'season': 1}
+
+
+@pytest.fixture
+def cache(tmp_path, versions):
+    return ExportCache(str(tmp_path / '.exports'), lambda: dict(versions))
+
+
+def artifacts(cache, file_id='season'):
+    return sorted(filename.split('.', 1)[1] for filename in os.listdir(os.path.join(cache.directory, file_id)))
+
+
+def test_new_version_sweeps_every_export_of_the_old_one(cache, versions):
+    for name in ('csv', 'json', 'sections.xlsx'):
+        cache.get('season', 1, name, write).close()
+    versions['season'] = 2
+    cache.get('season', 2, 'csv', write).close()
+    assert artifacts(cache) == ['csv']
+    assert os.path.exists(cache.path('season', cache.etag('season', 2, 'csv'), 'csv'))
+
+
+def test_first_use_sweeps_what_earlier_processes_left(cache, versions):
+    versions['season'] = 2
+    cache.get('season', 2, 'csv', write).close()
+    # Left by a process that exported the old version, or a file deleted since
+    for file_id, etag, name in [('season', cache.etag('season', 1, 'json'), 'json'), ('gone', 'abc', 'csv')]:
+        os.makedirs(os.path.join(cache.directory, file_id), exist_ok=True)
+        with open(cache.path(file_id, etag, name), 'wb') as f:
+            write(f)
+
+    restarted = ExportCache(cache.directory, lambda: dict(versions))
+    restarted.get('season', 2, 'csv', write).close()
+    assert artifacts(restarted) == ['csv']
+    assert not os.path.exists(os.path.join(cache.directory, 'gone'))
+
+
+def test_swept_artifact_being_sent_stays_readable(cache, versions):
+    sending = cache.get('season', 1, 'csv', write)
+    versions['season'] = 2
+    cache.get('season', 2, 'json', write).close()
+    with sending:
+        assert sending.read() == b'data'
+
+
+def test_artifact_that_cannot_be_removed_is_swept_later(cache, versions, monkeypatch):
+    cache.get('season', 1, 'csv', write).close()
+    versions['season'] = 2
+
+    def in_use(path):
+        raise PermissionError(f"The process cannot access the file: {path}")
+
+    with monkeypatch.context() as patched:
+        patched.setattr(event_export.os, 'remove', in_use)
+        cache.get('season', 2, 'json', write).close()
+    assert artifacts(cache) == ['csv', 'json']
+
+    cache.sweep()
+    assert artifacts(cache) == ['json']
+
+
+def test_export_is_conditional_and_supports_ranges(client):
+    import web_visualizer
+    web_visualizer.event_store.create_file('season', 'Season')
+    web_visualizer.event_store.add_event('season', {'name': 'Golf Outing', 'date': '2024-09-01',
+                                                    'created_date': '2024-01-01 00:00:00'})
+    full = client.get('/api/files/season/export?format=csv')
+    assert full.status_code == 200
+    assert full.content_length == len(full.data) and full.last_modified is not None
+
+    assert client.get('/api/files/season/export?format=csv',
+                      headers={'If-None-Match': full.headers['ETag']}).status_code == 304
+    part = client.get('/api/files/season/export?format=csv', headers={'Range': 'bytes=0-3'})
+    assert (part.status_code, part.data) == (206, full.data[:4])
@@ -0,0 +1,159 @@
+"""Tests for spreadsheet imports: the wide OWU template and creating the imported file."""
+
+import io
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+import event_store
+from event_import import parse_event_header, prepare_import, wide_rows
+from event_store import SqliteEventStore
+
+
+def template(categories, events):
+    """A wide template sheet: category labels down the first column, one column of values per event header."""
+    return pd.DataFrame({'Category': list(categories),
+                         **{header: values for header, values in events.items()}})
+
+
+def test_wide_template_is_transposed_into_one_row_per_event():
+    df = template(['Event Income', 'All Incurred Expenses (food, beverage, rental etc.)', 'Underwritten',
+                   'Profit/Loss', 'Location'],
+                  {'07/27/2024 OWU Football Golf Outing': [350, 500, 0, -150, 'Delaware'],
+                   "CXL'd 08/02/2024 OWU Clippers Home Game": [0, 0, 0, 0, 'Columbus'],
+                   'Grand Total': [350, 500, 0, -150, '']})
+    rows, locations = wide_rows(df)
+    assert list(rows['Event Name']) == ['OWU Football Golf Outing', 'OWU Clippers Home Game']
+    assert list(rows['Date']) == ['2024-07-27', '2024-08-02']
+    assert list(rows['Description']) == ['', 'Cancelled']
+    assert list(rows['All Incurred Expenses']) == [500, 0]
+    assert list(rows['Location']) == ['Delaware', 'Columbus']
+    assert locations == [{'column': 'B', 'header': '07/27/2024 OWU Football Golf Outing'},
+                         {'column': 'C', 'header': "CXL'd 08/02/2024 OWU Clippers Home Game"}]
+
+    events, report, ignored = prepare_import(rows, locations)
+    assert report == [] and ignored == []
+    assert [(event['income'], event['expenses'], event['profit_loss']) for event in events] == [
+        (350.0, 500.0, -150.0), (0.0, 0.0, 0.0)]
+
+
+@pytest.mark.parametrize('header, previous, expected', [
+    ('07/27/2024 Golf Outing', None, ('2024-07-27', 'Golf Outing', False)),
+    ('10/4-5/2024 Homecoming', None, ('2024-10-04', 'Homecoming', False)),
+    ('10/3/24 Emerging Leaders', None, ('2024-10-03', 'Emerging Leaders', False)),
+    ("CXL'd June 7 - OWU at the Zoo", '2025-05-01', ('2025-06-07', 'OWU at the Zoo', True)),
+    # The template runs July to June: a month before the previous column's is in the next year
+    ('Jan 20 - MLK Breakfast', '2024-12-05', ('2025-01-20', 'MLK Breakfast', False)),
+    ('March 27,28,29 - Symposium', '2025-02-14', ('2025-03-27', 'Symposium', False)),
+    ('Jan 20 - MLK Breakfast', None, (None, 'MLK Breakfast', False)),
+    ('02/30/2025 Gala', None, (None, 'Gala', False)),
+])
+def test_event_header_dates(header, previous, expected):
+    date, name, cancelled = parse_event_header(header, previous and pd.Timestamp(previous).date())
+    assert (date and date.isoformat(), name, cancelled) == expected
+
+
+def test_category_row_named_after_a_header_column_is_ignored():
+    df = template(['Date', 'Event Income', 'Description'],
+                  {'09/12/2024 OWU Near You - Atlanta': ['Sept 12', 200, 'Rooftop'],
+                   '09/13/2024 OWU Near You - Cincinnati': ['Sept 13', 300, 'Museum']})
+    rows, locations = wide_rows(df)
+    assert list(rows['Date']) == ['2024-09-12', '2024-09-13']
+    assert list(rows['Description']) == ['', '']
+
+    events, report, ignored = prepare_import(rows, locations)
+    assert report == []
+    assert ignored == ['Date (row 2)', 'Description (row 4)']
+    assert [event['income'] for event in events] == [200.0, 300.0]
+
+
+def test_import_creates_the_file_with_its_events(client):
+    import web_visualizer
+    upload = template(['Event Income', 'Underwritten'], {'07/27/2024 Golf Outing': [350, 0],
+                                                         '08/15/2024 Legacy Reception': [0, 100]})
+    response = client.post('/api/files/import', content_type='multipart/form-data', data={
+        'name': 'Season', 'file': (io.BytesIO(upload.to_csv(index=False).encode()), 'season.csv')})
+    assert response.status_code == 200 and response.json['imported'] == 2
+
+    file_data = web_visualizer.event_store.load(response.json['file_id'])
+    assert file_data['name'] == 'Season'
+    assert [event['id'] for event in file_data['events']] == ['event_1', 'event_2']
+    assert web_visualizer.event_store.add_event(file_data['id'], {'name': 'Next'})['id'] == 'event_3'
+
+
+def test_new_files_created_in_the_same_second_get_their_own_ids(store, monkeypatch):
+    class SameSecond(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime(2024, 9, 1, 12, 0, 0)
+
+    monkeypatch.setattr(event_store, 'datetime', SameSecond)
+    first = store.create_new_file('Season', [{'name': 'Golf Outing'}])
+    second = store.create_new_file('Season')
+    assert second['id'] == first['id'] + '_1'
+    assert [event['name'] for event in store.load(first['id'])['events']] == ['Golf Outing']
+    assert store.load(second['id'])['events'] == []
+
+
+def test_failed_create_leaves_no_file(data_dir, monkeypatch):
+    store = SqliteEventStore(data_dir + '/events.sqlite3')
+
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(store, '_insert_event', fail)
+    with pytest.raises(OSError):
+        store.create_file('season', 'Season', [{'name': 'Golf Outing'}])
+    assert not store.exists('season')
+
+
+@pytest.fixture
+def season(client):
+    import web_visualizer
+    web_visualizer.event_store.create_file('season', 'Season')
+    return client
+
+
+BULK_EVENTS = [
+    {'Date': '2024-09-01', 'Event Name': 'Golf Outing', 'Event Income': '$1,200.00'},
+    {'Date': 'someday', 'Event Name': '', 'Event Income': 'lots'},
+    {'Date': '2024-09-15', 'Event Name': 'Reception', 'Students Attended': -2, 'Notes': 'Rain'},
+    {'basic': {'date': '2024-10-01', 'name': 'Homecoming'}, 'incomeExpense': {'income': 500, 'profitLoss': 450}},
+]
+
+
+def test_bulk_import_reports_every_invalid_row_and_writes_nothing(season):
+    import web_visualizer
+    response = season.post('/api/files/season/events/bulk', json=BULK_EVENTS)
+    assert response.status_code == 400 and response.json['imported'] == 0
+    assert response.json['errors'] == [
+        {'row': 2, 'errors': ['Date: not a date', 'Event Name is required', 'Event Income: not a number']},
+        {'row': 3, 'errors': ['Students Attended: must be a whole number of at least 0']},
+    ]
+    assert response.json['ignored_columns'] == ['Notes']
+    assert web_visualizer.event_store.load('season')['events'] == []
+
+
+def test_partial_bulk_import_adds_the_valid_rows_in_one_write(season, monkeypatch):
+    import web_visualizer
+    writes = []
+    add_events = web_visualizer.event_store.add_events
+    monkeypatch.setattr(web_visualizer.event_store, 'add_events',
+                        lambda file_id, events: writes.append(len(events)) or add_events(file_id, events))
+    response = season.post('/api/files/season/events/bulk?partial=true', json={'events': BULK_EVENTS})
+    assert response.status_code == 200
+    assert (response.json['imported'], response.json['event_ids'], writes) == (2, ['event_1', 'event_2'], [2])
+    assert [error['row'] for error in response.json['errors']] == [2, 3]
+
+    events = web_visualizer.event_store.load('season')['events']
+    assert [(event['name'], event['income'], event['profit_loss']) for event in events] == [
+        ('Golf Outing', 1200.0, 1200.0), ('Homecoming', 500.0, 450.0)]
+
+
+def test_bulk_import_of_a_sheet_reports_sheet_rows(season):
+    sheet = pd.DataFrame({'Date': ['2024-09-01', '2024-09-02'], 'Event Name': ['Golf Outing', None]})
+    response = season.post('/api/files/season/events/bulk', content_type='multipart/form-data', data={
+        'file': (io.BytesIO(sheet.to_csv(index=False).encode()), 'season.csv')})
+    # Below the header row
+    assert response.json['errors'] == [{'row': 3, 'errors': ['Event Name is required']}]
@@ -0,0 +1,154 @@
+"""Tests for the JSON event store: log replay, compaction and concurrent readers."""
+
+import os
+
+import pytest
+
+import event_store
+from event_store import ConflictError, JsonEventStore
+
+
+def add(store, file_id, count, start=0):
+    return [store.add_event(file_id, {'name': f"Event {start + i}", 'date': '2024-09-01',
+                                      'created_date': '2024-01-01 00:00:00'})
+            for i in range(count)]
+
+
+def names(store, file_id):
+    return [event['name'] for event in store.load(file_id)['events']]
+
+
+def test_reader_reloads_when_compaction_replaces_the_log(data_dir, monkeypatch):
+    writer, reader = JsonEventStore(data_dir), JsonEventStore(data_dir)
+    writer.create_file('season', 'Season')
+    add(writer, 'season', 3)
+    assert len(reader.load('season')['events']) == 3
+
+    # The reader refreshes after the new snapshot is written but before the old log is removed
+    remove = os.remove
+
+    def remove_after_read(path):
+        if path == writer.log_path('season'):
+            reader.load('season')
+        remove(path)
+
+    monkeypatch.setattr(event_store.os, 'remove', remove_after_read)
+    writer.compact('season')
+    monkeypatch.setattr(event_store.os, 'remove', remove)
+
+    # A new log longer than the old one must not be resumed at the old offset
+    add(writer, 'season', 5, start=3)
+    assert names(reader, 'season') == [f"Event {i}" for i in range(8)]
+
+
+def test_reader_sees_events_of_a_new_log_after_a_bulk_import(data_dir):
+    writer, reader = JsonEventStore(data_dir), JsonEventStore(data_dir)
+    writer.create_file('season', 'Season')
+    add(writer, 'season', 4)
+    assert len(reader.load('season')['events']) == 4
+    writer.add_events('season', [{'name': 'Imported', 'date': '2024-10-01'}])
+    add(writer, 'season', 6, start=5)
+    assert len(reader.load('season')['events']) == 11
+
+
+def test_update_with_outdated_version_conflicts(store):
+    store.create_file('season', 'Season')
+    event, = add(store, 'season', 1)
+    read_version = event_store.event_modified(event)
+    store.update_event('season', event['id'], {'name': 'First', 'last_modified': '2024-02-01 00:00:00'},
+                       expected_modified=read_version)
+
+    with pytest.raises(ConflictError):
+        store.update_event('season', event['id'], {'name': 'Second'}, expected_modified=read_version)
+    with pytest.raises(ConflictError):
+        store.delete_event('season', event['id'], expected_modified=read_version)
+    assert names(store, 'season') == ['First']
+
+    store.delete_event('season', event['id'], expected_modified='2024-02-01 00:00:00')
+    with pytest.raises(ConflictError, match='deleted'):
+        store.update_event('season', event['id'], {'name': 'Third'}, expected_modified='2024-02-01 00:00:00')
+
+
+def test_outdated_edit_returns_409_with_the_current_event(client):
+    import web_visualizer
+    web_visualizer.event_store.create_file('season', 'Season')
+    event, = add(web_visualizer.event_store, 'season', 1)
+    web_visualizer.event_store.update_event('season', event['id'], {'last_modified': '2024-02-01 00:00:00'})
+
+    response = client.put(f"/api/files/season/events/{event['id']}",
+                          json={'basic': {'name': 'Stale'}, 'last_modified': '2024-01-01 00:00:00'})
+    assert response.status_code == 409
+    assert response.json['event']['name'] == 'Event 0'
+
+    response = client.delete(f"/api/files/season/events/{event['id']}?last_modified=2024-01-01 00:00:00")
+    assert response.status_code == 409
+
+    response = client.put(f"/api/files/season/events/{event['id']}",
+                          json={'basic': {'name': 'Fresh'}, 'last_modified': '2024-02-01 00:00:00'})
+    assert response.status_code == 200
+    assert names(web_visualizer.event_store, 'season') == ['Fresh']
+
+
+def test_log_is_replayed_after_a_restart(store, data_dir):
+    store.create_file('season', 'Season')
+    first, second, third = add(store, 'season', 3)
+    store.update_event('season', second['id'], {'name': 'Renamed'})
+    store.delete_event('season', first['id'])
+    assert os.path.exists(store.log_path('season'))
+
+    restarted = JsonEventStore(data_dir)
+    assert names(restarted, 'season') == ['Renamed', 'Event 2']
+    assert restarted.add_event('season', {'name': 'Next'})['id'] == 'event_4'
+
+
+def test_writes_leave_data_already_loaded_unchanged(store):
+    store.create_file('season', 'Season')
+    first, second, third = add(store, 'season', 3)
+    before = store.load('season')
+    store.update_event('season', second['id'], {'name': 'Renamed'})
+    store.delete_event('season', first['id'])
+    add(store, 'season', 1, start=3)
+
+    assert [event['name'] for event in before['events']] == ['Event 0', 'Event 1', 'Event 2']
+    assert names(store, 'season') == ['Renamed', 'Event 2', 'Event 3']
+    assert store.get_event('season', first['id']) is None
+    assert store.get_event('season', second['id'])['name'] == 'Renamed'
+    assert store.list_files()[0]['event_count'] == 3
+
+
+def test_replay_skips_a_log_line_still_being_written(store, data_dir):
+    store.create_file('season', 'Season')
+    add(store, 'season', 2)
+    with open(store.log_path('season'), 'a') as f:
+        f.write('{"op": "add", "at": "2024-01-01 00:00:00", "event": {"id": "eve')
+    assert names(JsonEventStore(data_dir), 'season') == ['Event 0', 'Event 1']
+
+
+def test_log_is_compacted_at_the_threshold(data_dir):
+    store = JsonEventStore(data_dir, compact_every=3)
+    store.create_file('season', 'Season')
+    first, second = add(store, 'season', 2)
+    store.delete_event('season', second['id'])
+
+    # The third operation folds the log into the snapshot
+    assert not os.path.exists(store.log_path('season'))
+    assert names(JsonEventStore(data_dir), 'season') == ['Event 0']
+    # Ids of events deleted before the compaction are not handed out again
+    assert store.add_event('season', {'name': 'After'})['id'] == 'event_3'
+    assert os.path.exists(store.log_path('season'))
+    assert names(JsonEventStore(data_dir), 'season') == ['Event 0', 'After']
+
+
+@pytest.mark.parametrize('kind', ['json', 'sqlite'])
+def test_deleting_a_file_removes_its_lock_file(data_dir, kind):
+    store = event_store.create_event_store(kind, data_dir)
+    store.create_file('season', 'Season')
+    add(store, 'season', 1)
+    lock_path = os.path.join(data_dir, event_store.LOCK_DIRNAME, 'season.lock')
+    if event_store.fcntl is not None:
+        assert os.path.exists(lock_path)
+    assert store.delete_file('season')
+    assert not os.path.exists(lock_path)
+    # The id can be used again, with a new lock file
+    store.create_file('season', 'Season')
+    add(store, 'season', 1)
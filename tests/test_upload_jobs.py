@@ -0,0 +1,84 @@
+"""Tests for upload jobs: cancelling queued, running and finished jobs, here and from another process."""
+
+import threading
+import time
+
+import pytest
+
+from upload_jobs import UploadJobs
+
+
+def wait_for(jobs, job_id, *states, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = jobs.status(job_id)
+        if status is not None and status['state'] in states:
+            return status
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} never reached {states}: {jobs.status(job_id)}")
+
+
+@pytest.fixture
+def chunks():
+    """A processing function reporting one chunk at a time; set ``chunks.next`` to let it read the next one."""
+    class Chunks:
+        read = 0
+        next = threading.Event()
+
+        def process(self, job):
+            while self.read < 100:
+                job.update('parsing', self.read / 100)
+                self.next.wait()
+                self.next.clear()
+                self.read += 1
+            return '{}'
+
+    return Chunks()
+
+
+def test_running_job_stops_at_its_next_progress_report(chunks):
+    jobs = UploadJobs(workers=1)
+    cleaned_up = threading.Event()
+    job = jobs.submit(chunks.process, 'big.csv', cleanup=cleaned_up.set)
+    wait_for(jobs, job.id, 'running')
+
+    assert jobs.cancel(job.id)['state'] == 'running'
+    chunks.next.set()
+    assert wait_for(jobs, job.id, 'cancelled')['stage'] == 'parsing'
+    assert chunks.read == 1 and cleaned_up.wait(5)
+    assert jobs.result(job.id)[1] is None
+
+
+def test_queued_job_never_runs(chunks):
+    jobs = UploadJobs(workers=1)
+    busy = jobs.submit(chunks.process, 'big.csv')
+    ran = []
+    queued = jobs.submit(lambda job: ran.append(job) or '{}', 'small.csv')
+    jobs.cancel(queued.id)
+    jobs.cancel(busy.id)
+    chunks.next.set()
+
+    wait_for(jobs, busy.id, 'cancelled')
+    assert wait_for(jobs, queued.id, 'cancelled')['stage'] is None and ran == []
+
+
+def test_job_is_cancelled_from_another_process(chunks, tmp_path):
+    here, other = UploadJobs(workers=1, directory=str(tmp_path)), UploadJobs(directory=str(tmp_path))
+    job = here.submit(chunks.process, 'big.csv')
+    wait_for(other, job.id, 'running')
+
+    assert other.cancel(job.id)['state'] == 'running'
+    chunks.next.set()
+    wait_for(here, job.id, 'cancelled')
+    assert wait_for(other, job.id, 'cancelled')['file_name'] == 'big.csv'
+
+
+def test_cancelling_a_finished_job_discards_its_result(tmp_path):
+    here, other = UploadJobs(directory=str(tmp_path)), UploadJobs(directory=str(tmp_path))
+    job = here.submit(lambda job: '{"rows": 3}', 'small.csv')
+    wait_for(here, job.id, 'done')
+    assert other.result(job.id)[1] == '{"rows": 3}'
+
+    assert other.cancel(job.id)['state'] == 'done'
+    assert here.status(job.id) is None and other.result(job.id) == (None, None)
+    assert other.cancel(job.id) is None
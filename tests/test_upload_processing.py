@@ -0,0 +1,76 @@
+"""Tests for cleaning and profiling uploaded spreadsheets."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import upload_processing
+from upload_processing import clean_upload_frame, parse_money, read_csv_streaming
+
+
+def write_csv(path, columns):
+    pd.DataFrame(columns).to_csv(path, index=False)
+    return str(path)
+
+
+def test_streamed_money_columns_keep_one_dtype_across_chunks(tmp_path):
+    path = write_csv(tmp_path / 'events.csv', {
+        'Income': ['$1,200.00', '$350', '($50)', '$75', 'TBD', '$10'],
+        'Notes': ['Rain', 'Indoor', 'Sold out', 'Rain', '$500', '$600'],
+    })
+    sample, analysis = read_csv_streaming(path, chunk_rows=2)
+    # Decided on the first chunk: 'TBD' in a later chunk is stray text in an amount column
+    assert sample['Income'].dtype == np.float64
+    assert sample['Income'].tolist()[:4] == [1200.0, 350.0, -50.0, 75.0]
+    assert np.isnan(sample['Income'][4])
+    # ... and a later chunk of amounts does not turn a text column into numbers
+    assert sample['Notes'].tolist() == ['Rain', 'Indoor', 'Sold out', 'Rain', '$500', '$600']
+    assert analysis['data_types']['Income'] == 'float64'
+    assert analysis['numeric_columns'] == ['Income']
+
+
+def test_streamed_column_is_decided_by_the_first_chunk_with_values(tmp_path):
+    path = write_csv(tmp_path / 'events.csv', {
+        'Event': ['Gala', 'Picnic', 'Reunion', 'Golf'],
+        'Notes': [None, None, 'Rain date', 'Sold out'],
+        'Underwritten': ['n/a', 'n/a', '$100', '$250'],
+    })
+    sample, _ = read_csv_streaming(path, chunk_rows=2)
+    assert sample['Notes'].tolist()[2:] == ['Rain date', 'Sold out']
+    assert sample['Underwritten'].dtype == np.float64
+    assert sample['Underwritten'].tolist()[2:] == [100.0, 250.0]
+
+
+@pytest.mark.parametrize('text, amount', [
+    ('$1,234.00', 1234.0), ('1234', 1234.0), ('.5', 0.5), ('-$5', -5.0), ('$-5', -5.0), ('+$5', 5.0),
+    ('($1,234.00)', -1234.0), ('$50-', -50.0), ('( $ 7 )', -7.0),
+    ('($-5)', None), ('-$5-', None), ('($5', None), ('$', None), ('TBD', None), ('1.2.3', None),
+])
+def test_parse_money(text, amount):
+    assert parse_money(text) == amount
+
+
+def test_money_columns_are_parsed_and_text_columns_left_alone():
+    df = pd.DataFrame({
+        'Income': ['$1,200.00', 'n/a', '($50)', '$1,200.00', '$75', '0'],
+        'Expenses': ['$10', 'n/a (AG)', '$20', '$30', '$40', 'see notes'],
+        'Location': ['Delaware', 'n/a', 'Columbus', '$5', 'Toledo', '$5'],
+        'Attendees': [10, 20, 30, 40, 50, 60],
+    })
+    cleaned = clean_upload_frame(df)
+    assert cleaned['Income'].tolist()[2:] == [-50.0, 1200.0, 75.0, 0.0] and np.isnan(cleaned['Income'][1])
+    # Four of five present cells are amounts: the stray text becomes NaN
+    assert cleaned['Expenses'].tolist()[2:5] == [20.0, 30.0, 40.0] and np.isnan(cleaned['Expenses'][5])
+    # Two of five: only the sentinel goes
+    assert cleaned['Location'].fillna('-').tolist() == ['Delaware', '-', 'Columbus', '$5', 'Toledo', '$5']
+    assert cleaned['Attendees'].tolist() == [10, 20, 30, 40, 50, 60]
+    assert df['Income'][1] == 'n/a'
+
+
+def test_each_distinct_string_is_parsed_once(monkeypatch):
+    parsed = []
+    monkeypatch.setattr(upload_processing, 'parse_money', lambda text: parsed.append(text) or parse_money(text))
+    df = pd.DataFrame({f"Event {i}": ['$350', '$500', 'n/a', '$350'] for i in range(20)})
+    cleaned = clean_upload_frame(df)
+    assert sorted(parsed) == ['$350', '$500']
+    assert cleaned['Event 19'].tolist()[:2] == [350.0, 500.0]
@@ -0,0 +1,40 @@
+"""Tests for the visualize endpoint: paging and projecting the rows of an event file."""
+
+import pytest
+
+
+@pytest.fixture
+def season(client):
+    import web_visualizer
+    web_visualizer.event_store.create_file('season', 'Season', [
+        {'name': f"Event {i}", 'date': f"2024-09-{i + 1:02d}", 'income': 100.0 * i} for i in range(5)])
+    return client
+
+
+def test_rows_are_paged(season):
+    page = season.get('/api/files/season/visualize?offset=1&limit=2').json
+    assert (page['total'], page['offset']) == (5, 1)
+    assert [row['Event Name'] for row in page['data']] == ['Event 1', 'Event 2']
+
+    last = season.get('/api/files/season/visualize?offset=4&limit=2').json
+    assert [row['Event Name'] for row in last['data']] == ['Event 4']
+    assert season.get('/api/files/season/visualize?offset=9&limit=2').json['data'] == []
+    assert len(season.get('/api/files/season/visualize').json['data']) == 5
+
+
+def test_rows_are_projected_onto_the_requested_columns(season):
+    page = season.get('/api/files/season/visualize?columns=Event Name,Event Income&limit=2').json
+    assert page['columns'] == ['Event Name', 'Event Income']
+    assert page['data'] == [{'Event Name': 'Event 0', 'Event Income': 0.0},
+                            {'Event Name': 'Event 1', 'Event Income': 100.0}]
+
+
+def test_projection_leaves_out_sections_no_event_has(season):
+    page = season.get('/api/files/season/visualize?columns=Event Name,5-Star Ratings&limit=1').json
+    assert page['columns'] == ['Event Name']
+    assert page['data'] == [{'Event Name': 'Event 0'}]
+
+
+@pytest.mark.parametrize('query', ['columns=Event Name,Nope', 'offset=-1', 'limit=-5'])
+def test_bad_paging_or_projection_is_rejected(season, query):
+    assert season.get(f'/api/files/season/visualize?{query}').status_code == 400
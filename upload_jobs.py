@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Upload Jobs
+Processes uploaded spreadsheets in a worker pool, so /upload answers with a job
+id straight away and the browser polls the job's stage until the analysis is
+ready. Jobs can be cancelled, and finished jobs expire
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Worker threads processing uploads in each server process
+UPLOAD_WORKERS = 2
+
+# Seconds a job is kept after its last progress, and how many finished jobs a process keeps at most
+UPLOAD_JOB_TTL = 15 * 60
+MAX_UPLOAD_JOBS = 32
+
+# Stages a job reports while it runs (an xlsx upload has no separate cleaning stage)
+UPLOAD_STAGES = ['parsing', 'cleaning', 'profiling', 'charting']
+
+# States after which a job no longer changes
+FINISHED_STATES = {'done', 'failed', 'cancelled'}
+
+# Job status, results and cancellation requests shared between worker processes, under the upload folder
+JOB_DIRNAME = '.jobs'
+
+
+class JobCancelled(Exception):
+    """Raised in a job's processing at its next progress report once the job is cancelled."""
+
+
+class UploadJob:
+    """
+    One uploaded file being processed.
+
+    The processing function reports where it is with ``update(stage,
+    progress)`` (progress is the fraction of the input read, when known);
+    once the job is cancelled, ``update`` raises JobCancelled, so
+    cancellation takes effect at the next stage or chunk. With a
+    ``directory``, every status change is also written to
+    ``<directory>/status.json`` and the result to ``result.json``, and a
+    ``cancel`` file there cancels the job from another process.
+    """
+
+    def __init__(self, file_name, directory=None):
+        self.id = uuid.uuid4().hex
+        self.directory = directory and os.path.join(directory, self.id)
+        self.result = None
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        now = time.time()
+        self._status = {'id': self.id, 'file_name': file_name, 'state': 'queued', 'stage': None,
+                        'progress': None, 'error': None, 'created': now, 'updated': now}
+        self._publish()
+
+    def status(self):
+        """The job's state (queued, running, done, failed or cancelled), stage and progress as a JSON-ready dict."""
+        with self._lock:
+            return dict(self._status)
+
+    def update(self, stage, progress=None):
+        """Report the current stage; raises JobCancelled if the job has been cancelled."""
+        if self.cancel_requested():
+            raise JobCancelled()
+        self._set(state='running', stage=stage, progress=progress)
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def cancel_requested(self):
+        if not self._cancelled.is_set() and self.directory and os.path.exists(os.path.join(self.directory, 'cancel')):
+            self._cancelled.set()
+        return self._cancelled.is_set()
+
+    def run(self, process, cleanup=None):
+        """Run ``process(self)`` and keep its result (JSON text), error or cancellation; then ``cleanup()``."""
+        try:
+            if self.cancel_requested():
+                raise JobCancelled()
+            result = process(self)
+            if self.directory:
+                _write_text(os.path.join(self.directory, 'result.json'), result)
+            self.result = result
+            self._set(state='done', stage=None, progress=None)
+        except JobCancelled:
+            self._set(state='cancelled')
+        except Exception as e:
+            print(f"Upload job {self.id} failed: {e}")
+            self._set(state='failed', error=str(e))
+        finally:
+            if cleanup is not None:
+                cleanup()
+
+    def _set(self, **changes):
+        with self._lock:
+            self._status.update(changes, updated=time.time())
+        self._publish()
+
+    def _publish(self):
+        if self.directory:
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                _write_text(os.path.join(self.directory, 'status.json'), json.dumps(self.status()))
+            except OSError as e:
+                print(f"Could not share upload job {self.id}: {e}")
+
+
+class UploadJobs:
+    """
+    Registry of upload jobs running in a shared thread pool, expired after UPLOAD_JOB_TTL.
+
+    With a ``directory``, jobs are also visible there (see UploadJob), so in
+    a multi-process server any worker can report a job's progress, return
+    its result or cancel it, whichever worker received the upload.
+    """
+
+    def __init__(self, workers=UPLOAD_WORKERS, directory=None):
+        self.directory = directory
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='uploads')
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, process, file_name, cleanup=None):
+        """
+        Queue ``process(job)`` and return the UploadJob.
+
+        ``process`` returns the job's result as JSON text; ``cleanup()`` runs
+        once the job has finished, however it finished.
+        """
+        job = UploadJob(file_name, self.directory)
+        with self._lock:
+            self._expire()
+            self._jobs[job.id] = job
+        if self.directory:
+            self._expire_shared()
+        self._executor.submit(job.run, process, cleanup)
+        return job
+
+    def status(self, job_id):
+        """The status of a job run here or (with a directory) by another process; None if unknown or expired."""
+        job = self._local(job_id)
+        if job is not None:
+            return job.status()
+        return self._read(job_id, 'status.json', json.loads)
+
+    def result(self, job_id):
+        """(status, result JSON text or None until the job is done); (None, None) if the job is unknown."""
+        job = self._local(job_id)
+        if job is not None:
+            return job.status(), job.result
+        status = self.status(job_id)
+        if status is None or status['state'] != 'done':
+            return status, None
+        result = self._read(job_id, 'result.json', lambda text: text)
+        return (status, result) if result is not None else (None, None)
+
+    def cancel(self, job_id):
+        """
+        Cancel an unfinished job, or discard a finished one and its result.
+
+        Returns the job's status, or None if the job is unknown. A job
+        running in another process stops at its next progress report.
+        """
+        job = self._local(job_id)
+        status = job.status() if job is not None else self.status(job_id)
+        if status is None:
+            return None
+        if status['state'] in FINISHED_STATES:
+            with self._lock:
+                self._jobs.pop(job_id, None)
+            if self.directory:
+                shutil.rmtree(os.path.join(self.directory, job_id), ignore_errors=True)
+        elif job is not None:
+            job.cancel()
+        else:
+            _write_text(os.path.join(self.directory, job_id, 'cancel'), '')
+        return status
+
+    def _local(self, job_id):
+        """The job if it runs (or ran) in this process and was not discarded, here or by another process."""
+        with self._lock:
+            self._expire()
+            job = self._jobs.get(job_id)
+            if (job is not None and job.directory and job.status()['state'] in FINISHED_STATES
+                    and not os.path.isdir(job.directory)):
+                del self._jobs[job_id]
+                return None
+            return job
+
+    def _read(self, job_id, filename, parse):
+        """Read one file of a shared job; None if there is no such (unexpired) job."""
+        if not self.directory or not job_id.isalnum():
+            return None
+        path = os.path.join(self.directory, job_id, filename)
+        try:
+            if time.time() - os.path.getmtime(os.path.join(self.directory, job_id, 'status.json')) > UPLOAD_JOB_TTL:
+                return None
+            with open(path, 'r') as f:
+                return parse(f.read())
+        except (OSError, ValueError):
+            return None
+
+    def _expire(self):
+        """Drop finished jobs older than UPLOAD_JOB_TTL, and the oldest beyond MAX_UPLOAD_JOBS."""
+        cutoff = time.time() - UPLOAD_JOB_TTL
+        finished = [job for job in self._jobs.values() if job.status()['state'] in FINISHED_STATES]
+        for position, job in enumerate(finished):
+            if job.status()['updated'] < cutoff or len(finished) - position > MAX_UPLOAD_JOBS:
+                del self._jobs[job.id]
+                if job.directory:
+                    shutil.rmtree(job.directory, ignore_errors=True)
+
+    def _expire_shared(self):
+        """Remove shared jobs without progress for UPLOAD_JOB_TTL, including those of exited processes."""
+        cutoff = time.time() - UPLOAD_JOB_TTL
+        for job_id in os.listdir(self.directory):
+            try:
+                expired = os.path.getmtime(os.path.join(self.directory, job_id, 'status.json')) < cutoff
+            except OSError:
+                continue
+            if expired:
+                shutil.rmtree(os.path.join(self.directory, job_id), ignore_errors=True)
+
+
+def _write_text(path, text):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
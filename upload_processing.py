@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+Upload Processing
+Cleaning and profiling of uploaded spreadsheets, including a streaming mode
+that reads large CSV files in chunks with bounded memory
+"""
+
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+# Above this many rows distinct counts are estimated from a sample of this size
+EXACT_DISTINCT_LIMIT = 100_000
+
+# Rows read per chunk when streaming a CSV upload
+CSV_CHUNK_ROWS = 50_000
+
+# Size of the uniform row sample kept for charts when streaming
+UPLOAD_SAMPLE_ROWS = 100_000
+
+# Cell values treated as missing in uploaded financial sheets
+MISSING_SENTINELS = ['n/a', 'n/a (AG)', '(n/a)', '']
+
+# Share of a text column's non-missing cells that must parse as money to convert it
+MONEY_MIN_FRACTION = 0.8
+
+# '$1,234.00', '1234', '-$5', '$-5', '+$5', '($1,234.00)', '$50-', '.5'
+MONEY_PATTERN = re.compile(r"""
+    (?P<open>\()?\s*
+    (?P<lead>[-+])?\s*
+    \$?\s*
+    (?P<inner>[-+])?\s*
+    (?P<number>\d[\d,]*(?:\.\d*)?|\.\d+)\s*
+    (?P<trail>-)?\s*
+    (?P<close>\))?
+""", re.VERBOSE)
+
+FINANCIAL_KEYWORDS = ['income', 'expense', 'profit', 'loss', 'revenue', 'cost', 'amount', 'price', 'sales']
+
+
+def json_value(value):
+    """Convert a pandas/NumPy scalar to a JSON-safe Python value."""
+    if value is None or pd.isna(value):
+        return None
+    if isinstance(value, (np.integer, np.floating)):
+        return value.item()
+    return str(value)
+
+
+def is_numeric_column(dtype):
+    """Numeric for analysis purposes: ints and floats, but not booleans."""
+    return pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+
+
+def is_categorical_column(dtype):
+    return pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype)
+
+
+def gee_distinct(sample, population):
+    """
+    Estimate distinct values among ``population`` non-null rows from a uniform sample.
+
+    Uses the GEE estimator: values seen once in the sample are scaled by
+    sqrt(population / sample size). A sample in which every value is unique
+    is treated as a key column.
+    """
+    counts = sample.value_counts()
+    sampled = int(counts.sum())
+    if sampled == 0:
+        return 0
+    if sampled >= population:
+        return int(len(counts))
+    singletons = int((counts == 1).sum())
+    if singletons == len(counts):
+        return int(population)
+    return int(round(np.sqrt(population / sampled) * singletons + (len(counts) - singletons)))
+
+
+def estimate_distinct(series, sample_positions=None, present=None):
+    """
+    Number of distinct non-null values in a Series.
+
+    Counted exactly for small columns; larger ones are estimated from the
+    rows at ``sample_positions`` (a fixed-size random sample, see
+    ``gee_distinct``), so the cost does not grow with the upload. Pass the
+    column's non-null count as ``present`` when it is already known:
+    counting it again is a full pass over the column, which for text
+    columns costs as much as the whole estimate.
+    """
+    if sample_positions is None or len(series) <= EXACT_DISTINCT_LIMIT:
+        return int(series.nunique())
+    if present is None:
+        present = int(series.count())
+    return gee_distinct(series.take(sample_positions), present)
+
+
+def sample_records(head, numeric_mask):
+    """
+    JSON-safe sample rows: numbers stay numbers, missing becomes None, the rest strings.
+
+    The few rows are converted to Python objects in one go rather than
+    column by column, which on wide sheets cost more than the whole profile;
+    only columns whose text form pandas formats specially (dates) are
+    converted on their own.
+    """
+    columns = [str(col) for col in head.columns]
+    cells = head.to_numpy(dtype=object, copy=True)
+    missing = pd.isna(cells)
+    for position, (numeric, dtype) in enumerate(zip(numeric_mask, head.dtypes)):
+        if numeric:
+            cells[:, position] = head.iloc[:, position].tolist()
+        elif not is_categorical_column(dtype):
+            cells[:, position] = head.iloc[:, position].astype(str).tolist()
+        else:
+            cells[:, position] = [str(value) for value in cells[:, position]]
+    cells[missing] = None
+    return [dict(zip(columns, row)) for row in cells.tolist()]
+
+
+def build_analysis(shape, columns, dtypes, column_stats, sample_data):
+    """Assemble the analysis dict returned by the upload and sample-data endpoints."""
+    analysis = {
+        'shape': [int(shape[0]), int(shape[1])],
+        'columns': columns,
+        'data_types': {col: str(dtype) for col, dtype in zip(columns, dtypes)},
+        'numeric_columns': [col for col, dtype in zip(columns, dtypes) if is_numeric_column(dtype)],
+        'categorical_columns': [col for col, dtype in zip(columns, dtypes) if is_categorical_column(dtype)],
+        'datetime_columns': [col for col, dtype in zip(columns, dtypes)
+                             if pd.api.types.is_datetime64_any_dtype(dtype)],
+        'missing_values': {col: stats['missing'] for col, stats in column_stats.items()},
+        'column_stats': column_stats,
+        'sample_data': sample_data
+    }
+
+    # Determine if this is financial data
+    is_financial = any(keyword in ' '.join(columns).lower() for keyword in FINANCIAL_KEYWORDS)
+    analysis['is_financial'] = bool(is_financial)
+
+    return analysis
+
+
+def analyze_data(df):
+    """Analyze the uploaded data and determine the best visualization approach."""
+    columns = [str(col) for col in df.columns]
+    dtypes = list(df.dtypes)
+    numeric_mask = [is_numeric_column(dtype) for dtype in dtypes]
+    missing_counts = df.isna().sum().to_numpy()
+
+    # Per-column summaries, each a vectorized reduction rather than a per-cell loop
+    sample_positions = None
+    if len(df) > EXACT_DISTINCT_LIMIT:
+        sample_positions = np.random.default_rng(0).choice(len(df), EXACT_DISTINCT_LIMIT, replace=False)
+    column_stats = {}
+    for position, (col, (_, series)) in enumerate(zip(columns, df.items())):
+        stats = {
+            'dtype': str(dtypes[position]),
+            'missing': int(missing_counts[position]),
+            'distinct': estimate_distinct(series, sample_positions, len(df) - int(missing_counts[position]))
+        }
+        if numeric_mask[position]:
+            stats.update({'min': json_value(series.min()), 'max': json_value(series.max()),
+                          'mean': json_value(series.mean())})
+        elif pd.api.types.is_datetime64_any_dtype(dtypes[position]):
+            stats.update({'min': json_value(series.min()), 'max': json_value(series.max())})
+        column_stats[col] = stats
+
+    return build_analysis(df.shape, columns, dtypes, column_stats, sample_records(df.head(10), numeric_mask))
+
+
+def parse_money(text):
+    """
+    Parse one money string such as '$1,234.00', '-$5' or '($50.00)'.
+
+    Returns a float, or None if the text is not a plain (possibly signed,
+    parenthesised or comma-grouped) amount.
+    """
+    match = MONEY_PATTERN.fullmatch(text)
+    if match is None or bool(match['open']) != bool(match['close']):
+        return None
+    signs = [sign for sign in (match['lead'], match['inner'], match['trail']) if sign]
+    if len(signs) > 1 or (signs and match['open']):
+        return None
+    value = float(match['number'].replace(',', ''))
+    return -value if match['open'] or signs == ['-'] else value
+
+
+def clean_upload_frame(df):
+    """
+    Turn the 'n/a' sentinels into NaN and money columns into numbers, leaving other text alone.
+
+    All text columns are factorized together in one pass, so the parser sees
+    each distinct string in the sheet once (amounts repeat heavily across
+    event columns) and the results are scattered back with a single take.
+    A text column is converted to float64 if at least MONEY_MIN_FRACTION of
+    its non-missing cells are amounts (stray text then becomes NaN);
+    otherwise only its sentinels become NaN.
+    """
+    return _clean_text_columns(df, {})[0]
+
+
+def _clean_text_columns(df, decided):
+    """
+    ``clean_upload_frame`` for one chunk of a file, returning (cleaned frame, decisions).
+
+    ``decided`` maps column positions to whether the column holds amounts,
+    as decided on an earlier chunk; those columns are cleaned the same way
+    whatever share of this chunk's cells parse. The other columns are
+    decided on this chunk if it has values for them: text columns by
+    MONEY_MIN_FRACTION, numeric ones as amounts.
+    """
+    decided = dict(decided)
+    for position, dtype in enumerate(df.dtypes):
+        if position not in decided and is_numeric_column(dtype) and df.iloc[:, position].notna().any():
+            decided[position] = True
+    text_positions = [position for position, dtype in enumerate(df.dtypes) if is_categorical_column(dtype)]
+    if not text_positions:
+        return df, decided
+
+    block = df.iloc[:, text_positions].to_numpy(dtype=object)
+    codes, uniques = pd.factorize(block.ravel(order='F'))
+    codes = codes.reshape(len(text_positions), len(df))
+
+    # One extra slot at the end serves code -1 (missing cells)
+    amounts = np.full(len(uniques) + 1, np.nan)
+    is_sentinel = np.zeros(len(uniques) + 1, dtype=bool)
+    sentinels = set(MISSING_SENTINELS)
+    for position, value in enumerate(uniques):
+        text = str(value).strip()
+        if text in sentinels:
+            is_sentinel[position] = True
+            continue
+        amount = parse_money(text)
+        if amount is not None:
+            amounts[position] = amount
+
+    cell_amounts = amounts[codes]
+    cell_sentinel = is_sentinel[codes]
+    present = ((codes >= 0) & ~cell_sentinel).sum(axis=1)
+    parsed = (~np.isnan(cell_amounts)).sum(axis=1)
+
+    for row, position in enumerate(text_positions):
+        if position not in decided and present[row]:
+            decided[position] = bool(parsed[row] >= MONEY_MIN_FRACTION * present[row])
+
+    df = df.copy(deep=False)
+    for row, position in enumerate(text_positions):
+        if decided.get(position):
+            df.isetitem(position, cell_amounts[row])
+        elif cell_sentinel[row].any():
+            df.isetitem(position, df.iloc[:, position].mask(cell_sentinel[row]))
+    return df, decided
+
+
+def _merge_dtype(previous, dtype):
+    """dtype of a column after concatenating chunks of ``previous`` and ``dtype``."""
+    if previous is None or previous == dtype:
+        return dtype
+    if is_numeric_column(previous) and is_numeric_column(dtype):
+        return np.result_type(previous, dtype)
+    return np.dtype(object)
+
+
+class StreamingProfile:
+    """
+    Incremental version of ``analyze_data`` for data that arrives in chunks.
+
+    Keeps only running aggregates (row, missing and non-null counts, sums,
+    minimums and maximums), the first rows for the preview and a uniform
+    random sample of at most ``sample_rows`` rows. Memory therefore stays
+    bounded however large the input is. The sample is a bottom-k sample:
+    every row gets a random key and the rows with the smallest keys are kept.
+    """
+
+    def __init__(self, sample_rows=UPLOAD_SAMPLE_ROWS, seed=0):
+        self.sample_rows = sample_rows
+        self.rows = 0
+        self.columns = None
+        self.head = None
+        self.dtypes = {}
+        self.missing = {}
+        self.counts = {}
+        self.sums = {}
+        self.minimums = {}
+        self.maximums = {}
+        self._sample = None
+        self._keys = np.empty(0)
+        self._rng = np.random.default_rng(seed)
+
+    def add(self, chunk):
+        """Fold one cleaned chunk into the profile."""
+        chunk = chunk.set_axis(pd.RangeIndex(self.rows, self.rows + len(chunk)), axis=0)
+        if self.columns is None:
+            self.columns = list(chunk.columns)
+            self.head = chunk.head(10)
+        self.rows += len(chunk)
+
+        missing = chunk.isna().sum()
+        for col in self.columns:
+            series = chunk[col]
+            self.dtypes[col] = _merge_dtype(self.dtypes.get(col), series.dtype)
+            self.missing[col] = self.missing.get(col, 0) + int(missing[col])
+            self.counts[col] = self.counts.get(col, 0) + len(series) - int(missing[col])
+            if is_numeric_column(series.dtype) and len(series) > int(missing[col]):
+                self.sums[col] = self.sums.get(col, 0) + series.sum()
+                self.minimums[col] = min(self.minimums.get(col, np.inf), series.min())
+                self.maximums[col] = max(self.maximums.get(col, -np.inf), series.max())
+
+        keys = np.concatenate([self._keys, self._rng.random(len(chunk))])
+        candidates = chunk if self._sample is None else pd.concat([self._sample, chunk])
+        if len(candidates) > self.sample_rows:
+            keep = np.argpartition(keys, self.sample_rows - 1)[:self.sample_rows]
+            candidates, keys = candidates.iloc[keep], keys[keep]
+        self._sample, self._keys = candidates, keys
+
+    def sample(self):
+        """The sampled rows in file order (all rows if the input fit in the sample)."""
+        if self._sample is None:
+            return pd.DataFrame()
+        sample = self._sample.sort_index()
+        # Chunks that disagreed on a column's dtype are aligned with the merged dtype
+        for col in self.columns:
+            if sample[col].dtype != self.dtypes[col]:
+                try:
+                    sample[col] = sample[col].astype(self.dtypes[col])
+                except (TypeError, ValueError):
+                    pass
+        return sample
+
+    def analysis(self):
+        """The analysis dict for everything added so far, as ``analyze_data`` would return it."""
+        if self.columns is None:
+            return analyze_data(pd.DataFrame())
+        sample = self.sample()
+        columns = [str(col) for col in self.columns]
+        dtypes = [self.dtypes[col] for col in self.columns]
+
+        column_stats = {}
+        for name, col, dtype in zip(columns, self.columns, dtypes):
+            stats = {
+                'dtype': str(dtype),
+                'missing': self.missing[col],
+                'distinct': gee_distinct(sample[col].dropna(), self.counts[col])
+            }
+            if is_numeric_column(dtype):
+                count = self.counts[col]
+                stats.update({
+                    'min': json_value(self.minimums.get(col)),
+                    'max': json_value(self.maximums.get(col)),
+                    'mean': json_value(self.sums[col] / count) if count else None
+                })
+            column_stats[name] = stats
+
+        numeric_mask = [is_numeric_column(dtype) for dtype in dtypes]
+        return build_analysis((self.rows, len(columns)), columns, dtypes, column_stats,
+                              sample_records(self.head, numeric_mask))
+
+
+def read_csv_streaming(filepath, chunk_rows=CSV_CHUNK_ROWS, sample_rows=UPLOAD_SAMPLE_ROWS, progress=None):
+    """
+    Read, clean and profile a CSV file chunk by chunk.
+
+    Returns (sample DataFrame, analysis). The sample holds every row for
+    files up to ``sample_rows`` rows and a uniform random sample otherwise;
+    the analysis covers the whole file. Whether a column holds amounts is
+    decided on the first chunk with values in it, as ``clean_upload_frame``
+    would, and applied to every later chunk: an amount column stays float64
+    where a later chunk has stray text (which becomes NaN), and a text
+    column is not converted because one chunk happens to parse.
+    ``progress(stage, fraction)`` is called as each chunk is parsed,
+    cleaned and profiled, with the fraction of the file read so far.
+    """
+    progress = progress or (lambda stage, fraction: None)
+    profile = StreamingProfile(sample_rows)
+    decided = {}
+    with open(filepath, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        reader = pd.read_csv(f, chunksize=chunk_rows)
+        while True:
+            progress('parsing', f.tell() / size if size else 0.0)
+            chunk = next(reader, None)
+            if chunk is None:
+                break
+            fraction = f.tell() / size if size else 1.0
+            progress('cleaning', fraction)
+            chunk, decided = _clean_text_columns(chunk, decided)
+            progress('profiling', fraction)
+            profile.add(chunk)
+    progress('profiling', 1.0)
+    return profile.sample(), profile.analysis()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Cache Warm-up
+Runs the cache-filling steps of the web application in a background thread after
+the server starts, reporting progress, so the first requests after a restart are
+served from memory without waiting for the warm-up
+"""
+
+import threading
+import time
+
+# Seconds the warm-up thread yields between steps, so requests arriving meanwhile get the GIL
+WARMUP_PAUSE = 0.01
+
+
+class Warmup:
+    """
+    One background pass over a list of ``(label, step)`` tasks.
+
+    The tasks are built by ``tasks()`` in the warm-up thread itself, so even
+    listing the files does not delay the server. A failing step is recorded
+    and the warm-up moves on; ``status()`` reports the progress at any time.
+    """
+
+    def __init__(self, tasks):
+        self.tasks = tasks
+        self._lock = threading.Lock()
+        self._thread = None
+        self._status = {'state': 'idle', 'total': 0, 'done': 0, 'current': None, 'failed': [],
+                        'started': None, 'seconds': 0.0}
+
+    def start(self):
+        """Start the warm-up thread (once); returns immediately."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='warmup', daemon=True)
+            self._status.update(state='running', started=time.time())
+        self._thread.start()
+
+    def status(self):
+        """Progress as a JSON-ready dict: state (idle/running/done), done/total steps, current step, failures."""
+        with self._lock:
+            status = dict(self._status, failed=list(self._status['failed']))
+        if status['state'] == 'running':
+            status['seconds'] = round(time.time() - status['started'], 3)
+        return status
+
+    def _run(self):
+        start = time.perf_counter()
+        try:
+            tasks = list(self.tasks())
+        except Exception as e:
+            tasks = []
+            self._record_failure('listing', e)
+        with self._lock:
+            self._status['total'] = len(tasks)
+
+        for label, step in tasks:
+            with self._lock:
+                self._status['current'] = label
+            try:
+                step()
+            except Exception as e:
+                self._record_failure(label, e)
+            with self._lock:
+                self._status['done'] += 1
+            time.sleep(WARMUP_PAUSE)
+
+        seconds = time.perf_counter() - start
+        with self._lock:
+            self._status.update(state='done', current=None, seconds=round(seconds, 3))
+            failed = len(self._status['failed'])
+        print(f"🔥 Warm-up finished: {len(tasks)} step(s) in {seconds:.1f}s"
+              + (f", {failed} failed" if failed else ""))
+
+    def _record_failure(self, label, error):
+        print(f"Warm-up step {label} failed: {error}")
+        with self._lock:
+            self._status['failed'].append({'step': label, 'error': str(error)})
@@ -2,34 +2,172 @@
 """
 Web-based Excel Data Visualizer
 Flask application with modern UI for uploading Excel files and viewing visualizations
+
+pandas, plotly and openpyxl are imported by the routes that use them, so the
+pages and the event file API start without loading them
 """
 
 from flask import Flask, render_template, request, jsonify, send_file, session, redirect, url_for
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import plotly.utils
+import importlib
 import json
 import os
+import threading
 import uuid
 from werkzeug.utils import secure_filename
-import numpy as np
-from pathlib import Path
-import base64
-import io
-from datetime import datetime
-import openpyxl
+import hashlib
+from event_store import ConflictError, create_event_store, timestamp
+from event_frames import EVENT_COLUMNS, FrameCache, FRAME_CACHE_SIZE, frame_records
+from event_export import ExportCache, EXPORT_DIRNAME, download_name, export_writer
+from event_snapshots import ColumnarSnapshots, SNAPSHOT_DIRNAME
+from season_index import SeasonIndex, SEASON_INDEX_DIRNAME
+from chart_jobs import ChartJobs, CHART_DIRNAME, CHART_WORKERS
+from upload_jobs import UploadJobs, JOB_DIRNAME, UPLOAD_WORKERS
+from warmup import Warmup
+
+# Modules the analysis routes import on first use; a pre-forking server imports them
+# before forking instead (see preload_modules), so its workers share them
+DEFERRED_MODULES = ['pandas', 'numpy', 'openpyxl', 'plotly.express', 'plotly.graph_objects', 'plotly.io',
+                    'upload_processing', 'event_import', 'event_aggregates', 'charts']
 
 app = Flask(__name__)
 app.secret_key = 'owu_alumni_secret_key_2025'  # Secret key for sessions
 app.config['SECRET_KEY'] = 'your-secret-key-here'
 app.config['UPLOAD_FOLDER'] = 'uploads'
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+# CSV uploads are streamed in chunks, so the limit no longer bounds server memory
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('OWU_MAX_UPLOAD_MB', 256)) * 1024 * 1024
 
 # Ensure upload directory exists
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
+# Event files managed through the /api/files routes ('json' or 'sqlite', see --storage)
+event_store = create_event_store(os.environ.get('OWU_STORAGE', 'json'))
+
+# Flattened events of each file on disk, so analytics skip parsing the JSON
+snapshots = ColumnarSnapshots(event_store, os.path.join('event_data', SNAPSHOT_DIRNAME))
+
+# Generated downloads, reused until the file changes; older versions are swept
+exports = ExportCache(os.path.join('event_data', EXPORT_DIRNAME),
+                      lambda: {file_id: event_store.version(file_id) for file_id in event_store.file_ids()})
+
+# Events of all files in one table, for the cross-file /api/seasons queries
+season_index = SeasonIndex(event_store, os.path.join('event_data', SEASON_INDEX_DIRNAME))
+
+# Flattened frames and analysis results, keyed by file version
+frame_cache = FrameCache(int(os.environ.get('OWU_FRAME_CACHE_SIZE', FRAME_CACHE_SIZE)))
+
+# Upload charts render in this pool; the browser fetches each one from /charts/<set>/<chart>,
+# which any worker process can answer from the shared chart directory
+chart_jobs = ChartJobs(int(os.environ.get('OWU_CHART_WORKERS', CHART_WORKERS)),
+                       os.path.join(app.config['UPLOAD_FOLDER'], CHART_DIRNAME))
+
+# Uploads are processed in this pool; any worker process reports a job's progress from
+# /upload/jobs/<job_id> and returns its result, through the shared job directory
+upload_jobs = UploadJobs(int(os.environ.get('OWU_UPLOAD_WORKERS', UPLOAD_WORKERS)),
+                         os.path.join(app.config['UPLOAD_FOLDER'], JOB_DIRNAME))
+
+def configure_storage(kind):
+    """Switch the backend used by the /api/files routes."""
+    global event_store, snapshots, season_index
+    event_store = create_event_store(kind)
+    snapshots = ColumnarSnapshots(event_store, os.path.join('event_data', SNAPSHOT_DIRNAME))
+    season_index = SeasonIndex(event_store, os.path.join('event_data', SEASON_INDEX_DIRNAME))
+    frame_cache.clear()
+
+# Entries each warmed-up file takes in frame_cache (frame, rows, aggregates)
+WARMUP_CACHE_ENTRIES = 3
+
+def warmup_tasks():
+    """
+    The steps of the background warm-up: the demo payload, then the frame,
+    rows and aggregates of the most recently modified files that fit in
+    frame_cache, then the cross-file season index.
+    """
+    files = sorted(event_store.list_files(), key=lambda f: f.get('last_modified') or '', reverse=True)
+    limit = frame_cache.maxsize // WARMUP_CACHE_ENTRIES
+    tasks = [('sample-data', sample_payload)]
+    tasks += [(f"file {f['id']}", lambda file_id=f['id']: warm_file(file_id)) for f in files[:limit]]
+    tasks.append(('seasons', lambda: season_index.frame()))
+    return tasks
+
+# Started by start_warmup() (--warmup / OWU_WARMUP=1); progress at /api/warmup
+warmup = Warmup(warmup_tasks)
+
+def start_warmup():
+    """Fill the caches in a background thread; the server answers requests meanwhile."""
+    warmup.start()
+
+def plotly_js_url():
+    """
+    The CDN URL of the plotly.js release bundled with the installed plotly package.
+
+    Figures are serialized by that package (base64 typed arrays, epoch-ms
+    date axes), which plotly.js 1.x, still served as plotly-latest, cannot read.
+    """
+    from plotly.offline import get_plotlyjs_version
+    return f"https://cdn.plot.ly/plotly-{get_plotlyjs_version()}.min.js"
+
+def preload_modules():
+    """Import DEFERRED_MODULES now rather than in the first request that needs them."""
+    for name in DEFERRED_MODULES:
+        importlib.import_module(name)
+
+def load_event_frame(file_id):
+    """
+    Return (version, file name, flattened DataFrame) for an event file, or None
+    if it does not exist. Pass the version to frame_cache.get when caching
+    results derived from the frame.
+    """
+    if not event_store.exists(file_id):
+        return None
+    version = event_store.version(file_id)
+    frame = frame_cache.get(file_id, version, 'frame', lambda: snapshots.frame(file_id, version))
+    return None if frame is None else (version, *frame)
+
+def file_etag(file_id):
+    """ETag of the current version of an event file; clients send it back in If-Match."""
+    key = json.dumps(['file', file_id, event_store.version(file_id)])
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+def precondition_failed(file_id):
+    """
+    A 412 response if the request's If-Match names an older version of the
+    file, else None. Check it while holding event_store.locked(file_id), so
+    nothing changes between the check and the write.
+    """
+    etag = file_etag(file_id)
+    if request.if_match and not request.if_match.contains(etag):
+        response = jsonify({'error': 'The file has changed since it was loaded; reload it and try again'})
+        response.set_etag(etag)
+        return response, 412
+    return None
+
+def with_file_etag(response, file_id):
+    """Attach the file's current ETag to a JSON response."""
+    response.set_etag(file_etag(file_id))
+    return response
+
+def conflict(file_id, event_id, error):
+    """409 response for an edit based on an outdated copy of an event, with the event as it is now."""
+    return jsonify({'error': f"{error}; reload it and try again",
+                    'event': event_store.get_event(file_id, event_id)}), 409
+
+def cached_records(file_id, version, df):
+    """All rows of a flattened frame as JSON-ready dicts, cached per file version."""
+    return frame_cache.get(file_id, version, 'records', lambda: frame_records(df))
+
+def cached_aggregates(file_id, version, df):
+    """The aggregates of a flattened frame, cached per file version."""
+    from event_aggregates import event_aggregates
+    return frame_cache.get(file_id, version, 'aggregates', lambda: event_aggregates(df))
+
+def warm_file(file_id):
+    """Load what a file's dashboard requests into the caches (and its columnar snapshot onto disk)."""
+    frame = load_event_frame(file_id)
+    if frame is not None:
+        version, _, df = frame
+        cached_records(file_id, version, df)
+        cached_aggregates(file_id, version, df)
+
 # Allowed file extensions
 ALLOWED_EXTENSIONS = {'xlsx', 'xls', 'csv'}
 
@@ -37,121 +175,9 @@ def allowed_file(filename):
     """Check if file extension is allowed."""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def analyze_data(df):
-    """Analyze the uploaded data and determine the best visualization approach."""
-    # Convert data types to strings for JSON serialization
-    data_types_dict = {}
-    for col, dtype in df.dtypes.items():
-        data_types_dict[str(col)] = str(dtype)
-    
-    # Convert missing values to regular Python types
-    missing_values_dict = {}
-    for col, count in df.isnull().sum().items():
-        missing_values_dict[str(col)] = int(count)
-    
-    # Safely convert sample data to JSON-serializable format
-    sample_data = []
-    for idx, row in df.head(10).iterrows():
-        row_dict = {}
-        for col in df.columns:
-            value = row[col]
-            if pd.isna(value):
-                row_dict[str(col)] = None
-            elif isinstance(value, (np.integer, np.floating)):
-                row_dict[str(col)] = float(value) if isinstance(value, np.floating) else int(value)
-            else:
-                row_dict[str(col)] = str(value)
-        sample_data.append(row_dict)
-    
-    analysis = {
-        'shape': [int(df.shape[0]), int(df.shape[1])],
-        'columns': [str(col) for col in df.columns],
-        'data_types': data_types_dict,
-        'numeric_columns': [str(col) for col in df.select_dtypes(include=[np.number]).columns],
-        'categorical_columns': [str(col) for col in df.select_dtypes(include=['object']).columns],
-        'datetime_columns': [str(col) for col in df.select_dtypes(include=['datetime64']).columns],
-        'missing_values': missing_values_dict,
-        'sample_data': sample_data
-    }
-    
-    # Determine if this is financial data
-    financial_keywords = ['income', 'expense', 'profit', 'loss', 'revenue', 'cost', 'amount', 'price', 'sales']
-    is_financial = any(keyword in ' '.join(df.columns).lower() for keyword in financial_keywords)
-    analysis['is_financial'] = bool(is_financial)
-    
-    return analysis
-
 def create_visualizations(df, analysis):
-    """Create various visualizations based on the data analysis."""
-    charts = {}
-    
-    try:
-        # 1. Basic Data Overview Chart
-        if analysis['numeric_columns']:
-            # Create a summary chart of numeric columns
-            numeric_summary = df[analysis['numeric_columns']].describe()
-            fig = px.bar(x=numeric_summary.columns, y=numeric_summary.loc['mean'],
-                        title='Average Values by Column',
-                        labels={'x': 'Columns', 'y': 'Average Value'})
-            charts['numeric_summary'] = json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
-        
-        # 2. Correlation Heatmap (if multiple numeric columns)
-        if len(analysis['numeric_columns']) > 1:
-            correlation_matrix = df[analysis['numeric_columns']].corr()
-            fig = px.imshow(correlation_matrix,
-                           title='Correlation Heatmap',
-                           color_continuous_scale='RdBu',
-                           aspect='auto')
-            charts['correlation'] = json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
-        
-        # 3. Distribution Charts for Numeric Columns
-        if analysis['numeric_columns']:
-            for col in analysis['numeric_columns'][:3]:  # Limit to first 3 columns
-                fig = px.histogram(df, x=col, title=f'Distribution of {col}')
-                charts[f'distribution_{col}'] = json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
-        
-        # 4. Categorical Analysis
-        if analysis['categorical_columns']:
-            for col in analysis['categorical_columns'][:2]:  # Limit to first 2 columns
-                value_counts = df[col].value_counts().head(10)
-                fig = px.bar(x=value_counts.values, y=value_counts.index,
-                            orientation='h', title=f'Top 10 Values in {col}')
-                charts[f'categorical_{col}'] = json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
-        
-        # 5. Financial-specific charts (if applicable)
-        if analysis['is_financial']:
-            # Look for common financial column patterns
-            income_cols = [col for col in df.columns if 'income' in col.lower() or 'revenue' in col.lower()]
-            expense_cols = [col for col in df.columns if 'expense' in col.lower() or 'cost' in col.lower()]
-            
-            if income_cols and expense_cols:
-                # Income vs Expenses comparison
-                fig = px.scatter(df, x=expense_cols[0], y=income_cols[0],
-                               title=f'{income_cols[0]} vs {expense_cols[0]}',
-                               labels={expense_cols[0]: 'Expenses', income_cols[0]: 'Income'})
-                charts['income_vs_expenses'] = json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
-        
-        # 6. Time Series (if datetime columns exist)
-        if analysis['datetime_columns']:
-            for col in analysis['datetime_columns'][:1]:  # Limit to first datetime column
-                if analysis['numeric_columns']:
-                    # Create time series plot with first numeric column
-                    numeric_col = analysis['numeric_columns'][0]
-                    fig = px.line(df, x=col, y=numeric_col,
-                                title=f'{numeric_col} Over Time')
-                    charts['time_series'] = json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
-        
-        # 7. Scatter Plot Matrix (if multiple numeric columns)
-        if len(analysis['numeric_columns']) >= 2:
-            fig = px.scatter_matrix(df[analysis['numeric_columns'][:3]],
-                                  title='Scatter Plot Matrix')
-            charts['scatter_matrix'] = json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
-        
-    except Exception as e:
-        print(f"Error creating visualizations: {e}")
-        charts['error'] = str(e)
-    
-    return charts
+    """Create various visualizations based on the data analysis (all at once, in parallel)."""
+    return chart_jobs.render_all(df, analysis)
 
 def require_auth(f):
     """Decorator to require authentication for protected routes."""
@@ -171,7 +197,7 @@ def landing():
 @require_auth
 def index():
     """Main page with file upload form."""
-    return render_template('index.html')
+    return render_template('index.html', plotly_js_url=plotly_js_url())
 
 @app.route('/signin', methods=['GET', 'POST'])
 def signin():
@@ -199,7 +225,7 @@ def logout():
 @app.route('/demo')
 def demo():
     """Demo page - redirect to main visualizer."""
-    return render_template('index.html')
+    return render_template('index.html', plotly_js_url=plotly_js_url())
 
 @app.route('/about')
 def about():
@@ -221,20 +247,7 @@ def data_management():
 def get_files():
     """Get list of all event files."""
     try:
-        files = []
-        if os.path.exists('event_data'):
-            for filename in os.listdir('event_data'):
-                if filename.endswith('.json'):
-                    file_path = os.path.join('event_data', filename)
-                    with open(file_path, 'r') as f:
-                        data = json.load(f)
-                        files.append({
-                            'id': filename.replace('.json', ''),
-                            'name': data.get('name', filename),
-                            'event_count': len(data.get('events', [])),
-                            'created_date': data.get('created_date', ''),
-                            'last_modified': data.get('last_modified', '')
-                        })
+        files = event_store.list_files()
         return jsonify({'success': True, 'files': files})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -246,68 +259,93 @@ def create_file():
         data = request.json
         file_name = data.get('name', 'New Event File')
         
-        # Create event_data directory if it doesn't exist
-        os.makedirs('event_data', exist_ok=True)
-        
         # Generate unique file ID
-        file_id = f"owu_events_{int(datetime.now().timestamp())}"
-        
-        # Create file structure
-        file_data = {
-            'id': file_id,
-            'name': file_name,
-            'created_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'last_modified': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'events': []
-        }
-        
-        # Save file
-        file_path = os.path.join('event_data', f"{file_id}.json")
-        with open(file_path, 'w') as f:
-            json.dump(file_data, f, indent=2)
+        file_id = event_store.create_new_file(file_name)['id']
         
         return jsonify({'success': True, 'file_id': file_id, 'message': 'File created successfully'})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/files/import', methods=['POST'])
+def import_file():
+    """
+    Create a new event file from an uploaded spreadsheet (export layout or
+    wide OWU template; form field 'name' names the file). Nothing is created
+    if a row fails validation, unless ?partial=true.
+    """
+    from event_import import prepare_import
+    
+    try:
+        events, report, ignored = prepare_import(*read_import_request())
+        if report and request.args.get('partial', '').lower() not in ('1', 'true', 'yes'):
+            return jsonify({'success': False, 'imported': 0, 'errors': report, 'ignored_columns': ignored}), 400
+        
+        upload_name = request.files['file'].filename if 'file' in request.files else 'Imported Events'
+        file_name = request.form.get('name') or os.path.splitext(upload_name)[0]
+        file_id = event_store.create_new_file(file_name, events)['id']
+        
+        return jsonify({
+            'success': True,
+            'file_id': file_id,
+            'imported': len(events),
+            'errors': report,
+            'ignored_columns': ignored,
+            'message': f"Imported {len(events)} events into {file_name}"
+        })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/files/<file_id>', methods=['GET'])
 def get_file(file_id):
     """Get specific event file data."""
     try:
-        file_path = os.path.join('event_data', f"{file_id}.json")
-        if os.path.exists(file_path):
-            with open(file_path, 'r') as f:
-                data = json.load(f)
-            return jsonify({'success': True, 'data': data})
+        data = event_store.load(file_id)
+        if data is not None:
+            return with_file_etag(jsonify({'success': True, 'data': data}), file_id)
         else:
             return jsonify({'error': 'File not found'}), 404
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/files/<file_id>/events', methods=['GET'])
+def find_events(file_id):
+    """List the events of a file, optionally filtered by date range, name or location."""
+    try:
+        if not event_store.exists(file_id):
+            return jsonify({'error': 'File not found'}), 404
+        
+        events = event_store.find_events(
+            file_id,
+            start_date=request.args.get('start_date'),
+            end_date=request.args.get('end_date'),
+            name=request.args.get('name'),
+            location=request.args.get('location')
+        )
+        return jsonify({'success': True, 'events': events})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/files/<file_id>/events', methods=['POST'])
 def add_event(file_id):
     """Add a new event to a file."""
     try:
         data = request.json
-        file_path = os.path.join('event_data', f"{file_id}.json")
         
-        if not os.path.exists(file_path):
+        if not event_store.exists(file_id):
             return jsonify({'error': 'File not found'}), 404
         
-        with open(file_path, 'r') as f:
-            file_data = json.load(f)
-        
         # Extract basic information (always required)
         basic_data = data.get('basic', {})
         
-        # Create new event with basic information
+        # Create new event with basic information (the store assigns the id)
         new_event = {
-            'id': f"event_{len(file_data['events']) + 1}",
             'date': basic_data.get('date', ''),
             'name': basic_data.get('name', ''),
             'location': basic_data.get('location', ''),
             'description': basic_data.get('description', ''),
-            'created_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            'created_date': timestamp()
         }
         
         # Add income/expense data if provided
@@ -336,105 +374,178 @@ def add_event(file_id):
         if 'feedback' in data:
             new_event['feedback'] = data['feedback']
         
-        file_data['events'].append(new_event)
-        file_data['last_modified'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        with event_store.locked(file_id):
+            failed = precondition_failed(file_id)
+            if failed:
+                return failed
+            
+            # Append the event to the file's operation log
+            new_event = event_store.add_event(file_id, new_event)
+            frame_cache.invalidate(file_id)
+            
+            return with_file_etag(jsonify({'success': True, 'event': new_event, 'message': 'Event added successfully'}),
+                                  file_id)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def read_import_request():
+    """
+    Read the events of an import request into (rows, locations), see event_import.
+    
+    Takes an uploaded 'file' (.xlsx/.xls/.csv in the export layout or the
+    wide OWU template) or a JSON array, also accepted as {"events": [...]}.
+    """
+    from event_import import read_import_file, request_rows
+    
+    if 'file' in request.files:
+        upload = request.files['file']
+        if not allowed_file(upload.filename):
+            raise ValueError('Upload a .xlsx, .xls or .csv file')
+        df, locations = read_import_file(upload.filename, upload.stream)
+    else:
+        payload = request.get_json(silent=True)
+        df = request_rows(payload.get('events') if isinstance(payload, dict) else payload)
+        locations = [{'row': position + 1} for position in range(len(df))]
+    if df.empty:
+        raise ValueError('No events to import')
+    return df, locations
+
+@app.route('/api/files/<file_id>/events/bulk', methods=['POST'])
+def import_events(file_id):
+    """
+    Add many events in one write.
+    
+    Every row is validated first and nothing is written if any row fails,
+    unless ?partial=true, which imports the valid rows. The response lists
+    the errors per row (array position from 1, sheet row, or sheet column
+    for the wide template).
+    """
+    from event_import import prepare_import
+    
+    try:
+        if not event_store.exists(file_id):
+            return jsonify({'error': 'File not found'}), 404
         
-        # Save updated file
-        with open(file_path, 'w') as f:
-            json.dump(file_data, f, indent=2)
+        events, report, ignored = prepare_import(*read_import_request())
+        if report and request.args.get('partial', '').lower() not in ('1', 'true', 'yes'):
+            return jsonify({'success': False, 'imported': 0, 'errors': report, 'ignored_columns': ignored}), 400
         
-        return jsonify({'success': True, 'event': new_event, 'message': 'Event added successfully'})
+        with event_store.locked(file_id):
+            failed = precondition_failed(file_id)
+            if failed:
+                return failed
+            
+            # All valid rows are added with a single write
+            events = event_store.add_events(file_id, events) if events else []
+            frame_cache.invalidate(file_id)
+            
+            return with_file_etag(jsonify({
+                'success': True,
+                'imported': len(events),
+                'event_ids': [event['id'] for event in events],
+                'errors': report,
+                'ignored_columns': ignored,
+                'message': f"Imported {len(events)} events"
+            }), file_id)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/files/<file_id>/events/<event_id>', methods=['PUT'])
 def update_event(file_id, event_id):
-    """Update an existing event."""
+    """
+    Update an existing event.
+    
+    A 'last_modified' field in the body (the event's last_modified, or its
+    created_date if it was never edited) makes this an optimistic update: it
+    fails with 409 if someone else changed or deleted the event since. An
+    If-Match header with the file's ETag fails with 412 on any change to
+    the file.
+    """
     try:
         data = request.json
-        file_path = os.path.join('event_data', f"{file_id}.json")
         
-        if not os.path.exists(file_path):
+        if not event_store.exists(file_id):
             return jsonify({'error': 'File not found'}), 404
         
-        with open(file_path, 'r') as f:
-            file_data = json.load(f)
-        
-        # Find and update event
-        for event in file_data['events']:
-            if event['id'] == event_id:
-                # Update basic information
-                basic_data = data.get('basic', {})
-                event['date'] = basic_data.get('date', event.get('date', ''))
-                event['name'] = basic_data.get('name', event.get('name', ''))
-                event['location'] = basic_data.get('location', event.get('location', ''))
-                event['description'] = basic_data.get('description', event.get('description', ''))
-                
-                # Update income/expense data if provided
-                if 'incomeExpense' in data:
-                    income_expense = data['incomeExpense']
-                    event['income'] = float(income_expense.get('income', event.get('income', 0)))
-                    event['expenses'] = float(income_expense.get('expenses', event.get('expenses', 0)))
-                    event['underwritten'] = float(income_expense.get('underwritten', event.get('underwritten', 0)))
-                    event['profit_loss'] = float(income_expense.get('profitLoss', event.get('profit_loss', 0)))
-                
-                # Update attendance data if provided
-                if 'attendance' in data:
-                    event['attendance'] = data['attendance']
-                
-                # Update first time attendees data if provided
-                if 'firstTimeAttendees' in data:
-                    event['first_time_attendees'] = data['firstTimeAttendees']
-                
-                # Update feedback data if provided
-                if 'feedback' in data:
-                    event['feedback'] = data['feedback']
-                
-                event['last_modified'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                break
-        
-        file_data['last_modified'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        
-        # Save updated file
-        with open(file_path, 'w') as f:
-            json.dump(file_data, f, indent=2)
-        
-        return jsonify({'success': True, 'message': 'Event updated successfully'})
+        # Collect the fields to replace; anything not provided keeps its value
+        basic_data = data.get('basic', {})
+        changes = {key: basic_data[key] for key in ('date', 'name', 'location', 'description') if key in basic_data}
+        
+        # Update income/expense data if provided
+        if 'incomeExpense' in data:
+            income_expense = data['incomeExpense']
+            for field, key in (('income', 'income'), ('expenses', 'expenses'),
+                               ('underwritten', 'underwritten'), ('profit_loss', 'profitLoss')):
+                if key in income_expense:
+                    changes[field] = float(income_expense[key])
+        
+        # Update attendance data if provided
+        if 'attendance' in data:
+            changes['attendance'] = data['attendance']
+        
+        # Update first time attendees data if provided
+        if 'firstTimeAttendees' in data:
+            changes['first_time_attendees'] = data['firstTimeAttendees']
+        
+        # Update feedback data if provided
+        if 'feedback' in data:
+            changes['feedback'] = data['feedback']
+        
+        changes['last_modified'] = timestamp()
+        
+        with event_store.locked(file_id):
+            failed = precondition_failed(file_id)
+            if failed:
+                return failed
+            
+            # Append the update to the file's operation log
+            event_store.update_event(file_id, event_id, changes, expected_modified=data.get('last_modified'))
+            frame_cache.invalidate(file_id)
+            
+            return with_file_etag(jsonify({'success': True, 'last_modified': changes['last_modified'],
+                                           'message': 'Event updated successfully'}), file_id)
+    except ConflictError as e:
+        return conflict(file_id, event_id, e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/files/<file_id>/events/<event_id>', methods=['DELETE'])
 def delete_event(file_id, event_id):
-    """Delete an event from a file."""
+    """Delete an event from a file (?last_modified= and If-Match as for updates)."""
     try:
-        file_path = os.path.join('event_data', f"{file_id}.json")
-        
-        if not os.path.exists(file_path):
+        if not event_store.exists(file_id):
             return jsonify({'error': 'File not found'}), 404
         
-        with open(file_path, 'r') as f:
-            file_data = json.load(f)
-        
-        # Remove event
-        file_data['events'] = [event for event in file_data['events'] if event['id'] != event_id]
-        file_data['last_modified'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        
-        # Save updated file
-        with open(file_path, 'w') as f:
-            json.dump(file_data, f, indent=2)
-        
-        return jsonify({'success': True, 'message': 'Event deleted successfully'})
+        with event_store.locked(file_id):
+            failed = precondition_failed(file_id)
+            if failed:
+                return failed
+            
+            # Append the removal to the file's operation log
+            event_store.delete_event(file_id, event_id, expected_modified=request.args.get('last_modified'))
+            frame_cache.invalidate(file_id)
+            
+            return with_file_etag(jsonify({'success': True, 'message': 'Event deleted successfully'}), file_id)
+    except ConflictError as e:
+        return conflict(file_id, event_id, e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/files/<file_id>', methods=['DELETE'])
 def delete_file(file_id):
-    """Delete an entire event file."""
+    """Delete an entire event file (If-Match as for event updates)."""
     try:
-        file_path = os.path.join('event_data', f"{file_id}.json")
-        
-        if os.path.exists(file_path):
-            os.remove(file_path)
+        with event_store.locked(file_id):
+            failed = precondition_failed(file_id) if event_store.exists(file_id) else None
+            if failed:
+                return failed
+            deleted = event_store.delete_file(file_id)
+        if deleted:
+            frame_cache.invalidate(file_id)
+            snapshots.discard(file_id)
+            exports.discard(file_id)
             return jsonify({'success': True, 'message': 'File deleted successfully'})
         else:
             return jsonify({'error': 'File not found'}), 404
@@ -443,209 +554,236 @@ def delete_file(file_id):
 
 @app.route('/api/files/<file_id>/export', methods=['GET'])
 def export_file(file_id):
-    """Export event file as Excel with comprehensive data."""
+    """
+    Export an event file (?format=xlsx|csv|json|parquet, default xlsx;
+    ?layout=sections puts each event section on its own xlsx sheet).
+    
+    Each export is generated once per file version and cached; responses
+    carry an ETag and Last-Modified, and a client that already has the
+    current version gets 304 Not Modified.
+    """
     try:
-        file_path = os.path.join('event_data', f"{file_id}.json")
+        name, extension, mimetype, write = export_writer(request.args.get('format', 'xlsx'),
+                                                         request.args.get('layout'))
         
-        if not os.path.exists(file_path):
+        if not event_store.exists(file_id):
             return jsonify({'error': 'File not found'}), 404
         
-        with open(file_path, 'r') as f:
-            file_data = json.load(f)
-        
-        # Create comprehensive DataFrame for export
-        events_data = []
-        for event in file_data['events']:
-            # Start with basic information
-            event_row = {
-                'Date': event.get('date', ''),
-                'Event Name': event.get('name', ''),
-                'Location': event.get('location', ''),
-                'Description': event.get('description', ''),
-                'Event Income': event.get('income', 0),
-                'All Incurred Expenses': event.get('expenses', 0),
-                'Underwritten': event.get('underwritten', 0),
-                'Profit/Loss': event.get('profit_loss', 0)
-            }
-            
-            # Add attendance data if available
-            if 'attendance' in event:
-                attendance = event['attendance']
-                if 'yearRanges' in attendance:
-                    event_row['Young Alumni Start Year'] = attendance['yearRanges'].get('yaStartYear', '')
-                    event_row['Young Alumni End Year'] = attendance['yearRanges'].get('yaEndYear', '')
-                    event_row['Alumni Cutoff Year'] = attendance['yearRanges'].get('alumniCutoffYear', '')
-                
-                if 'alumni' in attendance:
-                    event_row['Young Alumni Registered'] = attendance['alumni'].get('yaRegistered', 0)
-                    event_row['Alumni Registered'] = attendance['alumni'].get('alumniRegistered', 0)
-                    event_row['Total Alumni Attended'] = attendance['alumni'].get('totalAlumniAttended', 0)
-                
-                if 'other' in attendance:
-                    event_row['Students Attended'] = attendance['other'].get('students', 0)
-                    event_row['Friends/Family Attended'] = attendance['other'].get('friendsFamily', 0)
-                    event_row['Staff/Faculty Attended'] = attendance['other'].get('staffFaculty', 0)
-                
-                if 'totals' in attendance:
-                    event_row['Total Alumni/Guests'] = attendance['totals'].get('totalAlumniGuests', 0)
-                    event_row['% Young Alumni Attendees'] = attendance['totals'].get('percentYAAttendees', 0)
-                    event_row['% Non-Young Alumni Attendees'] = attendance['totals'].get('percentNonYAAttendees', 0)
-            
-            # Add first time attendees data if available
-            if 'first_time_attendees' in event:
-                first_time = event['first_time_attendees']
-                event_row['1st Time Alumni'] = first_time.get('alumni', 0)
-                event_row['1st Time Parents'] = first_time.get('parents', 0)
-                event_row['1st Time Friends'] = first_time.get('friends', 0)
-            
-            # Add feedback data if available
-            if 'feedback' in event:
-                feedback = event['feedback']
-                event_row['5-Star Ratings'] = feedback.get('rating5', 0)
-                event_row['4-Star Ratings'] = feedback.get('rating4', 0)
-                event_row['3-Star Ratings'] = feedback.get('rating3', 0)
-                event_row['2-Star Ratings'] = feedback.get('rating2', 0)
-                event_row['1-Star Ratings'] = feedback.get('rating1', 0)
-                event_row['Total Ratings'] = feedback.get('total', 0)
-            
-            events_data.append(event_row)
+        version = event_store.version(file_id)
+        etag = exports.etag(file_id, version, name)
+        if request.if_none_match.contains(etag):
+            response = app.response_class(status=304)
+            response.set_etag(etag)
+            return response
         
-        df = pd.DataFrame(events_data)
+        frame = load_event_frame(file_id)
+        if frame is None:
+            return jsonify({'error': 'File not found'}), 404
         
-        # Create Excel file with proper naming
-        excel_path = os.path.join('event_data', f"{file_id}_export.xlsx")
-        with pd.ExcelWriter(excel_path, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='Event Data', index=False)
-            
-            # Get the workbook and worksheet
-            workbook = writer.book
-            worksheet = writer.sheets['Event Data']
-            
-            # Format headers
-            for col in range(1, len(df.columns) + 1):
-                cell = worksheet.cell(row=1, column=col)
-                cell.font = cell.font.copy(bold=True)
-                cell.fill = openpyxl.styles.PatternFill(start_color='D00000', end_color='D00000', fill_type='solid')
-                cell.font = cell.font.copy(color='FFFFFF')
-        
-        # Use the file name from the data for the download
-        file_name = file_data.get('name', 'OWU_Event_Data')
-        # Clean the filename for download
-        clean_filename = "".join(c for c in file_name if c.isalnum() or c in (' ', '-', '_')).rstrip()
-        
-        return send_file(excel_path, as_attachment=True, download_name=f"{clean_filename}.xlsx")
+        # Flattened events, one column per field
+        _, file_name, df = frame
+        
+        # Written in chunks straight to the cache file, then streamed from the open file,
+        # which stays readable if a newer version's export sweeps it meanwhile
+        artifact = exports.get(file_id, version, name, lambda stream: write(df, stream))
+        stat = os.fstat(artifact.fileno())
+        response = send_file(artifact, as_attachment=True, download_name=download_name(file_name, extension),
+                             mimetype=mimetype, etag=etag, last_modified=stat.st_mtime, conditional=False)
+        response.content_length = stat.st_size
+        return response.make_conditional(request, accept_ranges=True, complete_length=stat.st_size)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/files/<file_id>/visualize', methods=['GET'])
 def visualize_file(file_id):
-    """Get file data for visualization."""
+    """
+    Get file data for visualization (?offset=&limit= to page the rows,
+    ?columns=a,b to project them). Event columns the file has no values for
+    (sections no event fills in) are left out of a projection.
+    """
     try:
-        file_path = os.path.join('event_data', f"{file_id}.json")
+        frame = load_event_frame(file_id)
         
-        if not os.path.exists(file_path):
+        if frame is None:
             return jsonify({'error': 'File not found'}), 404
         
-        with open(file_path, 'r') as f:
-            file_data = json.load(f)
-        
-        # Convert to comprehensive DataFrame for analysis
-        events_data = []
-        for event in file_data['events']:
-            # Start with basic information
-            event_row = {
-                'Date': event.get('date', ''),
-                'Event Name': event.get('name', ''),
-                'Location': event.get('location', ''),
-                'Description': event.get('description', ''),
-                'Event Income': event.get('income', 0),
-                'All Incurred Expenses': event.get('expenses', 0),
-                'Underwritten': event.get('underwritten', 0),
-                'Profit/Loss': event.get('profit_loss', 0)
-            }
-            
-            # Add attendance data if available
-            if 'attendance' in event:
-                attendance = event['attendance']
-                if 'yearRanges' in attendance:
-                    event_row['Young Alumni Start Year'] = attendance['yearRanges'].get('yaStartYear', '')
-                    event_row['Young Alumni End Year'] = attendance['yearRanges'].get('yaEndYear', '')
-                    event_row['Alumni Cutoff Year'] = attendance['yearRanges'].get('alumniCutoffYear', '')
-                
-                if 'alumni' in attendance:
-                    event_row['Young Alumni Registered'] = attendance['alumni'].get('yaRegistered', 0)
-                    event_row['Alumni Registered'] = attendance['alumni'].get('alumniRegistered', 0)
-                    event_row['Total Alumni Attended'] = attendance['alumni'].get('totalAlumniAttended', 0)
-                
-                if 'other' in attendance:
-                    event_row['Students Attended'] = attendance['other'].get('students', 0)
-                    event_row['Friends/Family Attended'] = attendance['other'].get('friendsFamily', 0)
-                    event_row['Staff/Faculty Attended'] = attendance['other'].get('staffFaculty', 0)
-                
-                if 'totals' in attendance:
-                    event_row['Total Alumni/Guests'] = attendance['totals'].get('totalAlumniGuests', 0)
-                    event_row['% Young Alumni Attendees'] = attendance['totals'].get('percentYAAttendees', 0)
-                    event_row['% Non-Young Alumni Attendees'] = attendance['totals'].get('percentNonYAAttendees', 0)
-            
-            # Add first time attendees data if available
-            if 'first_time_attendees' in event:
-                first_time = event['first_time_attendees']
-                event_row['1st Time Alumni'] = first_time.get('alumni', 0)
-                event_row['1st Time Parents'] = first_time.get('parents', 0)
-                event_row['1st Time Friends'] = first_time.get('friends', 0)
-            
-            # Add feedback data if available
-            if 'feedback' in event:
-                feedback = event['feedback']
-                event_row['5-Star Ratings'] = feedback.get('rating5', 0)
-                event_row['4-Star Ratings'] = feedback.get('rating4', 0)
-                event_row['3-Star Ratings'] = feedback.get('rating3', 0)
-                event_row['2-Star Ratings'] = feedback.get('rating2', 0)
-                event_row['1-Star Ratings'] = feedback.get('rating1', 0)
-                event_row['Total Ratings'] = feedback.get('total', 0)
-            
-            events_data.append(event_row)
+        version, file_name, df = frame
         
-        df = pd.DataFrame(events_data)
+        offset = request.args.get('offset', 0, type=int)
+        limit = request.args.get('limit', type=int)
+        if offset < 0 or (limit is not None and limit < 0):
+            return jsonify({'error': 'offset and limit must be non-negative integers'}), 400
         
-        # Analyze the data
-        analysis = analyze_data(df)
+        columns = request.args.get('columns')
+        if columns:
+            columns = columns.split(',')
+            unknown = [col for col in columns if col not in df.columns and col not in EVENT_COLUMNS]
+            if unknown:
+                return jsonify({'error': f"Unknown columns: {', '.join(unknown)}"}), 400
+            columns = [col for col in columns if col in df.columns]
+        else:
+            columns = None
+        
+        stop = len(df) if limit is None else offset + limit
+        if columns is not None or offset or stop < len(df):
+            rows = df.iloc[offset:stop]
+            records = frame_records(rows if columns is None else rows[columns])
+        else:
+            records = cached_records(file_id, version, df)
         
         return jsonify({
             'success': True,
-            'file_name': file_data['name'],
+            'file_name': file_name,
             'analysis': {
-                'shape': analysis['shape'],
-                'data': df.to_dict('records')
+                'shape': [int(df.shape[0]), int(df.shape[1])]
             },
+            'total': int(len(df)),
+            'offset': offset,
+            'columns': [str(col) for col in df.columns] if columns is None else columns,
             'charts': {},
-            'data': df.to_dict('records')
+            'data': records
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/files/<file_id>/aggregates', methods=['GET'])
+def get_aggregates(file_id):
+    """Get the financial, attendance, first-time and feedback rollups of a file."""
+    try:
+        frame = load_event_frame(file_id)
+        
+        if frame is None:
+            return jsonify({'error': 'File not found'}), 404
+        
+        version, file_name, df = frame
+        aggregates = cached_aggregates(file_id, version, df)
+        
+        return jsonify({
+            'success': True,
+            'file_name': file_name,
+            'aggregates': aggregates
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/files/<file_id>/statistics', methods=['GET'])
+def get_statistics(file_id):
+    """Get quantiles, variance, box-plot summaries and correlations of a file's numeric fields."""
+    from event_aggregates import event_statistics
+    
+    try:
+        frame = load_event_frame(file_id)
+        
+        if frame is None:
+            return jsonify({'error': 'File not found'}), 404
+        
+        version, file_name, df = frame
+        statistics = frame_cache.get(file_id, version, 'statistics', lambda: event_statistics(df))
+        
+        return jsonify({
+            'success': True,
+            'file_name': file_name,
+            'statistics': statistics
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/seasons', methods=['GET'])
+def query_seasons():
+    """
+    Aggregate income, expenses and attendance across all event files.
+    
+    Filters: start_date, end_date, name, location, files (comma-separated ids);
+    group_by: month (default), year, series or file.
+    """
+    try:
+        files = request.args.get('files')
+        result = season_index.query(
+            start_date=request.args.get('start_date'),
+            end_date=request.args.get('end_date'),
+            name=request.args.get('name'),
+            location=request.args.get('location'),
+            file_ids=files.split(',') if files else None,
+            group_by=request.args.get('group_by', 'month')
+        )
+        return jsonify({'success': True, **result})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/warmup', methods=['GET'])
+def warmup_status():
+    """Progress of the background cache warm-up (state 'idle' when it was not enabled)."""
+    return jsonify({'success': True, **warmup.status()})
+
 @app.route('/visualize-managed-data/<file_id>')
 @require_auth
 def visualize_managed_data_page(file_id):
     """Page to visualize managed data."""
     try:
-        file_path = os.path.join('event_data', f"{file_id}.json")
+        frame = load_event_frame(file_id)
         
-        if not os.path.exists(file_path):
+        if frame is None:
             return "File not found", 404
         
-        with open(file_path, 'r') as f:
-            file_data = json.load(f)
-        
         return render_template('visualize_managed_data.html', 
                              file_id=file_id, 
-                             file_name=file_data['name'])
+                             file_name=frame[1])
     except Exception as e:
         return f"Error: {str(e)}", 500
 
+def process_upload(job, filepath, file_extension):
+    """Parse, clean, profile and chart an uploaded file for an upload job; returns the response body."""
+    import pandas as pd
+    from charts import sampling_note, template_json
+    from upload_processing import analyze_data, read_csv_streaming
+    
+    # Read file based on extension
+    if file_extension in ['xlsx', 'xls']:
+        job.update('parsing')
+        df = pd.read_excel(filepath)
+        
+        # Analyze data
+        job.update('profiling')
+        analysis = analyze_data(df)
+    elif file_extension == 'csv':
+        # Stream the CSV in chunks: clean each chunk and profile it
+        # incrementally, keeping a bounded row sample for the charts
+        df, analysis = read_csv_streaming(filepath, progress=job.update)
+    
+    # Debug: Print data info
+    print(f"DataFrame shape: {df.shape}")
+    print(f"DataFrame columns: {list(df.columns)}")
+    print(f"DataFrame head:\n{df.head()}")
+    
+    # Start the charts in the background; the page fetches each one by id
+    job.update('charting')
+    chart_set = chart_jobs.submit(df, analysis)
+    
+    return app.json.response({
+        'success': True,
+        'analysis': analysis,
+        'charts': {},
+        'chart_template': template_json(),
+        'chart_note': sampling_note(analysis['shape'][0]),
+        'chart_set': chart_set.id,
+        'chart_ids': chart_set.chart_ids,
+        'message': 'File processed successfully!'
+    }).get_data(as_text=True)
+
+def remove_upload(filepath):
+    """Delete an uploaded file once its job is over."""
+    try:
+        os.remove(filepath)
+    except FileNotFoundError:
+        pass
+
 @app.route('/upload', methods=['POST'])
 def upload_file():
-    """Handle file upload and create visualizations."""
+    """Save an uploaded file and queue it for processing; poll /upload/jobs/<job_id> for the result."""
     try:
         if 'file' not in request.files:
             return jsonify({'error': 'No file uploaded'}), 400
@@ -663,49 +801,17 @@ def upload_file():
             # Save file
             file.save(filepath)
             
-            # Read file based on extension
+            # Process it in the upload pool; the file is removed when the job is over
             file_extension = filename.rsplit('.', 1)[1].lower()
-            if file_extension in ['xlsx', 'xls']:
-                df = pd.read_excel(filepath)
-            elif file_extension == 'csv':
-                # Handle CSV files (standard format)
-                df = pd.read_csv(filepath)
-                
-                # Clean up the data
-                df = df.replace(['n/a', 'n/a (AG)', '(n/a)', ''], np.nan)
-                
-                # Convert currency strings to numeric values
-                for col in df.columns:
-                    try:
-                        if df[col].dtype == 'object':
-                            # Convert to string first, then clean and convert to numeric
-                            df[col] = df[col].astype(str).str.replace('$', '').str.replace(',', '')
-                            # Try to convert to numeric, keeping NaN for non-numeric values
-                            df[col] = pd.to_numeric(df[col], errors='coerce')
-                    except Exception as e:
-                        print(f"Warning: Could not convert column {col}: {e}")
-                        continue
-            
-            # Analyze data
-            analysis = analyze_data(df)
-            
-            # Debug: Print data info
-            print(f"DataFrame shape: {df.shape}")
-            print(f"DataFrame columns: {list(df.columns)}")
-            print(f"DataFrame head:\n{df.head()}")
-            
-            # Create visualizations
-            charts = create_visualizations(df, analysis)
-            
-            # Clean up uploaded file
-            os.remove(filepath)
+            job = upload_jobs.submit(lambda job: process_upload(job, filepath, file_extension), filename,
+                                     cleanup=lambda: remove_upload(filepath))
             
             return jsonify({
                 'success': True,
-                'analysis': analysis,
-                'charts': charts,
-                'message': 'File processed successfully!'
-            })
+                'job_id': job.id,
+                'job': job.status(),
+                'message': 'File uploaded, processing...'
+            }), 202
         
         else:
             return jsonify({'error': 'Invalid file type. Please upload a data file (.xlsx, .xls, or .csv)'}), 400
@@ -713,51 +819,125 @@ def upload_file():
     except Exception as e:
         return jsonify({'error': f'Error processing file: {str(e)}'}), 500
 
+@app.route('/upload/jobs/<job_id>', methods=['GET'])
+def upload_job_status(job_id):
+    """State (queued, running, done, failed, cancelled), stage and progress of an upload job."""
+    job = upload_jobs.status(job_id)
+    if job is None:
+        return jsonify({'error': 'Upload job not found or expired'}), 404
+    return jsonify({'success': True, 'job': job})
+
+@app.route('/upload/jobs/<job_id>/result', methods=['GET'])
+def upload_job_result(job_id):
+    """The analysis and chart ids of a finished upload job (202 with its status while it runs)."""
+    job, result = upload_jobs.result(job_id)
+    if job is None:
+        return jsonify({'error': 'Upload job not found or expired'}), 404
+    if job['state'] == 'failed':
+        return jsonify({'error': f"Error processing file: {job['error']}", 'job': job}), 500
+    if job['state'] == 'cancelled':
+        return jsonify({'error': 'Upload job was cancelled', 'job': job}), 409
+    if result is None:
+        return jsonify({'success': True, 'job': job}), 202
+    return app.response_class(result, mimetype='application/json')
+
+@app.route('/upload/jobs/<job_id>', methods=['DELETE'])
+def cancel_upload_job(job_id):
+    """Cancel an upload job that is still running, or discard a finished one."""
+    job = upload_jobs.cancel(job_id)
+    if job is None:
+        return jsonify({'error': 'Upload job not found or expired'}), 404
+    return jsonify({'success': True, 'job': job})
+
+@app.route('/charts/<set_id>/<path:chart_id>')
+def get_chart(set_id, chart_id):
+    """Return one chart of an upload as Plotly figure JSON, waiting for it if still rendering."""
+    chart_set = chart_jobs.get(set_id)
+    if chart_set is None or chart_id not in chart_set.chart_ids:
+        return jsonify({'error': 'Chart not found or expired'}), 404
+    try:
+        return app.response_class(chart_set.result(chart_id), mimetype='application/json')
+    except TimeoutError as e:
+        return jsonify({'error': str(e)}), 504
+    except Exception as e:
+        return jsonify({'error': f'Error creating visualization: {str(e)}'}), 500
+
+# Cached /sample-data response body; the demo data never changes, so it is built once per process
+_sample_body = None
+_sample_lock = threading.Lock()
+
+def sample_payload():
+    """The serialized /sample-data response, built on first use (or by the warm-up)."""
+    global _sample_body
+    with _sample_lock:
+        if _sample_body is None:
+            _sample_body = app.json.response(build_sample_data()).get_data()
+        return _sample_body
+
+def build_sample_data():
+    """Analyze and chart the demo events."""
+    import pandas as pd
+    from charts import template_json
+    from upload_processing import analyze_data
+    
+    # Create sample financial data for Ohio Wesleyan University events
+    events = [
+        "07/27/2024 OWU Football Golf Outing",
+        "8/02/2024 OWU Clippers Home Game", 
+        "8/15/2024 OWU Legacy Reception",
+        "8/21/2024 OWU Senior Class Welcome Back",
+        "8/25/2024 OWU Monnett Club Event",
+        "9/11/2024 OWU Near You - Toledo",
+        "9/11/2024 OWU Near You - Denver",
+        "9/12/2024 OWU Near You - Tucson",
+        "9/12/2024 OWU Near You - Cleveland",
+        "9/12/2024 OWU Near You - Atlanta",
+        "9/12/2024 OWU Near You - Chicago",
+        "9/13/2024 OWU Near You - Cincinnati"
+    ]
+    
+    data = {
+        'Event': events,
+        'Event Income': [0, 350, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+        'All Incurred Expenses': [0, 500, 501, 275, 0, 114, 14, 14, 14, 14, 14, 14],
+        'Underwritten': [0, 0, 0, 0, 0, 0, 700, 0, 0, 0, 0, 0],
+        'Profit/Loss': [0, -150, 0, 0, 0, 0, -14, -14, -14, -14, -14, -14]
+    }
+    
+    df = pd.DataFrame(data)
+    
+    # Analyze sample data
+    analysis = analyze_data(df)
+    
+    # Create visualizations
+    charts = create_visualizations(df, analysis)
+    
+    return {
+        'success': True,
+        'analysis': analysis,
+        'charts': charts,
+        'chart_template': template_json(),
+        'message': 'Sample data loaded successfully!'
+    }
+
 @app.route('/sample-data')
 def get_sample_data():
     """Generate sample data for demonstration."""
     try:
-        # Create sample financial data for Ohio Wesleyan University events
-        events = [
-            "07/27/2024 OWU Football Golf Outing",
-            "8/02/2024 OWU Clippers Home Game", 
-            "8/15/2024 OWU Legacy Reception",
-            "8/21/2024 OWU Senior Class Welcome Back",
-            "8/25/2024 OWU Monnett Club Event",
-            "9/11/2024 OWU Near You - Toledo",
-            "9/11/2024 OWU Near You - Denver",
-            "9/12/2024 OWU Near You - Tucson",
-            "9/12/2024 OWU Near You - Cleveland",
-            "9/12/2024 OWU Near You - Atlanta",
-            "9/12/2024 OWU Near You - Chicago",
-            "9/13/2024 OWU Near You - Cincinnati"
-        ]
-        
-        data = {
-            'Event': events,
-            'Event Income': [0, 350, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-            'All Incurred Expenses': [0, 500, 501, 275, 0, 114, 14, 14, 14, 14, 14, 14],
-            'Underwritten': [0, 0, 0, 0, 0, 0, 700, 0, 0, 0, 0, 0],
-            'Profit/Loss': [0, -150, 0, 0, 0, 0, -14, -14, -14, -14, -14, -14]
-        }
-        
-        df = pd.DataFrame(data)
-        
-        # Analyze sample data
-        analysis = analyze_data(df)
-        
-        # Create visualizations
-        charts = create_visualizations(df, analysis)
-        
-        return jsonify({
-            'success': True,
-            'analysis': analysis,
-            'charts': charts,
-            'message': 'Sample data loaded successfully!'
-        })
-    
+        return app.response_class(sample_payload(), mimetype='application/json')
     except Exception as e:
         return jsonify({'error': f'Error generating sample data: {str(e)}'}), 500
 
 if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='OWU Alumni Office data visualizer')
+    parser.add_argument('--storage', choices=['json', 'sqlite'], default=os.environ.get('OWU_STORAGE', 'json'),
+                        help='backend for the managed event files (default: json)')
+    parser.add_argument('--warmup', action='store_true', default=os.environ.get('OWU_WARMUP') == '1',
+                        help='fill the analytics caches of all event files in the background at startup')
+    args = parser.parse_args()
+    configure_storage(args.storage)
+    # With the reloader, only the serving child process warms up
+    if args.warmup and os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_warmup()
     app.run(debug=True, host='0.0.0.0', port=5001)